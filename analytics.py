@@ -0,0 +1,134 @@
+"""
+Statistiche settimanali e carico di lavoro dei docenti.
+
+Le lezioni vengono raccolte in una tabella colonnare pandas (una riga per
+lezione: docente, giorno, ora, classe, edificio, piano, aula) e tutte le
+statistiche sono aggregazioni vettoriali su questa tabella, senza cicli
+Python per docente o per giorno:
+
+- ore per classe;
+- per docente e giorno: lezioni, buchi (ore senza lezione tra la prima e
+  l'ultima lezione, DISP. comprese), cambi di edificio e piani percorsi tra
+  lezioni consecutive.
+
+Per i piani "PT" vale 0 e "1P", "2P", ... il numero indicato; cambiando
+edificio si scende al piano terra e si risale. Piani non riconosciuti non
+contano.
+"""
+
+import numpy as np
+import pandas as pd
+
+from schedule_engine import GIORNI
+from schedule_model import as_grid
+
+
+def lessons_frame(lessons):
+    """Tabella delle lezioni da (docente, giorno, ora, slot); gli slot non lezione sono ignorati"""
+    rows = [(docente, giorno, str(ora)) + slot.astuple()
+            for docente, giorno, ora, slot in lessons if slot.is_lesson]
+    columns = list(zip(*rows)) if rows else [()] * 7
+    # Colonne categoriche: le conversioni (ora, piano) lavorano sui soli valori distinti
+    docente, giorno, ora, classe, edificio, piano, aula = (pd.Categorical(c) for c in columns)
+    days = GIORNI + sorted(set(giorno.categories) - set(GIORNI))
+
+    frame = pd.DataFrame({
+        'docente': docente,
+        'giorno': pd.Categorical(giorno, categories=days, ordered=True),
+        'ora': _from_categories(ora, pd.to_numeric(pd.Series(ora.categories), errors='coerce')),
+        'classe': classe,
+        'edificio': edificio,
+        'piano': piano,
+        'aula': aula,
+        'livello': _from_categories(piano, floor_levels(pd.Series(piano.categories))),
+    })
+    frame = frame.dropna(subset=['ora'])
+    frame['ora'] = frame['ora'].astype('int16')
+    return frame.sort_values(['docente', 'giorno', 'ora'], ignore_index=True)
+
+
+def _from_categories(categorical, values):
+    # Valore per riga a partire dai valori calcolati per ogni categoria
+    values = np.append(np.asarray(values, dtype='float64'), np.nan)
+    return values[categorical.codes]
+
+
+def schedule_frame(schedule_data):
+    """Tabella delle lezioni di un singolo orario"""
+    docente = schedule_data.get('docente', '')
+    grid = as_grid(schedule_data.get('schedule'))
+    return lessons_frame((docente, giorno, ora, slot) for giorno, ora, slot in grid.iter_lessons())
+
+
+def storage_frame(storage, istituto=None, anno_scolastico=None):
+    """Tabella delle lezioni di tutti i docenti di un archivio (ScheduleStorage)"""
+    return lessons_frame((record['docente'], giorno, ora, slot)
+                         for record, giorno, ora, slot in storage.iter_lessons(istituto, anno_scolastico))
+
+
+def floor_levels(piano):
+    """Numero del piano (PT = 0, 1P = 1, ...); NaN se non riconosciuto"""
+    piano = piano.astype(str).str.strip().str.upper()
+    levels = pd.to_numeric(piano.str.extract(r'(-?\d+)', expand=False), errors='coerce')
+    return levels.mask(piano.isin(['PT', 'T', 'PIANO TERRA']), 0.0).astype('float32')
+
+
+def _transitions(frame):
+    # Confronto di ogni lezione con la precedente dello stesso docente nello stesso giorno
+    docente = frame['docente'].cat.codes.to_numpy()
+    giorno = frame['giorno'].cat.codes.to_numpy()
+    edificio = frame['edificio'].cat.codes.to_numpy()
+    livello = np.nan_to_num(frame['livello'].to_numpy())
+
+    same_day = np.zeros(len(frame), dtype=bool)
+    same_day[1:] = (docente[1:] == docente[:-1]) & (giorno[1:] == giorno[:-1])
+    changed = np.zeros(len(frame), dtype=bool)
+    changed[1:] = edificio[1:] != edificio[:-1]
+    changed &= same_day
+
+    previous = np.zeros(len(frame), dtype=livello.dtype)
+    previous[1:] = livello[:-1]
+    floors = np.where(changed, np.abs(previous) + np.abs(livello), np.abs(livello - previous))
+    floors = np.where(same_day, floors, 0)
+    return changed.astype('int16'), floors
+
+
+def daily_summary(frame):
+    """Per docente e giorno: lezioni, prima/ultima ora, buchi, cambi di edificio, piani percorsi"""
+    changed, floors = _transitions(frame)
+    work = pd.DataFrame({
+        'docente': frame['docente'],
+        'giorno': frame['giorno'],
+        'ora': frame['ora'],
+        'cambi_edificio': changed,
+        'piani_percorsi': floors,
+    })
+    summary = work.groupby(['docente', 'giorno'], observed=True, sort=True).agg(
+        lezioni=('ora', 'size'),
+        prima=('ora', 'min'),
+        ultima=('ora', 'max'),
+        cambi_edificio=('cambi_edificio', 'sum'),
+        piani_percorsi=('piani_percorsi', 'sum'),
+    )
+    summary['buchi'] = summary['ultima'] - summary['prima'] + 1 - summary['lezioni']
+    return summary.reset_index()[['docente', 'giorno', 'lezioni', 'prima', 'ultima', 'buchi',
+                                  'cambi_edificio', 'piani_percorsi']]
+
+
+def teacher_summary(daily):
+    """Totali settimanali per docente a partire da daily_summary"""
+    summary = daily.groupby('docente', observed=True).agg(
+        giorni=('giorno', 'size'),
+        lezioni=('lezioni', 'sum'),
+        buchi=('buchi', 'sum'),
+        cambi_edificio=('cambi_edificio', 'sum'),
+        piani_percorsi=('piani_percorsi', 'sum'),
+    )
+    return summary.reset_index().sort_values(['buchi', 'cambi_edificio'], ascending=False,
+                                             ignore_index=True)
+
+
+def hours_per_class(frame):
+    """Ore settimanali per classe, dalla più frequente"""
+    counts = frame.groupby('classe', observed=True).size()
+    return counts.sort_values(ascending=False).rename('ore').reset_index()
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+API HTTP in sola lettura per consultare gli orari senza passare da Streamlit.
+
+Serve gli stessi dati dell'app (l'archivio ORARIO_ARCHIVIO oppure
+config_orario.json) con la libreria standard:
+
+    GET /                                   elenco dei docenti (HTML)
+    GET /api/docenti                        elenco dei docenti (JSON)
+    GET /api/docenti/<id>                   dati dell'orario (JSON)
+    GET /api/docenti/<id>/orario.html       tabella HTML (?formato=Standard|Compatto|Tascabile&vuote=1)
+    GET /api/docenti/<id>/orario.pdf        PDF (?formato=standard|a4|tascabile)
+    GET /api/docenti/<id>/orario.ics        calendario iCalendar da sottoscrivere
+
+Ogni risposta ha un ETag derivato dall'hash del contenuto dell'orario e un
+Cache-Control pubblico: browser e reverse proxy possono riusare le risposte
+e rivalidarle con If-None-Match (304 senza corpo). Senza archivio il file
+config_orario.json è esposto come unico docente con id "corrente".
+
+Con --istituti (ORARIO_TENANTS) lo stesso server serve più istituti, ognuno
+con i propri dati e la propria cache dei PDF, sotto /<istituto>/...; la
+radice elenca gli istituti. I PDF generati contemporaneamente per istituto
+sono limitati da "pdf_concorrenti": oltre il limite la richiesta attende al
+massimo PDF_SLOT_TIMEOUT secondi e poi riceve 503.
+
+Esempio:
+    python api_server.py --archivio orari.db --porta 8600
+    python api_server.py --istituti tenants/ --porta 8600
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import sys
+import threading
+from collections import namedtuple
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import schedule_engine as engine
+from config_schema import normalize_config
+from ics_export import SchoolYearError, cached_ics
+from pdf_cache import PDF_CACHE, pdf_cache_key, schedule_hash
+from tenancy import TenantBusyError, TenantError, TenantRegistry
+
+DEFAULT_PORT = 8600
+DEFAULT_MAX_AGE = 60
+TABLE_FORMATS = ('Standard', 'Compatto', 'Tascabile')
+# Attesa massima (secondi) di un posto libero per generare un PDF dell'istituto
+PDF_SLOT_TIMEOUT = 30
+
+Response = namedtuple('Response', ['content_type', 'body', 'etag', 'headers'])
+
+
+class APIError(Exception):
+    """Errore da restituire al client con il relativo stato HTTP"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --- Sorgenti dei dati ----------------------------------------------------------
+
+class StorageSource:
+    """Orari di un archivio (ScheduleStorage)"""
+
+    def __init__(self, storage, tenant=None):
+        self.storage = storage
+        self.tenant = tenant
+
+    def list(self):
+        return self.storage.list_teachers()
+
+    def load(self, teacher_id):
+        return self.storage.load(teacher_id)
+
+
+class ConfigSource:
+    """config_orario.json (snapshot + journal) come unico docente "corrente" """
+
+    TEACHER_ID = 'corrente'
+
+    def __init__(self, path=engine.CONFIG_PATH, tenant=None):
+        from persistence import get_store
+        self.store = get_store(path)
+        self.tenant = tenant
+
+    def list(self):
+        schedule_data = self.load(self.TEACHER_ID)
+        if not schedule_data:
+            return []
+        return [{'id': self.TEACHER_ID,
+                 'docente': schedule_data['docente'],
+                 'istituto': schedule_data['istituto'],
+                 'anno_scolastico': schedule_data['anno_scolastico']}]
+
+    def load(self, teacher_id):
+        if teacher_id != self.TEACHER_ID:
+            return None
+        schedule_data = self.store.load()
+        return normalize_config(schedule_data) if schedule_data else None
+
+
+def tenant_source(tenant):
+    """Sorgente dei dati di un istituto: il suo archivio o il suo config_orario.json"""
+    storage = tenant.open_storage()
+    if storage is not None:
+        return StorageSource(storage, tenant)
+    return ConfigSource(tenant.config_path, tenant)
+
+
+class TenantSources:
+    """Sorgenti per istituto, create alla prima richiesta di ciascuno"""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id):
+        try:
+            tenant = self.registry.get(tenant_id)
+        except TenantError as e:
+            raise APIError(HTTPStatus.NOT_FOUND, str(e))
+        with self._lock:
+            source = self._sources.get(tenant.id)
+            if source is None:
+                source = self._sources[tenant.id] = tenant_source(tenant)
+            return source
+
+
+def _prefix(source):
+    tenant = getattr(source, 'tenant', None)
+    return f"/{quote(tenant.id)}" if tenant is not None and tenant.path else ""
+
+
+# --- Rappresentazioni -----------------------------------------------------------
+
+def _etag(content_hash, variant):
+    return f'"{content_hash[:32]}-{variant}"'
+
+
+def _json_body(data):
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+HTML_PAGE = """<!DOCTYPE html>
+<html lang="it">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 1.5em; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #999; padding: 0.3em 0.6em; text-align: center; vertical-align: middle; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def _html_page(title, body):
+    return HTML_PAGE.format(title=html.escape(title), body=body).encode('utf-8')
+
+
+def teacher_list(source):
+    teachers = source.list()
+    body = _json_body(teachers)
+    return Response('application/json; charset=utf-8', body,
+                    _etag(hashlib.sha256(body).hexdigest(), 'elenco'), {})
+
+
+def teacher_index(source):
+    teachers = source.list()
+    items = []
+    for record in teachers:
+        base = f"{_prefix(source)}/api/docenti/{quote(str(record['id']))}"
+        items.append(f"<li>{html.escape(record['docente'])} ({html.escape(record['anno_scolastico'])}) — "
+                     f"<a href=\"{base}/orario.html\">orario</a> · "
+                     f"<a href=\"{base}/orario.pdf\">PDF</a> · "
+                     f"<a href=\"{base}/orario.ics\">calendario</a></li>")
+    body = _html_page("Orari dei docenti", "<h1>📚 Orari dei docenti</h1>\n<ul>\n"
+                      + "\n".join(items) + "\n</ul>")
+    return Response('text/html; charset=utf-8', body,
+                    _etag(hashlib.sha256(body).hexdigest(), 'indice'), {})
+
+
+def tenant_index(registry):
+    items = []
+    for tenant_id in registry.list():
+        try:
+            name = registry.get(tenant_id).name
+        except TenantError:
+            continue
+        items.append(f"<li><a href=\"/{quote(tenant_id)}/\">{html.escape(name)}</a></li>")
+    body = _html_page("Istituti", "<h1>🏫 Istituti</h1>\n<ul>\n" + "\n".join(items) + "\n</ul>")
+    return Response('text/html; charset=utf-8', body,
+                    _etag(hashlib.sha256(body).hexdigest(), 'istituti'), {})
+
+
+def _render_pdf(source, schedule_data, format_type, pdf_cache):
+    tenant = getattr(source, 'tenant', None)
+    if tenant is None or tenant.pdf_slots is None:
+        return engine.render_pdf_cached(schedule_data, format_type, pdf_cache)[0]
+    pdf_data = pdf_cache.get(pdf_cache_key(schedule_data, format_type))
+    if pdf_data is None:
+        # Solo la generazione occupa uno dei PDF contemporanei dell'istituto
+        with tenant.pdf_slot(PDF_SLOT_TIMEOUT):
+            pdf_data, _ = engine.render_pdf_cached(schedule_data, format_type, pdf_cache)
+    return pdf_data
+
+
+def _check_teacher_id(teacher_id):
+    # Gli id non sono mai percorsi: "%2F" decodificato non deve uscire dall'archivio
+    if not teacher_id or any(c in teacher_id for c in '/\\\0') or '..' in teacher_id:
+        raise APIError(HTTPStatus.NOT_FOUND, f"Docente {teacher_id} non trovato")
+    return teacher_id
+
+
+def _load(source, teacher_id):
+    schedule_data = source.load(teacher_id)
+    if schedule_data is None:
+        raise APIError(HTTPStatus.NOT_FOUND, f"Docente {teacher_id} non trovato")
+    return schedule_data, schedule_hash(schedule_data)
+
+
+def _content_disposition(filename):
+    """
+    Content-Disposition inline: nome ASCII sicuro (niente virgolette o ";") più
+    il nome completo in UTF-8 (RFC 6266), così gli id con lettere accentate
+    non rompono l'intestazione.
+    """
+    fallback = "".join(c if c.isascii() and (c.isalnum() or c in '._-') else '_' for c in filename)
+    return f"inline; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def _not_modified(etag, if_none_match):
+    """Risposta 304 (senza corpo) se il client ha già questa versione, altrimenti None"""
+    if etag_matches(if_none_match, etag):
+        return Response(None, None, etag, {})
+    return None
+
+
+def teacher_json(source, teacher_id, params, pdf_cache, if_none_match=None):
+    schedule_data, content_hash = _load(source, teacher_id)
+    return Response('application/json; charset=utf-8', _json_body(schedule_data),
+                    _etag(content_hash, 'json'), {})
+
+
+def teacher_html(source, teacher_id, params, pdf_cache, if_none_match=None):
+    format_type = params.get('formato', 'Standard')
+    if format_type not in TABLE_FORMATS:
+        raise APIError(HTTPStatus.BAD_REQUEST, f"Formato non valido: {format_type}")
+    show_empty = params.get('vuote', '0') in ('1', 'true', 'si')
+    schedule_data, content_hash = _load(source, teacher_id)
+    etag = _etag(content_hash, f"html-{format_type}-{int(show_empty)}")
+    unchanged = _not_modified(etag, if_none_match)
+    if unchanged is not None:
+        return unchanged
+
+    header, rows, _ = engine.cached_table(schedule_data, show_empty, format_type, content_hash)
+    docente = schedule_data['docente']
+    body = (f"<h1>{html.escape(docente)}</h1>\n"
+            f"<p>{html.escape(schedule_data['materie'])} — "
+            f"{html.escape(schedule_data['istituto'])} — "
+            f"A.S. {html.escape(schedule_data['anno_scolastico'])}</p>\n"
+            + engine.build_html_table(header, rows))
+    return Response('text/html; charset=utf-8', _html_page(f"Orario {docente}", body), etag, {})
+
+
+def teacher_pdf(source, teacher_id, params, pdf_cache, if_none_match=None):
+    format_type = params.get('formato', 'standard')
+    if format_type not in engine.PDF_FORMATS:
+        raise APIError(HTTPStatus.BAD_REQUEST, f"Formato non valido: {format_type}")
+    schedule_data, content_hash = _load(source, teacher_id)
+    # L'ETag dipende solo dai dati: un 304 non genera il PDF
+    etag = _etag(content_hash, f"pdf-{format_type}")
+    unchanged = _not_modified(etag, if_none_match)
+    if unchanged is not None:
+        return unchanged
+    try:
+        pdf_data = _render_pdf(source, schedule_data, format_type, pdf_cache)
+    except engine.EmptyScheduleError as e:
+        raise APIError(HTTPStatus.NOT_FOUND, str(e))
+    except TenantBusyError as e:
+        raise APIError(HTTPStatus.SERVICE_UNAVAILABLE, str(e))
+    filename = f"orario_{teacher_id}_{format_type}.pdf"
+    return Response('application/pdf', pdf_data, etag,
+                    {'Content-Disposition': _content_disposition(filename)})
+
+
+def teacher_ics(source, teacher_id, params, pdf_cache, if_none_match=None):
+    schedule_data, content_hash = _load(source, teacher_id)
+    etag = _etag(content_hash, 'ics')
+    unchanged = _not_modified(etag, if_none_match)
+    if unchanged is not None:
+        return unchanged
+    try:
+        ics_data, _ = cached_ics(schedule_data, cache=pdf_cache)
+    except SchoolYearError as e:
+        raise APIError(HTTPStatus.NOT_FOUND, str(e))
+    return Response('text/calendar; charset=utf-8', ics_data, etag,
+                    {'Content-Disposition': _content_disposition(f"orario_{teacher_id}.ics")})
+
+
+TEACHER_ROUTES = {
+    None: teacher_json,
+    'orario.html': teacher_html,
+    'orario.pdf': teacher_pdf,
+    'orario.ics': teacher_ics,
+}
+
+
+def route(source, path, params, pdf_cache=PDF_CACHE, if_none_match=None):
+    """
+    Risposta per un percorso; solleva APIError se non esiste. Con
+    if_none_match le rappresentazioni costose (tabelle, PDF, calendari)
+    restituiscono un Response senza corpo se l'ETag corrisponde, prima di
+    essere generate.
+    """
+    parts = [unquote(p) for p in path.strip('/').split('/') if p]
+    if not parts:
+        return teacher_index(source)
+    if parts[:2] == ['api', 'docenti']:
+        if len(parts) == 2:
+            return teacher_list(source)
+        if len(parts) in (3, 4):
+            handler = TEACHER_ROUTES.get(parts[3] if len(parts) == 4 else None)
+            if handler is not None:
+                return handler(source, _check_teacher_id(parts[2]), params, pdf_cache, if_none_match)
+    raise APIError(HTTPStatus.NOT_FOUND, f"Percorso non trovato: {path}")
+
+
+def route_tenant(tenants, path, params, if_none_match=None):
+    """Come route, con l'istituto nel primo elemento del percorso (/<istituto>/...)"""
+    parts = [p for p in path.strip('/').split('/') if p]
+    if not parts:
+        return tenant_index(tenants.registry)
+    source = tenants.get(unquote(parts[0]))
+    return route(source, '/' + '/'.join(parts[1:]), params, source.tenant.pdf_cache, if_none_match)
+
+
+def etag_matches(if_none_match, etag):
+    """True se l'header If-None-Match contiene l'ETag (o *)"""
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(',')]
+    return '*' in tags or etag in tags or f"W/{etag}" in tags
+
+
+# --- Server ---------------------------------------------------------------------
+
+class ScheduleRequestHandler(BaseHTTPRequestHandler):
+    """GET/HEAD in sola lettura con ETag e Cache-Control"""
+
+    server_version = "OrarioAPI/1.0"
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if_none_match = self.headers.get('If-None-Match')
+        try:
+            if self.server.tenants is not None:
+                response = route_tenant(self.server.tenants, url.path, params, if_none_match)
+            else:
+                response = route(self.server.source, url.path, params, self.server.pdf_cache,
+                                 if_none_match)
+        except APIError as e:
+            self._send_error(e.status, str(e), send_body)
+            return
+        except Exception as e:
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(e).__name__}: {e}", send_body)
+            return
+
+        cache_control = f"public, max-age={self.server.max_age}"
+        if response.body is None or etag_matches(if_none_match, response.etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', response.etag)
+            self.send_header('Cache-Control', cache_control)
+            self.end_headers()
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', response.content_type)
+        self.send_header('Content-Length', str(len(response.body)))
+        self.send_header('ETag', response.etag)
+        self.send_header('Cache-Control', cache_control)
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(response.body)
+
+    def _send_error(self, status, message, send_body):
+        body = _json_body({'errore': message})
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(source, host='127.0.0.1', port=DEFAULT_PORT, max_age=DEFAULT_MAX_AGE, quiet=False,
+                pdf_cache=PDF_CACHE):
+    """
+    ThreadingHTTPServer pronto per serve_forever(); source può essere un
+    TenantSources per servire più istituti.
+    """
+    server = ThreadingHTTPServer((host, port), ScheduleRequestHandler)
+    server.daemon_threads = True
+    server.tenants = source if isinstance(source, TenantSources) else None
+    server.source = None if server.tenants is not None else source
+    server.max_age = max_age
+    server.quiet = quiet
+    server.pdf_cache = pdf_cache
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP in sola lettura degli orari")
+    parser.add_argument('--archivio', default=os.environ.get('ORARIO_ARCHIVIO'),
+                        help="Archivio .db/.sqlite o cartella JSON (default: ORARIO_ARCHIVIO, "
+                             "altrimenti config_orario.json)")
+    parser.add_argument('--istituti', default=os.environ.get('ORARIO_TENANTS'),
+                        help="Cartella degli istituti (default: ORARIO_TENANTS); "
+                             "i percorsi diventano /<istituto>/...")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-age', type=int, default=DEFAULT_MAX_AGE,
+                        help="Secondi di validità in Cache-Control (default 60)")
+    parser.add_argument('--silenzioso', action='store_true', help="Non registra le richieste")
+    args = parser.parse_args(argv)
+
+    if args.istituti:
+        source = TenantSources(TenantRegistry(args.istituti))
+    elif args.archivio:
+        from storage import open_storage
+        source = StorageSource(open_storage(args.archivio))
+    else:
+        source = ConfigSource()
+
+    server = make_server(source, args.host, args.porta, args.max_age, args.silenzioso)
+    print(f"🌐 API degli orari su http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
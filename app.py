@@ -1,16 +1,19 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-import json
+import hashlib
 import os
-from reportlab.lib.pagesizes import landscape, A7, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-import io
-
-# Costanti
-ISTITUTO_DEFAULT = 'Liceo Scientifico "E. Fermi" Ragusa'
+import profiling
+import schedule_engine as engine
+from pdf_cache import schedule_hash
+from persistence import ChangeTracker, get_store
+from shared_cache import SharedScheduleCache
+from storage import open_storage, teacher_key
+from config_schema import ConfigValidationError, normalize_config
+from conflicts import ConflictIndex, format_conflict
+from ics_export import SchoolYearError, cached_ics, ics_filename
+from pdf_jobs import PDFJobQueue
+from tenancy import TENANTS, TenantError
+from views import AULA, CLASSE, PIANO, ViewIndex
 
 # Configurazione della pagina
 st.set_page_config(
@@ -19,116 +22,117 @@ st.set_page_config(
     layout="wide"
 )
 
+# Istituto della sessione: ?istituto=<id> con ORARIO_TENANTS, altrimenti quello predefinito
+try:
+    tenant = TENANTS.get(st.query_params.get('istituto'))
+except TenantError as e:
+    st.error(f"❌ {e}")
+    st.stop()
+
+if st.session_state.get('tenant_id', tenant.id) != tenant.id:
+    # Cambio di istituto nella stessa sessione: nessun dato dell'istituto precedente
+    for key in ('schedule_data', 'schedule_lease', 'config_changes', 'pdf_jobs', 'archive_id'):
+        st.session_state.pop(key, None)
+st.session_state.tenant_id = tenant.id
+
+# Snapshot + journal delle modifiche di config_orario.json dell'istituto
+config_store = get_store(tenant.config_path)
+
 # Funzione per caricare configurazione salvata
-def load_saved_config():
-    """Carica la configurazione salvata se esiste"""
+def load_saved_config(store=None):
+    """Carica la configurazione salvata se esiste (validata e migrata allo schema corrente)"""
     try:
-        if os.path.exists('config_orario.json'):
-            with open('config_orario.json', 'r') as f:
-                return json.load(f)
+        schedule_data = (store or config_store).load()
+        return normalize_config(schedule_data) if schedule_data is not None else None
+    except ConfigValidationError as e:
+        st.error(f"Configurazione non valida: {e}")
     except Exception as e:
         st.error(f"Errore nel caricamento della configurazione: {str(e)}")
     return None
 
+@st.cache_resource
+def get_shared_schedules():
+    """Snapshot dei config_orario.json condivisi da tutte le sessioni (un solo parse per versione)"""
+    return SharedScheduleCache(lambda path: load_saved_config(get_store(path)))
+
+def use_shared_config():
+    """Collega la sessione allo snapshot condiviso; False se non c'è configurazione salvata"""
+    lease = get_shared_schedules().acquire(tenant.config_path)
+    if lease.data is None:
+        lease.release()
+        return False
+    release_shared_config()
+    st.session_state.schedule_lease = lease
+    st.session_state.schedule_data = lease.data
+    st.session_state.archive_id = None
+    return True
+
+def release_shared_config():
+    lease = st.session_state.get('schedule_lease')
+    if lease is not None:
+        lease.release()
+        st.session_state.schedule_lease = None
+
+def set_private_schedule(schedule_data):
+    """Sostituisce i dati della sessione con una copia privata"""
+    release_shared_config()
+    st.session_state.schedule_data = schedule_data
+
+def editable_schedule_data():
+    """Dati modificabili della sessione: al primo uso copia lo snapshot condiviso (copy-on-write)"""
+    lease = st.session_state.get('schedule_lease')
+    if lease is not None:
+        set_private_schedule(lease.copy())
+    return st.session_state.schedule_data
+
 # Inizializzazione session state
 if 'schedule_data' not in st.session_state:
-    # Prova a caricare configurazione salvata
-    saved_config = load_saved_config()
-    
-    if saved_config:
-        st.session_state.schedule_data = saved_config
-        # Non mostrare il messaggio qui per evitare spam
-    else:
-        # Configurazione di default
-        st.session_state.schedule_data = {
-            'docente': 'Cristina Bellina Terra',
-            'materie': 'Matematica e Fisica',
-            'istituto': ISTITUTO_DEFAULT,
-            'anno_scolastico': '2025/2026',
-            'giorni_settimana': ['LUN', 'MAR', 'MER', 'GIO', 'VEN', 'SAB'],
-            'giorno_libero': 'DOM',
-            'include_giorno_libero': False,
-            'ore_giornaliere': 6,
-            'ore_attive': [1, 2, 3, 4, 5, 6],
-            'orari': {
-                '1': {'dalle': '08:15', 'alle': '09:15'},
-                '2': {'dalle': '09:15', 'alle': '10:15'},
-                '3': {'dalle': '10:15', 'alle': '11:15'},
-                '4': {'dalle': '11:15', 'alle': '12:15'},
-                '5': {'dalle': '12:15', 'alle': '13:15'},
-                '6': {'dalle': '13:15', 'alle': '14:15'}
-            },
-            'schedule': {}
-        }
+    # Configurazione salvata condivisa tra le sessioni, altrimenti quella di default
+    if not use_shared_config():
+        st.session_state.schedule_data = tenant.default_schedule_data()
+elif st.session_state.get('schedule_lease') is not None:
+    # Sessione in sola lettura: segue le nuove versioni del file salvato
+    lease = get_shared_schedules().refresh(st.session_state.schedule_lease)
+    if lease.data is not None:
+        st.session_state.schedule_lease = lease
+        st.session_state.schedule_data = lease.data
+
+# Modifiche non ancora salvate (campi e slot)
+if 'config_changes' not in st.session_state:
+    st.session_state.config_changes = ChangeTracker()
+
+# Job PDF della sessione (formato -> id del job)
+if 'pdf_jobs' not in st.session_state:
+    st.session_state.pdf_jobs = {}
+
+def set_config_field(key, value):
+    """Aggiorna un campo della configurazione segnandolo come modificato"""
+    if st.session_state.schedule_data.get(key) != value:
+        editable_schedule_data()[key] = value
+        st.session_state.config_changes.field(key, value)
 
 # Funzione per caricare dati di esempio
 def load_example_data():
-    example_schedule = {
-        'LUN': {
-            '1': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''},
-            '2': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''},
-            '3': {'classe': '2Esa', 'edificio': 'MB', 'piano': 'PT', 'aula': 'A15'},
-            '4': {'classe': '1Dsa', 'edificio': 'MA', 'piano': 'PT', 'aula': 'A1'},
-            '5': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''},
-            '6': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''}
-        },
-        'MAR': {
-            '1': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
-            '2': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
-            '3': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
-            '4': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
-            '5': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
-            '6': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''}
-        },
-        'MER': {
-            '1': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
-            '2': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
-            '3': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
-            '4': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''},
-            '5': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''},
-            '6': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''}
-        },
-        'GIO': {
-            '1': {'classe': '1Bsa', 'edificio': 'MB', 'piano': 'PT', 'aula': 'A16'},
-            '2': {'classe': '—', 'edificio': '', 'piano': '', 'aula': ''},
-            '3': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
-            '4': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
-            '5': {'classe': '1Asa', 'edificio': 'MA', 'piano': '2P', 'aula': 'A20'},
-            '6': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''}
-        },
-        'VEN': {
-            '1': {'classe': '1Dsa', 'edificio': 'MA', 'piano': 'PT', 'aula': 'A1'},
-            '2': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
-            '3': {'classe': '2Esa', 'edificio': 'MB', 'piano': 'PT', 'aula': 'A15'},
-            '4': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
-            '5': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
-            '6': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''}
-        },
-        'SAB': {
-            '1': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
-            '2': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
-            '3': {'classe': '1Bsa', 'edificio': 'MB', 'piano': 'PT', 'aula': 'A13'},
-            '4': {'classe': '1Asa', 'edificio': 'MA', 'piano': '2P', 'aula': 'A20'},
-            '5': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''},
-            '6': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''}
-        }
-    }
+    example_schedule = engine.example_schedule()
     
     # Aggiorna anche i campi docente, materie e istituto
-    st.session_state.schedule_data['docente'] = 'Cristina Bellina Terra'
-    st.session_state.schedule_data['materie'] = 'Matematica e Fisica'
-    st.session_state.schedule_data['istituto'] = ISTITUTO_DEFAULT
+    set_config_field('docente', tenant.default('docente'))
+    set_config_field('materie', tenant.default('materie'))
+    set_config_field('istituto', tenant.default('istituto'))
     
-    st.session_state.schedule_data['schedule'] = example_schedule
+    set_config_field('schedule', example_schedule)
 
 # Sidebar
 st.sidebar.title("📚 Gestione Orario Docente")
+if TENANTS.enabled:
+    st.sidebar.markdown(f"🏫 **{tenant.name}**")
 st.sidebar.markdown("---")
 
 # Menu di navigazione
 menu_options = {
     "🏠 Home": "home",
     "📅 Orario": "orario",
+    "📊 Statistiche": "statistiche",
     "⚙️ Configurazione": "configurazione"
 }
 
@@ -142,24 +146,90 @@ if st.sidebar.button("📋 Carica Dati di Esempio"):
 
 # Pulsante per salvare configurazione
 if st.sidebar.button("💾 Salva Configurazione"):
-    with open('config_orario.json', 'w') as f:
-        json.dump(st.session_state.schedule_data, f, indent=2)
+    config_store.save_snapshot(st.session_state.schedule_data)
+    st.session_state.config_changes.drain()
     st.sidebar.success("Configurazione salvata!")
 
+# Salvataggio automatico: a ogni modifica si accodano solo i campi/slot cambiati
+autosave = st.sidebar.checkbox("⚡ Salvataggio automatico", value=False, key="autosave")
+
 # Pulsante per ricaricare configurazione
 if st.sidebar.button("🔄 Ricarica Configurazione"):
-    saved_config = load_saved_config()
-    if saved_config:
-        st.session_state.schedule_data = saved_config
+    if use_shared_config():
+        st.session_state.config_changes = ChangeTracker()
         st.sidebar.success("✅ Configurazione ricaricata!")
         st.rerun()  # Ricarica la pagina per aggiornare l'interfaccia
     else:
         st.sidebar.error("❌ Nessuna configurazione trovata!")
 
+@st.cache_resource
+def get_conflict_index(location, istituto, anno_scolastico):
+    """Indice dei conflitti di aula/classe dell'archivio, condiviso da tutte le sessioni"""
+    return ConflictIndex.from_storage(open_storage(location), istituto, anno_scolastico)
+
+def current_conflict_index():
+    """Indice dei conflitti per istituto e anno dell'orario corrente (None senza archivio)"""
+    if not tenant.archive:
+        return None
+    return get_conflict_index(tenant.archive,
+                              st.session_state.schedule_data.get('istituto', tenant.default('istituto')),
+                              st.session_state.schedule_data.get('anno_scolastico', tenant.default('anno_scolastico')))
+
+@st.cache_resource
+def get_view_index(location, istituto, anno_scolastico):
+    """Viste per classe, aula e piano dell'archivio, condivise da tutte le sessioni"""
+    return ViewIndex.from_storage(open_storage(location), istituto, anno_scolastico)
+
+def current_view_index():
+    """Viste dell'istituto e anno dell'orario corrente (None senza archivio)"""
+    if not tenant.archive:
+        return None
+    return get_view_index(tenant.archive,
+                          st.session_state.schedule_data.get('istituto', tenant.default('istituto')),
+                          st.session_state.schedule_data.get('anno_scolastico', tenant.default('anno_scolastico')))
+
+def current_archive_id():
+    """Id nell'archivio dell'orario corrente: quello caricato o salvato, altrimenti il record con la stessa chiave"""
+    teacher_id = st.session_state.get('archive_id')
+    if teacher_id is None and tenant.archive:
+        istituto, anno_scolastico, docente = teacher_key(st.session_state.schedule_data)
+        for record in tenant.open_storage().list_teachers(istituto, anno_scolastico):
+            if record['docente'] == docente:
+                return record['id']
+    return teacher_id
+
+# Archivio di più docenti (SQLite o cartella JSON), se configurato
+if tenant.archive:
+    st.sidebar.markdown("---")
+    archivio = tenant.open_storage()
+    docenti = archivio.list_teachers()
+    if docenti:
+        docente_scelto = st.sidebar.selectbox(
+            "👥 Docente in archivio",
+            options=docenti,
+            format_func=lambda d: f"{d['docente']} ({d['anno_scolastico']})"
+        )
+        if st.sidebar.button("📂 Carica dall'archivio"):
+            set_private_schedule(archivio.load(docente_scelto['id']))
+            st.session_state.archive_id = docente_scelto['id']
+            st.session_state.config_changes = ChangeTracker()
+            st.rerun()
+    if st.sidebar.button("🗄️ Salva nell'archivio"):
+        teacher_id = archivio.save(st.session_state.schedule_data)
+        st.session_state.archive_id = teacher_id
+        current_conflict_index().set_teacher(teacher_id,
+                                             st.session_state.schedule_data['schedule'],
+                                             st.session_state.schedule_data.get('docente', ''))
+        current_view_index().set_teacher(teacher_id,
+                                         st.session_state.schedule_data['schedule'],
+                                         st.session_state.schedule_data['orari'],
+                                         st.session_state.schedule_data.get('docente', ''))
+        st.sidebar.success("✅ Orario salvato nell'archivio!")
+
 st.sidebar.markdown("---")
 
 # Indicatore configurazione
-if os.path.exists('config_orario.json'):
+if os.path.exists(tenant.config_path):
     st.sidebar.success("💾 Configurazione salvata disponibile")
     # Mostra se è stata caricata automaticamente
     if 'config_loaded' not in st.session_state:
@@ -168,10 +238,10 @@ if os.path.exists('config_orario.json'):
 else:
     st.sidebar.info("💾 Nessuna configurazione salvata")
 
-st.sidebar.markdown(f"**Docente:** {st.session_state.schedule_data.get('docente', 'Cristina Bellina Terra')}")
-st.sidebar.markdown(f"**Materie:** {st.session_state.schedule_data.get('materie', 'Matematica e Fisica')}")
-st.sidebar.markdown(f"**Istituto:** {st.session_state.schedule_data.get('istituto', ISTITUTO_DEFAULT)}")
-st.sidebar.markdown(f"**A.S.:** {st.session_state.schedule_data.get('anno_scolastico', '2025/2026')}")
+st.sidebar.markdown(f"**Docente:** {st.session_state.schedule_data.get('docente', tenant.default('docente'))}")
+st.sidebar.markdown(f"**Materie:** {st.session_state.schedule_data.get('materie', tenant.default('materie'))}")
+st.sidebar.markdown(f"**Istituto:** {st.session_state.schedule_data.get('istituto', tenant.default('istituto'))}")
+st.sidebar.markdown(f"**A.S.:** {st.session_state.schedule_data.get('anno_scolastico', tenant.default('anno_scolastico'))}")
 
 # Funzioni di supporto
 def display_schedule(show_empty=False, format_type="Standard"):
@@ -181,156 +251,144 @@ def display_schedule(show_empty=False, format_type="Standard"):
     if st.checkbox("🔍 Debug - Mostra struttura dati", value=False):
         st.json(st.session_state.schedule_data)
     
+    # Pannello di profilazione, visibile solo con ORARIO_PROFILE=1
+    if profiling.ENABLED and st.checkbox("⏱️ Debug - Profilazione", value=False):
+        show_profiling_panel(format_type)
+    
     schedule = st.session_state.schedule_data.get('schedule', {})
     if not schedule:
         st.warning("⚠️ Nessun orario configurato. Vai alla sezione Configurazione o carica i dati di esempio.")
         return
     
-    # Prepara i dati per la tabella
-    giorni = st.session_state.schedule_data['giorni_settimana']
-    ore_attive = st.session_state.schedule_data['ore_attive']
-    orari = st.session_state.schedule_data['orari']
-    
-    # Crea header
-    header = ["Giorno"] + [f"{i}ª" for i in ore_attive]
+    # Prepara i dati per la tabella (riusati tra i rerun se l'orario non cambia)
+    header, data_rows, markdown_table = engine.cached_table(
+        st.session_state.schedule_data, show_empty, format_type
+    )
     
-    # Crea righe dati
-    data_rows = []
-    for giorno in giorni:
-        if giorno == st.session_state.schedule_data['giorno_libero'] and not st.session_state.schedule_data['include_giorno_libero']:
-            continue
+    with profiling.stage('display.render'):
+        if format_type == "Tascabile":
+            st.markdown("### 📱 Formato Tascabile (7.5x4cm)")
+            st.markdown("*Ottimizzato per stampa in formato tascabile*")
+            
+            # pandas viene importato solo qui, al primo uso del formato Tascabile
+            import pandas as pd
+            df = pd.DataFrame(data_rows, columns=list(header))
             
-        row = [giorno]
-        for ora in ore_attive:
-            ora_str = str(ora)  # Converti in stringa per compatibilità con JSON
-            if giorno in schedule and ora_str in schedule[giorno]:
-                slot = schedule[giorno][ora_str]
-                if slot['classe'] or show_empty:
-                    if format_type == "Tascabile":
-                        # Formato compatto per stampa tascabile
-                        if slot['classe'] in ['DISP.', '—', '']:
-                            text = slot['classe'] if slot['classe'] else ''
-                        else:
-                            time_str = f"{orari[ora_str]['dalle']}-{orari[ora_str]['alle']}"
-                            text = f"{time_str} {slot['classe']}"
-                            if slot['edificio']:
-                                text += f" {slot['edificio']}"
-                            if slot['piano']:
-                                text += f" {slot['piano']}"
-                            if slot['aula']:
-                                text += f" {slot['aula']}"
-                    elif format_type == "Compatto":
-                        # Formato compatto per visualizzazione
-                        if slot['classe'] in ['DISP.', '—', '']:
-                            text = slot['classe'] if slot['classe'] else ''
-                        else:
-                            time_str = f"{orari[ora_str]['dalle']}-{orari[ora_str]['alle']}"
-                            text = f"**{time_str}** {slot['classe']}"
-                            if slot['edificio'] or slot['piano'] or slot['aula']:
-                                location_parts = [slot['edificio'], slot['piano'], slot['aula']]
-                                location = ' '.join([p for p in location_parts if p])
-                                if location:
-                                    text += f" 📍{location}"
-                    else:
-                        # Formato standard
-                        if slot['classe'] in ['DISP.', '—', '']:
-                            text = slot['classe'] if slot['classe'] else ''
-                        else:
-                            time_str = f"{orari[ora_str]['dalle']}-{orari[ora_str]['alle']}"
-                            text = f"**{time_str}**\n{slot['classe']}"
-                            if slot['edificio'] or slot['piano'] or slot['aula']:
-                                location_parts = [slot['edificio'], slot['piano'], slot['aula']]
-                                location = ' '.join([p for p in location_parts if p])
-                                if location:
-                                    text += f"\n📍 {location}"
-                    row.append(text)
-                else:
-                    row.append('')
+            # Stile compatto
+            st.dataframe(
+                df,
+                use_container_width=True,
+                hide_index=True,
+                height=400
+            )
+        else:
+            st.markdown(f"### 📊 Formato {format_type}")
+            
+            # Visualizza la tabella con formattazione markdown
+            if data_rows:
+                st.markdown(markdown_table, unsafe_allow_html=True)
             else:
-                row.append('')
-        
-        data_rows.append(row)
+                st.info("Nessun dato da visualizzare")
+    
+    # Pulsanti per la stampa: la generazione avviene in background
+    pdf_buttons = [
+        ("standard", "🖨️ Stampa PDF Standard", "Standard"),
+        ("tascabile", "📱 Stampa PDF Tascabile", "Tascabile"),
+        ("a4", "📄 Stampa PDF A4", "A4"),
+    ]
+    for col, (format_key, label, name) in zip(st.columns(3), pdf_buttons):
+        with col:
+            if st.button(label):
+                request_pdf(format_key)
+            job = current_pdf_job(format_key)
+            if job is not None and not job.done() and hasattr(st, 'fragment'):
+                poll_pdf_job(format_key, name)
+            else:
+                show_pdf_job(format_key, name)
+
+    # Calendario: eventi settimanali ricorrenti, rigenerati solo se l'orario cambia
+    try:
+        ics_data, _ = cached_ics(st.session_state.schedule_data, cache=tenant.pdf_cache)
+    except SchoolYearError as e:
+        st.info(f"📅 Calendario non disponibile: {e}")
+    else:
+        st.download_button(
+            "📅 Scarica Calendario (ICS)",
+            data=ics_data,
+            file_name=ics_filename(st.session_state.schedule_data),
+            mime="text/calendar",
+            help="Importa l'orario nel calendario del telefono con lezioni ricorrenti e vacanze escluse"
+        )
+
+def show_institute_views(show_empty=False, format_type="Standard"):
+    """Orario di una classe, di un'aula o di un piano, dalle viste dell'archivio"""
+    index = current_view_index()
+    st.markdown("---")
+    st.subheader("🏫 Classi, Aule e Piani")
     
-    # Crea DataFrame e visualizza
-    df = pd.DataFrame(data_rows, columns=header)
+    kinds = {"Classe": CLASSE, "Aula": AULA, "Piano": PIANO}
+    kind = kinds[st.radio("Vista", list(kinds), horizontal=True, key="view_kind")]
+    keys = index.keys(kind)
+    if not keys:
+        st.info("📝 Nessuna lezione in archivio per questo istituto e anno scolastico.")
+        return
+    key = st.selectbox("Seleziona", keys, format_func=lambda k: index.label(kind, k), key=f"view_{kind}")
     
+    # Stessi formati e stessa cache delle tabelle dei docenti
+    view_data = index.schedule_data(kind, key)
+    header, data_rows, markdown_table = engine.cached_table(view_data, show_empty, format_type)
     if format_type == "Tascabile":
-        st.markdown("### 📱 Formato Tascabile (7.5x4cm)")
-        st.markdown("*Ottimizzato per stampa in formato tascabile*")
-        
-        # Stile compatto
-        st.dataframe(
-            df,
-            use_container_width=True,
-            hide_index=True,
-            height=400
-        )
+        import pandas as pd
+        st.dataframe(pd.DataFrame(data_rows, columns=list(header)),
+                     use_container_width=True, hide_index=True)
     else:
-        st.markdown(f"### 📊 Formato {format_type}")
-        
-        # Visualizza la tabella con formattazione markdown
-        if data_rows:
-            # Crea una tabella markdown con colonne allineate
-            markdown_table = "| " + " | ".join(header) + " |\n"
-            markdown_table += "| " + " | ".join(["---"] * len(header)) + " |\n"
-            
-            for row in data_rows:
-                # Allinea le colonne sostituendo i caratteri di controllo
-                formatted_row = []
-                for cell in row:
-                    # Sostituisce \n con <br/> per markdown
-                    formatted_cell = cell.replace('\n', '<br/>')
-                    formatted_row.append(formatted_cell)
-                markdown_table += "| " + " | ".join(formatted_row) + " |\n"
-            
-            st.markdown(markdown_table, unsafe_allow_html=True)
-        else:
-            st.info("Nessun dato da visualizzare")
+        st.markdown(markdown_table, unsafe_allow_html=True)
+    
+    # PDF con la stessa coda (e cache) dei PDF dei docenti
+    job_key = f"vista_{kind}"
+    if st.button("🖨️ Stampa PDF", key=f"pdf_{job_key}"):
+        job = get_pdf_jobs().submit(view_data, "standard", tenant=tenant)
+        st.session_state.pdf_jobs[job_key] = job.id
+    job = current_pdf_job(job_key)
+    if job is not None and not job.done() and hasattr(st, 'fragment'):
+        poll_pdf_job(job_key, view_data['docente'])
+    else:
+        show_pdf_job(job_key, view_data['docente'])
+
+def show_profiling_panel(format_type):
+    """Istogrammi delle fasi e cattura cProfile di una generazione PDF"""
+    stats = profiling.REGISTRY.snapshot()
+    if stats:
+        st.table([{'Fase': name, 'Chiamate': s['count'], 'Media (ms)': round(s['mean'] * 1000, 2),
+                   'Max (ms)': round(s['max'] * 1000, 2), 'Totale (s)': round(s['sum'], 3)}
+                  for name, s in stats.items()])
+    else:
+        st.info("Nessuna misura registrata finora")
     
-    # Pulsanti per la stampa
     col1, col2, col3 = st.columns(3)
-    
     with col1:
-        if st.button("🖨️ Stampa PDF Standard"):
-            with st.spinner("Generazione PDF Standard..."):
-                pdf_data, filename = generate_pdf("standard")
-                if pdf_data:
-                    st.download_button(
-                        label="📥 Scarica PDF Standard",
-                        data=pdf_data,
-                        file_name=filename,
-                        mime="application/pdf"
-                    )
-                else:
-                    st.error("Errore nella generazione del PDF Standard")
-    
+        st.download_button("📥 Misure JSON", data=profiling.REGISTRY.to_json(),
+                           file_name="profilazione.json", mime="application/json")
     with col2:
-        if st.button("📱 Stampa PDF Tascabile"):
-            with st.spinner("Generazione PDF Tascabile..."):
-                pdf_data, filename = generate_pdf("tascabile")
-                if pdf_data:
-                    st.download_button(
-                        label="📥 Scarica PDF Tascabile",
-                        data=pdf_data,
-                        file_name=filename,
-                        mime="application/pdf"
-                    )
-                else:
-                    st.error("Errore nella generazione del PDF Tascabile")
-    
+        st.download_button("📥 Misure Prometheus", data=profiling.REGISTRY.to_prometheus(),
+                           file_name="profilazione.prom", mime="text/plain")
     with col3:
-        if st.button("📄 Stampa PDF A4"):
-            with st.spinner("Generazione PDF A4..."):
-                pdf_data, filename = generate_pdf("a4")
-                if pdf_data:
-                    st.download_button(
-                        label="📥 Scarica PDF A4",
-                        data=pdf_data,
-                        file_name=filename,
-                        mime="application/pdf"
-                    )
-                else:
-                    st.error("Errore nella generazione del PDF A4")
+        pdf_format = {'Tascabile': 'tascabile'}.get(format_type, 'standard')
+        if st.button(f"📸 Profila PDF {pdf_format}"):
+            # Generazione nel processo dell'app, senza cache, sotto cProfile
+            try:
+                _, prof_data, summary = profiling.profile_call(
+                    engine.render_pdf, st.session_state.schedule_data, pdf_format)
+                st.session_state.profile_capture = (pdf_format, prof_data, summary)
+            except engine.PDFGenerationError as e:
+                st.error(f"❌ {e}")
+    
+    capture = st.session_state.get('profile_capture')
+    if capture:
+        pdf_format, prof_data, summary = capture
+        st.download_button(f"📥 Scarica profilo cProfile ({pdf_format})", data=prof_data,
+                           file_name=f"profilo_{pdf_format}.prof", mime="application/octet-stream")
+        st.code(summary, language=None)
 
 def configure_schedule():
     """Interfaccia per configurare l'orario"""
@@ -343,32 +401,32 @@ def configure_schedule():
     with col1:
         docente = st.text_input(
             "Nome Docente:",
-            value=st.session_state.schedule_data.get('docente', 'Cristina Bellina Terra'),
+            value=st.session_state.schedule_data.get('docente', tenant.default('docente')),
             key="docente_input"
         )
-        st.session_state.schedule_data['docente'] = docente
+        set_config_field('docente', docente)
         
         materie = st.text_input(
             "Materie:",
-            value=st.session_state.schedule_data.get('materie', 'Matematica e Fisica'),
+            value=st.session_state.schedule_data.get('materie', tenant.default('materie')),
             key="materie_input"
         )
-        st.session_state.schedule_data['materie'] = materie
+        set_config_field('materie', materie)
     
     with col2:
         istituto = st.text_input(
             "Istituto:",
-            value=st.session_state.schedule_data.get('istituto', ISTITUTO_DEFAULT),
+            value=st.session_state.schedule_data.get('istituto', tenant.default('istituto')),
             key="istituto_input"
         )
-        st.session_state.schedule_data['istituto'] = istituto
+        set_config_field('istituto', istituto)
         
         anno_scolastico = st.text_input(
             "Anno Scolastico:",
-            value=st.session_state.schedule_data.get('anno_scolastico', '2025/2026'),
+            value=st.session_state.schedule_data.get('anno_scolastico', tenant.default('anno_scolastico')),
             key="anno_scolastico_input"
         )
-        st.session_state.schedule_data['anno_scolastico'] = anno_scolastico
+        set_config_field('anno_scolastico', anno_scolastico)
     
     st.markdown("---")
     
@@ -384,7 +442,7 @@ def configure_schedule():
             options=['LUN', 'MAR', 'MER', 'GIO', 'VEN', 'SAB', 'DOM'],
             default=st.session_state.schedule_data['giorni_settimana']
         )
-        st.session_state.schedule_data['giorni_settimana'] = giorni_settimana
+        set_config_field('giorni_settimana', giorni_settimana)
     
     with col2:
         st.markdown("#### Giorno Libero")
@@ -393,13 +451,13 @@ def configure_schedule():
             options=['LUN', 'MAR', 'MER', 'GIO', 'VEN', 'SAB', 'DOM'],
             index=['LUN', 'MAR', 'MER', 'GIO', 'VEN', 'SAB', 'DOM'].index(st.session_state.schedule_data['giorno_libero'])
         )
-        st.session_state.schedule_data['giorno_libero'] = giorno_libero
+        set_config_field('giorno_libero', giorno_libero)
         
         include_libero = st.checkbox(
             "Includi giorno libero nella stampa",
             value=st.session_state.schedule_data['include_giorno_libero']
         )
-        st.session_state.schedule_data['include_giorno_libero'] = include_libero
+        set_config_field('include_giorno_libero', include_libero)
     
     st.markdown("---")
     
@@ -414,22 +472,17 @@ def configure_schedule():
     )
     
     # Aggiorna ore attive
-    st.session_state.schedule_data['ore_attive'] = ore_attive
+    set_config_field('ore_attive', ore_attive)
+    
+    # Copia di lavoro degli orari: viene salvata solo se cambia
+    orari = {ora: dict(times) for ora, times in st.session_state.schedule_data['orari'].items()}
     
     # Inizializza orari solo per le ore che non esistono
     for ora in ore_attive:
         ora_str = str(ora)
-        if ora_str not in st.session_state.schedule_data['orari']:
+        if ora_str not in orari:
             # Orari di default progressivi solo se non esistono
-            default_times = {
-                '1': {'dalle': '08:15', 'alle': '09:15'},
-                '2': {'dalle': '09:15', 'alle': '10:15'},
-                '3': {'dalle': '10:15', 'alle': '11:15'},
-                '4': {'dalle': '11:15', 'alle': '12:15'},
-                '5': {'dalle': '12:15', 'alle': '13:15'},
-                '6': {'dalle': '13:15', 'alle': '14:15'}
-            }
-            st.session_state.schedule_data['orari'][ora_str] = default_times.get(ora_str, {'dalle': '08:15', 'alle': '09:15'})
+            orari[ora_str] = dict(engine.DEFAULT_ORARI.get(ora_str, {'dalle': '08:15', 'alle': '09:15'}))
     
     # Configurazione orari specifici
     st.markdown("#### Orari delle Lezioni")
@@ -442,21 +495,23 @@ def configure_schedule():
         with col1:
             dalle = st.time_input(
                 f"{ora}ª ora - Dalle:",
-                value=datetime.strptime(st.session_state.schedule_data['orari'][str(ora)]['dalle'], '%H:%M').time(),
+                value=datetime.strptime(orari[str(ora)]['dalle'], '%H:%M').time(),
                 key=f"dalle_{ora}"
             )
         with col2:
             alle = st.time_input(
                 f"{ora}ª ora - Alle:",
-                value=datetime.strptime(st.session_state.schedule_data['orari'][str(ora)]['alle'], '%H:%M').time(),
+                value=datetime.strptime(orari[str(ora)]['alle'], '%H:%M').time(),
                 key=f"alle_{ora}"
             )
         
-        st.session_state.schedule_data['orari'][str(ora)] = {
+        orari[str(ora)] = {
             'dalle': dalle.strftime('%H:%M'),
             'alle': alle.strftime('%H:%M')
         }
     
+    set_config_field('orari', orari)
+    
     st.markdown("---")
     
     # Configurazione dettagliata dell'orario
@@ -486,306 +541,186 @@ def initialize_empty_schedule():
                 'piano': '',
                 'aula': ''
             }
-    st.session_state.schedule_data['schedule'] = schedule
+    set_config_field('schedule', schedule)
 
 def edit_day_schedule(giorno):
-    """Editor per un singolo giorno"""
-    if giorno not in st.session_state.schedule_data['schedule']:
-        st.session_state.schedule_data['schedule'][giorno] = {}
-    
-    for ora in st.session_state.schedule_data['ore_attive']:
-        ora_str = str(ora)
-        if ora_str not in st.session_state.schedule_data['schedule'][giorno]:
-            st.session_state.schedule_data['schedule'][giorno][ora_str] = {
-                'classe': '', 'edificio': '', 'piano': '', 'aula': ''
+    """Editor a griglia per un singolo giorno: le modifiche sono applicate insieme"""
+    conflict_index = current_conflict_index()
+    teacher_id = current_archive_id() if conflict_index is not None else None
+    schedule_data = st.session_state.schedule_data
+    docente = schedule_data.get('docente', '')
+    missing = [str(ora) for ora in schedule_data['ore_attive']
+               if str(ora) not in schedule_data['schedule'].get(giorno, {})]
+    if missing:
+        schedule_data = editable_schedule_data()
+        day = schedule_data['schedule'].setdefault(giorno, {})
+        for ora_str in missing:
+            day[ora_str] = engine.empty_slot()
+            st.session_state.config_changes.slot(giorno, ora_str, engine.empty_slot())
+    day = schedule_data['schedule'][giorno]
+    
+    # pandas viene importato solo qui, al primo uso dell'editor
+    import pandas as pd
+    rows = engine.day_rows(schedule_data, giorno)
+    frame = pd.DataFrame(rows, index=[f"{ora}ª ora" for ora in schedule_data['ore_attive']],
+                         columns=list(engine.SLOT_FIELDS))
+    # La chiave cambia con il contenuto: dopo il salvataggio (o un nuovo
+    # caricamento) l'editor riparte dai dati aggiornati
+    version = hashlib.md5(repr(rows).encode('utf-8')).hexdigest()[:8]
+    
+    # Dentro il form le modifiche non rieseguono la pagina fino a "Applica"
+    with st.form(f"form_{giorno}"):
+        edited = st.data_editor(
+            frame,
+            key=f"editor_{giorno}_{version}",
+            use_container_width=True,
+            num_rows="fixed",
+            column_config={
+                'classe': st.column_config.TextColumn("Classe", help="es. 1A, 2B, DISP."),
+                'edificio': st.column_config.TextColumn("Edificio", help="es. A, B, C"),
+                'piano': st.column_config.TextColumn("Piano", help="es. PT, 1P, 2P"),
+                'aula': st.column_config.TextColumn("Aula", help="es. A1, A15, A43"),
             }
-        
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            classe = st.text_input(
-                f"Classe {ora}ª ora:",
-                value=st.session_state.schedule_data['schedule'][giorno][ora_str]['classe'],
-                key=f"classe_{giorno}_{ora}",
-                placeholder="es. 1A, 2B, DISP."
-            )
-        
-        with col2:
-            edificio = st.text_input(
-                f"Edificio {ora}ª ora:",
-                value=st.session_state.schedule_data['schedule'][giorno][ora_str]['edificio'],
-                key=f"edificio_{giorno}_{ora}",
-                placeholder="es. A, B, C"
-            )
-        
-        with col3:
-            piano = st.text_input(
-                f"Piano {ora}ª ora:",
-                value=st.session_state.schedule_data['schedule'][giorno][ora_str]['piano'],
-                key=f"piano_{giorno}_{ora}",
-                placeholder="es. PT, 1P, 2P"
-            )
-        
-        with col4:
-            aula = st.text_input(
-                f"Aula {ora}ª ora:",
-                value=st.session_state.schedule_data['schedule'][giorno][ora_str]['aula'],
-                key=f"aula_{giorno}_{ora}",
-                placeholder="es. A1, A15, A43"
-            )
-        
-        # Aggiorna i dati
-        st.session_state.schedule_data['schedule'][giorno][ora_str] = {
-            'classe': classe,
-            'edificio': edificio,
-            'piano': piano,
-            'aula': aula
-        }
+        )
+        submitted = st.form_submit_button("💾 Applica modifiche")
+    
+    if submitted:
+        changes = engine.changed_slots(schedule_data, giorno, edited.to_dict('records'))
+        if changes:
+            # Le tabelle memorizzate per il contenuto precedente non servono più
+            engine.invalidate_table_cache(schedule_hash(schedule_data))
+            day = editable_schedule_data()['schedule'][giorno]
+            for ora_str, new_slot in changes.items():
+                day[ora_str] = new_slot
+                st.session_state.config_changes.slot(giorno, ora_str, new_slot)
+            st.rerun()
+    
+    # Aula o classe già occupate da altri docenti dell'archivio
+    if conflict_index is not None:
+        for ora in schedule_data['ore_attive']:
+            for conflict in conflict_index.check_slot(teacher_id, giorno, ora, day[str(ora)], docente):
+                st.warning(f"⚠️ {format_conflict(conflict)}")
+
+@st.cache_resource
+def get_pdf_jobs():
+    """Coda dei PDF condivisa da tutte le sessioni"""
+    return PDFJobQueue()
 
-def generate_pdf(format_type="standard"):
-    """Genera PDF dell'orario"""
+def request_pdf(format_type="standard"):
+    """Accoda la generazione del PDF; l'esito viene mostrato da show_pdf_job"""
     
     if not st.session_state.schedule_data.get('schedule'):
         st.error("⚠️ Nessun orario configurato!")
-        return None, None
+        return None
     
-    try:
-        # Prepara i dati
-        giorni = st.session_state.schedule_data['giorni_settimana']
-        ore_attive = st.session_state.schedule_data['ore_attive']
-        orari = st.session_state.schedule_data['orari']
-        schedule = st.session_state.schedule_data['schedule']
-        
-        # Configura formato
-        if format_type == "tascabile":
-            pagesize = landscape(A7)
-            margins = 2
-            font_size = 5.5
-            leading = 6.0
-        elif format_type == "a4":
-            pagesize = A4
-            margins = 20
-            font_size = 10
-            leading = 12
-        else:  # standard
-            pagesize = landscape(A4)
-            margins = 15
-            font_size = 8
-            leading = 10
-        
-        # Crea buffer per il PDF
-        buffer = io.BytesIO()
-        try:
-            doc = SimpleDocTemplate(buffer, pagesize=pagesize, 
-                                  rightMargin=margins, leftMargin=margins, 
-                                  topMargin=margins, bottomMargin=margins)
-        except Exception as e:
-            st.error(f"Errore nella creazione del documento PDF: {str(e)}")
-            return None, None
-        
-        # Stili
-        styles = getSampleStyleSheet()
-        style = styles["Normal"]
-        style.fontSize = font_size
-        style.leading = leading
-        
-        # Stile per header
-        header_style = styles["Normal"]
-        header_style.fontSize = font_size
-        header_style.leading = leading
-        header_style.alignment = 1  # CENTER
-        
-        # Prepara dati tabella
-        table_data = []
-        
-        # Titolo con informazioni docente
-        docente = st.session_state.schedule_data.get('docente', 'Cristina Bellina Terra')
-        materie = st.session_state.schedule_data.get('materie', 'Matematica e Fisica')
-        istituto = st.session_state.schedule_data.get('istituto', ISTITUTO_DEFAULT)
-        anno_scolastico = st.session_state.schedule_data.get('anno_scolastico', '2025/2026')
-        
-        if format_type == "tascabile":
-            # Per formato tascabile, aggiungi solo il nome del docente
-            title_style = styles["Title"]
-            title_style.fontSize = font_size + 1
-            title_style.alignment = 1  # CENTER
-            
-            # Crea una riga con il titolo che si estende su tutte le colonne
-            title_row = [Paragraph(f"<b>{docente}</b>", title_style)] + [""] * len(ore_attive)
-            table_data.append(title_row)
-        else:
-            # Per formati più grandi, aggiungi tutte le informazioni
-            title_style = styles["Title"]
-            title_style.fontSize = font_size + 2
-            title_style.alignment = 1  # CENTER
-            
-            # Aggiungi titolo che si estende su tutte le colonne
-            title_row = [Paragraph(f"<b>ORARIO SETTIMANALE</b>", title_style)] + [""] * len(ore_attive)
-            table_data.append(title_row)
-            
-            docente_row = [Paragraph(f"<b>{docente}</b>", style)] + [""] * len(ore_attive)
-            table_data.append(docente_row)
-            
-            materie_row = [Paragraph(f"{materie}", style)] + [""] * len(ore_attive)
-            table_data.append(materie_row)
-            
-            istituto_row = [Paragraph(f"{istituto}", style)] + [""] * len(ore_attive)
-            table_data.append(istituto_row)
-            
-            anno_scolastico_row = [Paragraph(f"A.S. {anno_scolastico}", style)] + [""] * len(ore_attive)
-            table_data.append(anno_scolastico_row)
-            
-            # Riga vuota
-            empty_row = [""] * (1 + len(ore_attive))
-            table_data.append(empty_row)
-        
-        # Header
-        if format_type == "tascabile":
-            header = ["Giorno"] + [f"{i}ª ora" for i in ore_attive]
-        else:
-            header = ["Giorno"] + [f"{i}ª ora" for i in ore_attive]
-        
-        table_data.append([Paragraph(f"<b>{h}</b>", header_style) for h in header])
-        
-        # Verifica che ci siano dati da stampare
-        has_data = False
-        
-        # Righe dati
-        for giorno in giorni:
-            if giorno == st.session_state.schedule_data['giorno_libero'] and not st.session_state.schedule_data['include_giorno_libero']:
-                continue
-            
-            row = [Paragraph(f"<b>{giorno}</b>", style)]
-            
-            for ora in ore_attive:
-                ora_str = str(ora)
-                if giorno in schedule and ora_str in schedule[giorno]:
-                    slot = schedule[giorno][ora_str]
-                    
-                    if slot['classe'] in ['DISP.', '—', '']:
-                        text = slot['classe'] if slot['classe'] else ''
-                    else:
-                        time_str = f"{orari[ora_str]['dalle']}-{orari[ora_str]['alle']}"
-                        
-                        if format_type == "tascabile":
-                            # Formato compatto per tascabile
-                            text = f"{time_str} {slot['classe']}"
-                            if slot['edificio']:
-                                text += f" {slot['edificio']}"
-                            if slot['piano']:
-                                text += f" {slot['piano']}"
-                            if slot['aula']:
-                                text += f" {slot['aula']}"
-                        else:
-                            # Formato standard
-                            text = f"<b>{time_str}</b><br/>{slot['classe']}"
-                            if slot['edificio'] or slot['piano'] or slot['aula']:
-                                location_parts = [slot['edificio'], slot['piano'], slot['aula']]
-                                location = ' '.join([p for p in location_parts if p])
-                                if location:
-                                    text += f"<br/>{location}"
-                        
-                        # Marca che ci sono dati
-                        if slot['classe'] and slot['classe'] not in ['DISP.', '—', '']:
-                            has_data = True
-                    
-                    row.append(Paragraph(text, style))
-                else:
-                    row.append(Paragraph("", style))
-            
-            table_data.append(row)
-        
-        # Verifica che ci siano dati da stampare
-        if not has_data:
-            st.warning("⚠️ Nessun dato da stampare nell'orario!")
-            return None, None
-        
-        # Calcola l'indice dell'header (la riga che contiene "Giorno" e le ore)
-        # L'header è la riga che abbiamo aggiunto dopo il titolo
-        # Devo contare quante righe del titolo ci sono
-        if format_type == "tascabile":
-            # Per formato tascabile: 1 riga titolo + 1 riga header
-            header_row = 1
-        else:
-            # Per formati più grandi: 5 righe titolo + 1 riga vuota + 1 riga header
-            header_row = 6
-        
-        # Crea tabella
-        if format_type == "tascabile":
-            col_widths = [35] + [45] * len(ore_attive)  # Allargata colonna Giorno
-        else:
-            col_widths = [80] + [110] * len(ore_attive)  # Allargata colonna Giorno
-        
-        # Per il titolo, usa una colonna che si estende su tutte le colonne
-        if format_type == "tascabile":
-            # Per formato tascabile, il titolo è solo il nome del docente
-            table = Table(table_data, colWidths=col_widths)
-        else:
-            # Per formati più grandi, il titolo si estende su tutte le colonne
-            table = Table(table_data, colWidths=col_widths)
-        
-        # Stile tabella
-        table_style = [
-            ("VALIGN", (0,0), (-1,-1), "MIDDLE"),  # Centratura verticale
-            ("ALIGN", (0,0), (-1,-1), "CENTER"),    # Centratura orizzontale
-        ]
-        
-        # Applica griglia a tutta la tabella
-        table_style.extend([
-            ("GRID", (0,0), (-1,-1), 0.25, colors.grey),
-        ])
-        
-        # Tutte le celle hanno sfondo bianco (nessun sfondo grigio)
-        
-        # Unisci le celle del titolo per farlo estendere su tutte le colonne
-        if format_type == "tascabile":
-            # Per formato tascabile, unisci solo la prima riga (titolo docente)
-            table_style.append(("SPAN", (0,0), (-1,0)))
+    # Richieste uguali (stesso orario e formato) condividono lo stesso job
+    job = get_pdf_jobs().submit(st.session_state.schedule_data, format_type, tenant=tenant)
+    st.session_state.pdf_jobs[format_type] = job.id
+    return job
+
+def current_pdf_job(format_type):
+    """Ultimo job PDF della sessione per un formato"""
+    job_id = st.session_state.pdf_jobs.get(format_type)
+    return get_pdf_jobs().get(job_id) if job_id else None
+
+def show_pdf_job(format_type, name):
+    """Stato del job PDF e, quando pronto, pulsante di download"""
+    job = current_pdf_job(format_type)
+    if job is None:
+        return
+    
+    if not job.done():
+        st.info(f"⏳ PDF {name} {job.status}... ({job.elapsed:.1f}s)")
+        if not hasattr(st, 'fragment'):
+            st.button("🔄 Aggiorna stato", key=f"refresh_{format_type}")
+        return
+    
+    if job.pdf_data:
+        if job.from_cache:
+            st.success(f"✅ PDF {job.format_type} pronto (dalla cache, {len(job.pdf_data)} bytes)")
         else:
-            # Per formati più grandi, unisci tutte le righe del titolo e la riga vuota
-            table_style.extend([
-                ("SPAN", (0,0), (-1,0)),  # ORARIO SETTIMANALE
-                ("SPAN", (0,1), (-1,1)),  # Nome docente
-                ("SPAN", (0,2), (-1,2)),  # Materie
-                ("SPAN", (0,3), (-1,3)),  # Istituto
-                ("SPAN", (0,4), (-1,4)),  # Anno scolastico
-                ("SPAN", (0,5), (-1,5)),  # Riga vuota
-            ])
-        
-        if format_type != "tascabile":
-            table_style.append(("FONTSIZE", (0,0), (-1,-1), font_size))
-        
-        table.setStyle(TableStyle(table_style))
-        
-        # Genera PDF
-        try:
-            doc.build([table])
-            
-            # Prepara download
-            buffer.seek(0)
-            pdf_data = buffer.getvalue()
-            
-            # Verifica che il PDF sia stato generato correttamente
-            if len(pdf_data) == 0:
-                st.error("Errore: PDF generato vuoto")
-                return None, None
-            
-            # Nome file
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"orario_docente_{format_type}_{timestamp}.pdf"
-            
-            st.success(f"✅ PDF {format_type} generato con successo! ({len(pdf_data)} bytes)")
-            return pdf_data, filename
-            
-        except Exception as e:
-            st.error(f"Errore nella generazione del PDF: {str(e)}")
-            return None, None
-        
-    except Exception as e:
-        st.error(f"❌ Errore nella generazione del PDF: {str(e)}")
-        return None, None
+            st.success(f"✅ PDF {job.format_type} generato con successo! ({len(job.pdf_data)} bytes)")
+        st.download_button(
+            label=f"📥 Scarica PDF {name}",
+            data=job.pdf_data,
+            file_name=engine.pdf_filename(job.format_type),
+            mime="application/pdf",
+            key=f"download_{format_type}"
+        )
+    elif job.empty:
+        st.warning("⚠️ Nessun dato da stampare nell'orario!")
+    else:
+        st.error(f"❌ Errore nella generazione del PDF {name}: {job.error}")
+
+if hasattr(st, 'fragment'):
+    @st.fragment(run_every=1.0)
+    def poll_pdf_job(format_type, name):
+        """Controlla ogni secondo un job in corso, senza rieseguire la pagina"""
+        job = current_pdf_job(format_type)
+        if job is not None and job.done():
+            # Rerun completo: il job terminato viene mostrato senza polling
+            st.rerun()
+        show_pdf_job(format_type, name)
 
 # Contenuto principale
+def _statistics_tables(frame):
+    import analytics
+    daily = analytics.daily_summary(frame)
+    return analytics.hours_per_class(frame), daily, analytics.teacher_summary(daily)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def schedule_statistics(content_hash, _schedule_data):
+    """Statistiche dell'orario corrente, memorizzate per contenuto"""
+    # pandas viene importato solo qui, al primo uso della pagina Statistiche
+    import analytics
+    return _statistics_tables(analytics.schedule_frame(_schedule_data))
+
+@st.cache_data(ttl=60, show_spinner="Calcolo delle statistiche dell'istituto...")
+def institute_statistics(location, istituto, anno_scolastico):
+    """Statistiche di tutti i docenti dell'archivio per istituto e anno"""
+    import analytics
+    return _statistics_tables(analytics.storage_frame(open_storage(location), istituto, anno_scolastico))
+
+def show_statistics():
+    """Pagina delle statistiche settimanali (orario corrente o intero istituto)"""
+    schedule_data = st.session_state.schedule_data
+    istituto_intero = False
+    if tenant.archive:
+        istituto_intero = st.radio("Dati", ["Orario corrente", "Istituto (archivio)"],
+                                   horizontal=True) == "Istituto (archivio)"
+
+    if istituto_intero:
+        hours, daily, teachers = institute_statistics(
+            tenant.archive,
+            schedule_data.get('istituto', tenant.default('istituto')),
+            schedule_data.get('anno_scolastico', tenant.default('anno_scolastico')))
+    else:
+        hours, daily, teachers = schedule_statistics(schedule_hash(schedule_data), schedule_data)
+
+    if daily.empty:
+        st.info("📝 Nessuna lezione da analizzare. Configura l'orario o carica i dati di esempio.")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Lezioni Settimanali", int(daily['lezioni'].sum()))
+    with col2:
+        st.metric("Buchi", int(daily['buchi'].sum()))
+    with col3:
+        st.metric("Cambi di Edificio", int(daily['cambi_edificio'].sum()))
+    with col4:
+        st.metric("Piani Percorsi", int(daily['piani_percorsi'].sum()))
+
+    st.markdown("### 📚 Ore per Classe")
+    st.bar_chart(hours.assign(classe=hours['classe'].astype(str)).set_index('classe')['ore'])
+
+    if istituto_intero:
+        st.markdown(f"### 👩‍🏫 Carico per Docente ({len(teachers)} docenti)")
+        st.dataframe(teachers, hide_index=True, use_container_width=True)
+    else:
+        st.markdown("### 📅 Dettaglio per Giorno")
+        st.dataframe(daily.drop(columns='docente'), hide_index=True, use_container_width=True)
+
 if page == "home":
     st.title("🏠 Benvenuti nella Gestione Orario Docente")
     st.markdown("---")
@@ -793,7 +728,7 @@ if page == "home":
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Giorni Attivi", len([g for g in st.session_state.schedule_data['giorni_settimana'] if g != st.session_state.schedule_data['giorno_libero']]))
+        st.metric("Giorni Attivi", len(engine.active_days(st.session_state.schedule_data)))
     
     with col2:
         st.metric("Ore Giornaliere", st.session_state.schedule_data['ore_giornaliere'])
@@ -804,6 +739,7 @@ if page == "home":
     st.markdown("### 📋 Funzionalità Disponibili")
     st.markdown("""
     - **📅 Orario**: Visualizza e gestisci l'orario delle lezioni
+    - **📊 Statistiche**: Ore per classe, buchi, cambi di edificio e piani percorsi
     - **⚙️ Configurazione**: Personalizza giorni, orari e impostazioni
     - **🖨️ Stampa**: Genera PDF in diversi formati (standard, tascabile)
     - **💾 Salvataggio**: Salva e carica configurazioni personalizzate
@@ -827,6 +763,16 @@ elif page == "orario":
     
     # Visualizzazione orario
     display_schedule(show_empty, format_type)
+    
+    # Orari di classi, aule e piani dei docenti in archivio
+    if tenant.archive:
+        show_institute_views(show_empty, format_type)
+
+elif page == "statistiche":
+    st.title("📊 Statistiche Settimanali")
+    st.markdown("---")
+
+    show_statistics()
 
 elif page == "configurazione":
     st.title("⚙️ Configurazione Orario")
@@ -834,5 +780,9 @@ elif page == "configurazione":
     
     configure_schedule()
 
+# Salvataggio automatico delle modifiche di questo rerun
+if autosave and st.session_state.config_changes:
+    config_store.flush(st.session_state.config_changes, st.session_state.schedule_data)
+
 if __name__ == "__main__":
     pass
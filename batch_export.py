@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Esportazione PDF di massa per un intero istituto.
+
+Legge una cartella di file JSON (uno per docente, nello stesso formato di
+config_orario.json), genera i PDF nei tre formati usando un pool di processi
+e scrive un archivio ZIP oppure un unico PDF unito.
+
+Con --istituto i processi usano la cache PDF dell'istituto (cartella
+cache_pdf del tenant) invece di quella condivisa, e non superano i suoi
+pdf_concorrenti.
+
+Esempi:
+    python batch_export.py orari/ --zip libretto.zip
+    python batch_export.py orari/ --merged libretto.pdf --formati standard tascabile
+    python batch_export.py tenants/fermi/orari --zip fermi.zip --istituto fermi
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import schedule_engine as engine
+from schedule_model import compact_schedule_data
+
+ALL_FORMATS = ('standard', 'tascabile', 'a4')
+
+# Cache PDF dei processi del pool (impostata da _init_worker)
+_worker_cache = engine.PDF_CACHE
+
+
+def find_schedule_files(directory):
+    """File JSON degli orari nella cartella, in ordine alfabetico"""
+    return sorted(glob.glob(os.path.join(directory, '*.json')))
+
+
+def _init_worker(cache):
+    """Inizializzazione dei processi del pool: cache PDF da usare"""
+    global _worker_cache
+    _worker_cache = cache
+
+
+def render_teacher(path, formats):
+    """Genera i PDF di un docente; eseguita nei processi del pool.
+
+    Restituisce (path, {formato: byte_pdf}, errore).
+    """
+    try:
+        schedule_data = engine.load_config(path)
+        if schedule_data is None:
+            return path, {}, "file non trovato"
+        # Una sola griglia per tutti i formati
+        schedule_data = compact_schedule_data(schedule_data)
+        pdfs = {}
+        for format_type in formats:
+            pdfs[format_type], _ = engine.render_pdf_cached(schedule_data, format_type, _worker_cache)
+        return path, pdfs, None
+    except engine.EmptyScheduleError as e:
+        return path, {}, str(e)
+    except Exception as e:
+        return path, {}, f"{type(e).__name__}: {e}"
+
+
+def export_zip(paths, output, formats, workers=None, progress=print, cache=None):
+    """Genera i PDF in parallelo e li scrive in un archivio ZIP.
+
+    cache: PDFCache usata dai processi (default: quella condivisa).
+    Restituisce (numero di PDF scritti, lista di errori).
+    """
+    written = 0
+    errors = []
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(cache or engine.PDF_CACHE,)) as pool:
+        futures = [pool.submit(render_teacher, path, formats) for path in paths]
+        for done, future in enumerate(as_completed(futures), start=1):
+            path, pdfs, error = future.result()
+            name = os.path.splitext(os.path.basename(path))[0]
+            if error:
+                errors.append((path, error))
+                progress(f"⚠️ [{done}/{len(paths)}] {name}: {error}")
+                continue
+            # I PDF sono già compressi: ZIP_STORED evita lavoro inutile
+            for format_type, pdf_data in pdfs.items():
+                archive.writestr(f"{name}/{name}_{format_type}.pdf", pdf_data)
+                written += 1
+            progress(f"✅ [{done}/{len(paths)}] {name}")
+    return written, errors
+
+
+def _load_teacher(path):
+    """Carica un orario; eseguita nei processi del pool"""
+    try:
+        return path, engine.load_config(path), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def export_merged(paths, output, formats, workers=None, progress=print):
+    """Scrive un unico PDF con una pagina per docente e formato.
+
+    Ogni formato usa il proprio PageTemplate con le stesse dimensioni e
+    margini di PDF_FORMATS, quindi le pagine tascabili restano in A7.
+    Restituisce (numero di pagine scritte, lista di errori).
+    """
+    from reportlab.platypus import BaseDocTemplate, PageTemplate, Frame, NextPageTemplate, PageBreak
+
+    templates = []
+    for format_type in formats:
+        settings = engine.PDF_FORMATS[format_type]
+        width, height = settings['pagesize']
+        margins = settings['margins']
+        frame = Frame(margins, margins, width - 2 * margins, height - 2 * margins,
+                      id=f"frame_{format_type}")
+        templates.append(PageTemplate(id=format_type, frames=[frame], pagesize=settings['pagesize']))
+
+    # Caricamento e validazione in parallelo, impaginazione nel processo principale
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        loaded = list(pool.map(_load_teacher, paths))
+
+    story = []
+    written = 0
+    errors = []
+    for done, (path, schedule_data, error) in enumerate(loaded, start=1):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if error is None and schedule_data is None:
+            error = "file non trovato"
+        if error is None:
+            try:
+                schedule_data = compact_schedule_data(schedule_data)
+                tables = [(f, engine.build_pdf_table(schedule_data, f)) for f in formats]
+            except engine.EmptyScheduleError as e:
+                error = str(e)
+        if error:
+            errors.append((path, error))
+            progress(f"⚠️ [{done}/{len(paths)}] {name}: {error}")
+            continue
+        for format_type, table in tables:
+            if story:
+                story.append(NextPageTemplate(format_type))
+                story.append(PageBreak())
+            story.append(table)
+            written += 1
+        progress(f"✅ [{done}/{len(paths)}] {name}")
+
+    if story:
+        # Il primo template deve corrispondere al formato della prima pagina
+        doc = BaseDocTemplate(output, pageTemplates=templates,
+                              pagesize=engine.PDF_FORMATS[formats[0]]['pagesize'])
+        doc.build(story)
+    return written, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Esportazione PDF di massa degli orari")
+    parser.add_argument('cartella', help="Cartella con un file JSON per docente")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--zip', help="Archivio ZIP di output")
+    output.add_argument('--merged', help="PDF unico di output")
+    parser.add_argument('--formati', nargs='+', choices=ALL_FORMATS, default=list(ALL_FORMATS),
+                        help="Formati da generare (default: tutti)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Numero di processi (default: numero di CPU)")
+    parser.add_argument('--istituto',
+                        help="Istituto (ORARIO_TENANTS): i processi non superano i suoi pdf_concorrenti")
+    args = parser.parse_args(argv)
+
+    workers = args.workers
+    cache = None
+    if args.istituto:
+        from tenancy import TENANTS, TenantError
+        try:
+            tenant = TENANTS.get(args.istituto)
+        except TenantError as e:
+            print(f"❌ {e}")
+            return 1
+        cache = tenant.pdf_cache
+        limit = tenant.max_pdf_jobs
+        if limit:
+            workers = min(workers or os.cpu_count() or 1, limit)
+
+    paths = find_schedule_files(args.cartella)
+    if not paths:
+        print(f"❌ Nessun file JSON trovato in {args.cartella}")
+        return 1
+
+    print(f"📚 {len(paths)} orari, formati: {', '.join(args.formati)}")
+    start = time.perf_counter()
+    if args.zip:
+        written, errors = export_zip(paths, args.zip, args.formati, workers, cache=cache)
+        destination = args.zip
+    else:
+        written, errors = export_merged(paths, args.merged, args.formati, workers)
+        destination = args.merged
+    elapsed = time.perf_counter() - start
+
+    rate = written / elapsed if elapsed > 0 else 0.0
+    print("=" * 40)
+    print(f"📊 {written} PDF in {elapsed:.2f}s ({rate:.1f} file/s) → {destination}")
+    if errors:
+        print(f"⚠️ {len(errors)} orari non esportati")
+    return 0 if written else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
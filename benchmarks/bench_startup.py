@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark del tempo di avvio: time-to-first-render della pagina Home.
+
+Ogni misura gira in un processo nuovo (import "a freddo") ed esegue app.py
+con l'AppTest di Streamlit. Streamlit è già importato prima della misura,
+come in un server avviato: si misura quanto paga la prima esecuzione dello
+script in una nuova sessione.
+
+Modalità confrontate:
+- lazy:  app.py così com'è (pandas e ReportLab caricati al primo uso);
+- eager: app.py preceduto dagli import di pandas e ReportLab platypus,
+         come avveniva prima del caricamento ritardato.
+
+Uso:
+    python benchmarks/bench_startup.py [--runs 5] [--json risultati.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(APP_DIR, 'app.py')
+
+EAGER_PREAMBLE = """\
+import pandas  # noqa: F401
+import reportlab.platypus  # noqa: F401
+import reportlab.lib.styles  # noqa: F401
+"""
+
+# Script eseguito in ogni processo di misura
+MEASURE = """\
+import sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+if at.exception:
+    sys.exit("Errore nello script: " + str(at.exception[0].message))
+print(elapsed)
+"""
+
+
+def _script_for(mode, directory):
+    if mode == 'lazy':
+        return APP_PATH
+    path = os.path.join(directory, 'app_eager.py')
+    with open(APP_PATH, 'r') as f:
+        source = f.read()
+    with open(path, 'w') as f:
+        f.write(f"import sys\nsys.path.insert(0, {APP_DIR!r})\n")
+        f.write(EAGER_PREAMBLE)
+        f.write(source)
+    return path
+
+
+def measure(mode, runs):
+    """Tempi (secondi) della prima esecuzione dello script, uno per processo"""
+    times = []
+    with tempfile.TemporaryDirectory() as directory:
+        script = _script_for(mode, directory)
+        env = dict(os.environ, ORARIO_PDF_CACHE_DIR='')
+        for _ in range(runs):
+            result = subprocess.run([sys.executable, '-c', MEASURE, script], cwd=APP_DIR, env=env,
+                                    capture_output=True, text=True, check=True)
+            times.append(float(result.stdout.strip().splitlines()[-1]))
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del tempo di avvio della Home")
+    parser.add_argument('--runs', type=int, default=5, help="Processi per modalità (default 5)")
+    parser.add_argument('--json', help="File in cui salvare i risultati")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for mode in ('eager', 'lazy'):
+        times = measure(mode, args.runs)
+        results[mode] = {
+            'runs': times,
+            'median_ms': statistics.median(times) * 1000,
+            'min_ms': min(times) * 1000,
+        }
+        print(f"{mode:6s} mediana {results[mode]['median_ms']:8.1f} ms   "
+              f"min {results[mode]['min_ms']:8.1f} ms")
+
+    saved = results['eager']['median_ms'] - results['lazy']['median_ms']
+    print(f"⏱️ Risparmio all'avvio: {saved:.1f} ms "
+          f"({saved / results['eager']['median_ms'] * 100:.0f}%)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark degli stili ReportLab precalcolati.
+
+Confronta, per ogni formato, la preparazione degli stili come avveniva prima
+(getSampleStyleSheet() + modifica degli stili + lista TableStyle ricostruita
+a ogni esportazione) con gli stili precalcolati di schedule_engine.pdf_styles,
+e riporta il tempo medio di un'esportazione PDF completa.
+
+Uso:
+    python benchmarks/bench_styles.py [--iterations 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schedule_engine as engine  # noqa: E402
+
+
+def legacy_styles(format_type):
+    """Preparazione degli stili come nella versione precedente di generate_pdf"""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import TableStyle
+
+    settings = engine.PDF_FORMATS[format_type]
+    font_size = settings['font_size']
+    styles = getSampleStyleSheet()
+    style = styles["Normal"]
+    style.fontSize = font_size
+    style.leading = settings['leading']
+    style.alignment = 1
+    title_style = styles["Title"]
+    title_style.fontSize = font_size + (1 if format_type == "tascabile" else 2)
+    title_style.alignment = 1
+    table_style = [
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ]
+    for r in range(engine.title_row_count(format_type)):
+        table_style.append(("SPAN", (0, r), (-1, r)))
+    if format_type != "tascabile":
+        table_style.append(("FONTSIZE", (0, 0), (-1, -1), font_size))
+    return style, title_style, TableStyle(table_style)
+
+
+def timeit(func, iterations):
+    """Tempo medio in microsecondi"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark degli stili PDF")
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    schedule_data = engine.default_schedule_data()
+    schedule_data['schedule'] = engine.example_schedule()
+
+    print(f"{'formato':10s} {'stili prima':>12s} {'stili ora':>12s} {'risparmio':>12s} {'export PDF':>12s}")
+    for format_type in engine.PDF_FORMATS:
+        engine.pdf_styles(format_type)  # riscaldamento: creati una volta per processo
+        before = timeit(lambda: legacy_styles(format_type), args.iterations)
+        after = timeit(lambda: engine.pdf_styles(format_type), args.iterations)
+        export = timeit(lambda: engine.render_pdf(schedule_data, format_type),
+                        max(1, args.iterations // 10))
+        print(f"{format_type:10s} {before:10.1f}µs {after:10.1f}µs "
+              f"{before - after:10.1f}µs {export / 1000:10.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
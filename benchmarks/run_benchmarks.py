@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Suite di benchmark del motore: tabelle a video, esportazione PDF e salvataggio JSON.
+
+Per ogni dimensione (numero di docenti) genera orari sintetici riproducibili
+(5-7 giorni, 6-10 ore, vedi synthetic.py) e misura il tempo medio per docente di:
+
+- rows_<formato>: costruzione delle righe + Markdown della tabella
+  (build_table_rows + build_markdown_table, come display_schedule senza cache);
+- pdf_<formato>:  render_pdf su un campione di docenti (--pdf-sample);
+- json_save / json_load: save_config e load_config su una cartella temporanea.
+
+Ogni misura è ripetuta --repeat volte (ognuna di almeno --min-time secondi)
+e si tiene la migliore. I risultati vengono confrontati con la baseline
+salvata (benchmarks/baseline.json): una misura più lenta della baseline oltre
+la tolleranza è una regressione e il comando termina con codice 1.
+
+Uso:
+    python benchmarks/run_benchmarks.py --teachers 1 10 100
+    python benchmarks/run_benchmarks.py --json risultati.json
+    python benchmarks/run_benchmarks.py --update-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schedule_engine as engine  # noqa: E402
+from synthetic import synthetic_schedules  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+DEFAULT_TEACHERS = [1, 10, 100, 1000, 10000]
+TABLE_FORMATS = ['Standard', 'Compatto', 'Tascabile']
+
+
+def _timed_pass(func, items, loops):
+    start = time.perf_counter()
+    for _ in range(loops):
+        for item in items:
+            func(item)
+    return (time.perf_counter() - start) / (loops * len(items))
+
+
+def best_mean(func, items, repeat, min_time=0.2):
+    """
+    Miglior tempo medio per elemento (secondi) su `repeat` ripetizioni.
+
+    Ogni ripetizione dura almeno `min_time` secondi: con pochi docenti la
+    lista viene percorsa più volte, così le dimensioni piccole non sono
+    dominate dal rumore.
+    """
+    first = _timed_pass(func, items, 1)
+    loops = max(1, int(min_time / (first * len(items))))
+    best = first
+    for _ in range(repeat):
+        best = min(best, _timed_pass(func, items, loops))
+    return best
+
+
+def _table(schedule_data, format_type):
+    header, rows = engine.build_table_rows(schedule_data, False, format_type)
+    return engine.build_markdown_table(header, rows)
+
+
+def bench_size(teachers, args, log=print):
+    """Misure per una dimensione; restituisce {nome_misura: risultato}"""
+    schedules = synthetic_schedules(teachers, seed=args.seed)
+    results = {}
+
+    def record(name, mean, items):
+        results[name] = {'mean_ms': mean * 1000, 'items': items}
+        log(f"  {name:16s} {mean * 1000:10.3f} ms/docente  ({items} docenti)")
+
+    for format_type in TABLE_FORMATS:
+        mean = best_mean(lambda s: _table(s, format_type), schedules, args.repeat, args.min_time)
+        record(f"rows_{format_type}", mean, teachers)
+
+    sample = schedules[:args.pdf_sample]
+    if sample:
+        for format_type in engine.PDF_FORMATS:
+            engine.render_pdf(sample[0], format_type)  # riscaldamento (import, stili)
+            mean = best_mean(lambda s: engine.render_pdf(s, format_type), sample, args.repeat,
+                              args.min_time)
+            record(f"pdf_{format_type}", mean, len(sample))
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [os.path.join(directory, f"{i}.json") for i in range(teachers)]
+        pairs = list(zip(schedules, paths))
+        mean = best_mean(lambda p: engine.save_config(p[0], p[1]), pairs, args.repeat,
+                         args.min_time)
+        record("json_save", mean, teachers)
+        mean = best_mean(engine.load_config, paths, args.repeat, args.min_time)
+        record("json_load", mean, teachers)
+
+    return results
+
+
+def run(args, log=print):
+    """Esegue la suite e restituisce il documento dei risultati"""
+    results = {}
+    for teachers in args.teachers:
+        log(f"👩‍🏫 {teachers} docenti")
+        for name, result in bench_size(teachers, args, log).items():
+            results[f"n{teachers}/{name}"] = result
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'min_time': args.min_time,
+            'pdf_sample': args.pdf_sample,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline):
+    """Confronto con la baseline: lista di (misura, baseline_ms, attuale_ms, rapporto)"""
+    rows = []
+    for name, result in current['results'].items():
+        reference = baseline['results'].get(name)
+        if reference and reference['mean_ms'] > 0:
+            ratio = result['mean_ms'] / reference['mean_ms']
+            rows.append((name, reference['mean_ms'], result['mean_ms'], ratio))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark di tabelle, PDF e salvataggio JSON")
+    parser.add_argument('--teachers', type=int, nargs='+', default=DEFAULT_TEACHERS,
+                        help="Numeri di docenti da misurare (default 1 10 100 1000 10000)")
+    parser.add_argument('--repeat', type=int, default=3, help="Ripetizioni per misura (default 3)")
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help="Durata minima (s) di ogni ripetizione (default 0.2)")
+    parser.add_argument('--pdf-sample', type=int, default=20,
+                        help="Docenti per cui generare i PDF (default 20)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed degli orari sintetici")
+    parser.add_argument('--json', help="File in cui salvare i risultati")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="File della baseline")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="Rallentamento ammesso rispetto alla baseline (default 0.5 = 50%%)")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Salva i risultati come nuova baseline")
+    args = parser.parse_args(argv)
+
+    current = run(args)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"💾 Baseline aggiornata: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("ℹ️ Nessuna baseline: usa --update-baseline per crearla")
+        return 0
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+
+    regressions = 0
+    print()
+    print(f"{'misura':32s} {'baseline':>10s} {'attuale':>10s} {'rapporto':>9s}")
+    for name, before, after, ratio in compare(current, baseline):
+        flag = ''
+        if ratio > 1 + args.tolerance:
+            flag = '  ❌ regressione'
+            regressions += 1
+        print(f"{name:32s} {before:8.3f}ms {after:8.3f}ms {ratio:8.2f}x{flag}")
+
+    if regressions:
+        print(f"⚠️ {regressions} misure oltre la tolleranza del {args.tolerance:.0%}")
+        return 1
+    print("✅ Nessuna regressione rispetto alla baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Generatore di orari sintetici per i benchmark.
+
+Gli orari hanno la stessa struttura di config_orario.json: da 5 a 7 giorni,
+da 6 a 10 ore, un insieme ridotto di classi/aule/edifici condiviso tra i
+docenti e una quota di ore libere e a disposizione. Con lo stesso seed si
+ottengono sempre gli stessi orari.
+"""
+
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schedule_engine as engine  # noqa: E402
+
+EDIFICI = {'MA': ['PT', '1P', '2P'], 'MB': ['PT', '1P'], 'C': ['PT', '1P', '2P', '3P']}
+SEZIONI = 'ABCDEFGH'
+INDIRIZZI = ['sa', 'sp', 'sc', 'ls']
+
+# Probabilità di un'ora libera / a disposizione
+P_LIBERA = 0.25
+P_DISP = 0.10
+
+
+def orari_for(hours):
+    """Orari dalle/alle da 60 minuti a partire dalle 08:00"""
+    orari = {}
+    for ora in range(1, hours + 1):
+        start = 8 * 60 + (ora - 1) * 60
+        orari[str(ora)] = {'dalle': f"{start // 60:02d}:{start % 60:02d}",
+                           'alle': f"{(start + 60) // 60:02d}:{(start + 60) % 60:02d}"}
+    return orari
+
+
+def synthetic_teacher(index, days, hours, rng):
+    """Orario di un docente con `days` giorni e `hours` ore"""
+    giorni = engine.GIORNI[:days]
+    schedule = {}
+    for giorno in giorni:
+        schedule[giorno] = {}
+        for ora in range(1, hours + 1):
+            p = rng.random()
+            if p < P_LIBERA:
+                slot = engine.empty_slot()
+            elif p < P_LIBERA + P_DISP:
+                slot = dict(engine.empty_slot(), classe='DISP.')
+            else:
+                edificio = rng.choice(sorted(EDIFICI))
+                slot = {
+                    'classe': f"{rng.randint(1, 5)}{rng.choice(SEZIONI)}{rng.choice(INDIRIZZI)}",
+                    'edificio': edificio,
+                    'piano': rng.choice(EDIFICI[edificio]),
+                    'aula': f"A{rng.randint(1, 60)}",
+                }
+            schedule[giorno][str(ora)] = slot
+
+    schedule_data = engine.default_schedule_data()
+    schedule_data.update({
+        'docente': f"Docente {index:05d}",
+        'giorni_settimana': list(giorni),
+        'include_giorno_libero': days == 7,
+        'ore_giornaliere': hours,
+        'ore_attive': list(range(1, hours + 1)),
+        'orari': orari_for(hours),
+        'schedule': schedule,
+    })
+    return schedule_data
+
+
+def synthetic_schedules(teachers, days=(5, 7), hours=(6, 10), seed=0):
+    """Lista di `teachers` orari; giorni e ore estratti negli intervalli dati"""
+    rng = random.Random(seed)
+    return [synthetic_teacher(i, rng.randint(*days), rng.randint(*hours), rng)
+            for i in range(teachers)]
+
+
+# Ore settimanali per materia di una classe (30 ore)
+MATERIE = [('Italiano', 5), ('Matematica', 4), ('Inglese', 3), ('Storia', 3), ('Scienze', 3),
+           ('Fisica', 3), ('Arte', 2), ('Informatica', 2), ('Scienze motorie', 2),
+           ('Filosofia', 2), ('Religione', 1)]
+# Materie svolte nelle aule comuni (laboratori, palestra)
+MATERIE_COMUNI = {'Informatica', 'Scienze motorie'}
+MAX_ORE_DOCENTE = 18
+
+
+def synthetic_problem(classes=60, seed=0):
+    """Problema per generator.py: `classes` classi da 30 ore su 6 giorni × 6 ore"""
+    rng = random.Random(seed)
+    giorni = engine.GIORNI[:6]
+    classi = []
+    for i in range(classes):
+        edificio = sorted(EDIFICI)[i % len(EDIFICI)]
+        classi.append({'classe': f"{i // len(SEZIONI) + 1}{SEZIONI[i % len(SEZIONI)]}",
+                       'edificio': edificio, 'piano': EDIFICI[edificio][i % len(EDIFICI[edificio])],
+                       'aula': f"A{i + 1}"})
+
+    docenti, lezioni = [], []
+    for materia, ore in MATERIE:
+        # Ogni docente prende classi della stessa materia fino a MAX_ORE_DOCENTE
+        docente = None
+        for classe in classi:
+            if docente is None or docente['carico'] + ore > MAX_ORE_DOCENTE:
+                docente = {'docente': f"{materia} {len(docenti) + 1:03d}", 'materie': materia,
+                           'giorno_libero': rng.choice(giorni), 'carico': 0}
+                docenti.append(docente)
+            docente['carico'] += ore
+            lezione = {'classe': classe['classe'], 'docente': docente['docente'], 'ore': ore}
+            if materia in MATERIE_COMUNI:
+                lezione['aula'] = 'comune'
+            lezioni.append(lezione)
+    for docente in docenti:
+        del docente['carico']
+
+    comuni = sum(ore for materia, ore in MATERIE if materia in MATERIE_COMUNI)
+    # Aule comuni sufficienti con un margine del 25%
+    aule = [{'edificio': 'C', 'piano': 'PT', 'aula': f"LAB{i + 1}"}
+            for i in range(math.ceil(classes * comuni / 36 * 1.25))]
+    return {'istituto': 'Istituto Sintetico', 'anno_scolastico': engine.ANNO_SCOLASTICO_DEFAULT,
+            'giorni': giorni, 'ore': list(range(1, 7)), 'aule': aule, 'classi': classi,
+            'docenti': docenti, 'lezioni': lezioni}
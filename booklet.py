@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Libretto degli orari di un intero istituto, scritto in streaming.
+
+Ogni docente viene caricato, impaginato e disegnato direttamente sul canvas
+ReportLab del file di output, senza costruire una story con tutte le tabelle:
+
+- formati standard/a4: una pagina per docente;
+- formato tascabile: schede A7 impaginate 2×4 su fogli A4, con i segni di taglio.
+
+Il canvas di ReportLab tiene in memoria tutte le pagine di un file fino al
+salvataggio (le comprime solo allora): la memoria cresce con le pagine del
+file, non con i docenti del libretto. Per questo il libretto viene diviso in
+volumi di al massimo --max-pagine pagine (default DEFAULT_MAX_PAGES): ogni
+volume viene salvato e liberato prima di iniziare il successivo, così la
+memoria resta limitata a un volume qualunque sia il numero di docenti. Se
+basta un volume il file è quello indicato; altrimenti i volumi sono numerati
+(libretto_001.pdf, libretto_002.pdf, ...). Con --max-pagine 0 il libretto è un
+file unico e la memoria cresce con il numero di pagine.
+
+Esempi:
+    python booklet.py orari.db libretto.pdf
+    python booklet.py orari/ schede.pdf --formato tascabile --anno 2025/2026
+    python booklet.py orari.db libretto.pdf --max-pagine 500
+    python booklet.py orari.db libretto.pdf --max-pagine 0
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from reportlab.lib.pagesizes import A4
+
+import schedule_engine as engine
+
+# Schede tascabili (A7 orizzontale) per foglio A4 verticale
+CARD_COLUMNS = 2
+CARD_ROWS = 4
+CUT_MARK = 8  # lunghezza dei segni di taglio (pt)
+
+# Spaziatura interna del Frame di SimpleDocTemplate, come in render_pdf
+FRAME_PADDING = 6
+
+# Pagine per volume: limita la memoria del canvas (0 = file unico)
+DEFAULT_MAX_PAGES = 250
+
+
+def _draw_fitted(canvas, table, x, y, width, height):
+    """Disegna la tabella centrata in alto nel riquadro, ridotta se non ci sta"""
+    w, h = table.wrapOn(canvas, width, height)
+    scale = min(1.0, width / w if w else 1.0, height / h if h else 1.0)
+    canvas.saveState()
+    canvas.translate(x + (width - w * scale) / 2, y + height - h * scale)
+    canvas.scale(scale, scale)
+    table.drawOn(canvas, 0, 0)
+    canvas.restoreState()
+
+
+def _draw_cut_marks(canvas, x0, y0, card_width, card_height, sheet_width, sheet_height):
+    """Segni di taglio sui bordi del foglio e croci agli incroci interni"""
+    canvas.saveState()
+    canvas.setStrokeGray(0.5)
+    canvas.setLineWidth(0.25)
+    xs = [x0 + c * card_width for c in range(CARD_COLUMNS + 1)]
+    ys = [y0 + r * card_height for r in range(CARD_ROWS + 1)]
+    lines = []
+    for x in xs:
+        lines.append((x, 0, x, CUT_MARK))
+        lines.append((x, sheet_height, x, sheet_height - CUT_MARK))
+    for y in ys:
+        lines.append((0, y, CUT_MARK, y))
+        lines.append((sheet_width, y, sheet_width - CUT_MARK, y))
+    half = CUT_MARK / 2
+    for x in xs[1:-1]:
+        for y in ys[1:-1]:
+            lines.append((x - half, y, x + half, y))
+            lines.append((x, y - half, x, y + half))
+    canvas.lines(lines)
+    canvas.restoreState()
+
+
+class BookletWriter:
+    """Scrive il libretto un docente alla volta (pagina o scheda tascabile)"""
+
+    def __init__(self, output, format_type="standard", max_pages=DEFAULT_MAX_PAGES, cut_marks=True):
+        self.output = output
+        self.format_type = format_type
+        self.settings = engine.PDF_FORMATS[format_type]
+        self.max_pages = max_pages
+        self.cut_marks = cut_marks
+        self.tascabile = format_type == "tascabile"
+        self.files = []      # volumi completati
+        self.teachers = 0
+        self.pages = 0
+        self.bytes_written = 0
+        self._canvas = None
+        self._canvas_path = None
+        self._volume_pages = 0
+        self._card = 0       # posizione della prossima scheda nel foglio
+
+        if self.tascabile:
+            self.sheet_width, self.sheet_height = A4
+            self.card_width, self.card_height = self.settings['pagesize']
+            self.x0 = (self.sheet_width - CARD_COLUMNS * self.card_width) / 2
+            self.y0 = (self.sheet_height - CARD_ROWS * self.card_height) / 2
+
+    # --- Volumi --------------------------------------------------------------
+
+    def _volume_path(self):
+        if not self.files:
+            return self.output
+        base, ext = os.path.splitext(self.output)
+        if len(self.files) == 1:
+            # Secondo volume: anche il primo prende il numero
+            first = f"{base}_001{ext or '.pdf'}"
+            os.replace(self.files[0], first)
+            self.files[0] = first
+        return f"{base}_{len(self.files) + 1:03d}{ext or '.pdf'}"
+
+    def _ensure_canvas(self):
+        if self._canvas is None:
+            from reportlab.pdfgen.canvas import Canvas
+
+            pagesize = A4 if self.tascabile else self.settings['pagesize']
+            self._canvas_path = self._volume_path()
+            self._canvas = Canvas(self._canvas_path, pagesize=pagesize, pageCompression=1)
+            self._volume_pages = 0
+
+    def _end_page(self):
+        if self.tascabile and self.cut_marks:
+            _draw_cut_marks(self._canvas, self.x0, self.y0, self.card_width, self.card_height,
+                            self.sheet_width, self.sheet_height)
+        self._canvas.showPage()
+        self.pages += 1
+        self._volume_pages += 1
+        self._card = 0
+        if self.max_pages and self._volume_pages >= self.max_pages:
+            self._save_volume()
+
+    def _save_volume(self):
+        canvas = self._canvas
+        if canvas is None:
+            return
+        canvas.save()
+        self.files.append(self._canvas_path)
+        self.bytes_written += os.path.getsize(self._canvas_path)
+        self._canvas = None
+
+    # --- Scrittura -----------------------------------------------------------
+
+    def add(self, schedule_data):
+        """Aggiunge un docente; solleva EmptyScheduleError se non ha lezioni"""
+        table = engine.build_pdf_table(schedule_data, self.format_type)
+        self._ensure_canvas()
+        margins = self.settings['margins']
+
+        if self.tascabile:
+            column, row = self._card % CARD_COLUMNS, self._card // CARD_COLUMNS
+            x = self.x0 + column * self.card_width
+            y = self.y0 + (CARD_ROWS - 1 - row) * self.card_height
+            _draw_fitted(self._canvas, table, x + margins, y + margins,
+                         self.card_width - 2 * margins, self.card_height - 2 * margins)
+            self._card += 1
+            self.teachers += 1
+            if self._card == CARD_COLUMNS * CARD_ROWS:
+                self._end_page()
+        else:
+            width, height = self.settings['pagesize']
+            inset = margins + FRAME_PADDING
+            _draw_fitted(self._canvas, table, inset, inset, width - 2 * inset, height - 2 * inset)
+            self.teachers += 1
+            self._end_page()
+
+    def close(self):
+        """Chiude l'ultimo foglio e salva; restituisce la lista dei file scritti"""
+        if self._canvas is not None and self._card:
+            self._end_page()
+        self._save_volume()
+        return self.files
+
+
+def write_booklet(storage, output, format_type="standard", istituto=None, anno_scolastico=None,
+                  max_pages=DEFAULT_MAX_PAGES, cut_marks=True, progress=print):
+    """Scrive il libretto; restituisce (writer, lista di errori)"""
+    writer = BookletWriter(output, format_type, max_pages=max_pages, cut_marks=cut_marks)
+    records = storage.list_teachers(istituto, anno_scolastico)
+    errors = []
+    for done, record in enumerate(records, start=1):
+        schedule_data = storage.load(record['id'])
+        try:
+            if schedule_data is None:
+                raise engine.PDFGenerationError("orario non trovato")
+            writer.add(schedule_data)
+        except engine.PDFGenerationError as e:
+            errors.append((record['docente'], str(e)))
+            progress(f"⚠️ [{done}/{len(records)}] {record['docente']}: {e}")
+            continue
+        progress(f"✅ [{done}/{len(records)}] {record['docente']} — "
+                 f"{writer.pages} pagine, {len(writer.files)} volumi salvati "
+                 f"({writer.bytes_written / 1024:.0f} KB)")
+    writer.close()
+    return writer, errors
+
+
+def main(argv=None):
+    from storage import open_storage
+
+    parser = argparse.ArgumentParser(description="Libretto PDF degli orari di un istituto")
+    parser.add_argument('archivio', help="File .db/.sqlite oppure cartella di file JSON")
+    parser.add_argument('output', help="PDF di output")
+    parser.add_argument('--formato', choices=list(engine.PDF_FORMATS), default='standard')
+    parser.add_argument('--istituto')
+    parser.add_argument('--anno', dest='anno_scolastico')
+    parser.add_argument('--max-pagine', type=int, default=DEFAULT_MAX_PAGES,
+                        help=f"Pagine per volume, limita la memoria (default: {DEFAULT_MAX_PAGES}; "
+                             "0 = file unico)")
+    parser.add_argument('--senza-segni-taglio', action='store_true',
+                        help="Non disegna i segni di taglio delle schede tascabili")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    writer, errors = write_booklet(open_storage(args.archivio), args.output, args.formato,
+                                   args.istituto, args.anno_scolastico, args.max_pagine,
+                                   not args.senza_segni_taglio)
+    elapsed = time.perf_counter() - start
+
+    print("=" * 40)
+    print(f"📊 {writer.teachers} docenti, {writer.pages} pagine, "
+          f"{writer.bytes_written / 1024:.0f} KB in {elapsed:.2f}s")
+    for path in writer.files:
+        print(f"📄 {path}")
+    if errors:
+        print(f"⚠️ {len(errors)} orari non inclusi")
+    return 0 if writer.teachers else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Schema versionato della configurazione dell'orario.
+
+normalize_config() viene eseguita una sola volta al caricamento (app,
+archivio, API, export) e garantisce al resto del codice un dizionario con
+tutti i campi presenti e dei tipi attesi:
+
+- chiavi delle ore sempre stringhe ('1'...'10'), ore_attive interi ordinati;
+- un orario dalle/alle "HH:MM" per ogni ora attiva;
+- slot con i quattro campi stringa (classe, edificio, piano, aula).
+
+Le configurazioni salvate senza "versione_schema" (versione 1) vengono
+migrate: chiavi intere, ore come stringhe, slot scritti come semplice nome
+della classe, orari mancanti. Un file non recuperabile solleva
+ConfigValidationError con il percorso del campo errato, invece di un
+KeyError a metà del rendering.
+"""
+
+import re
+
+import schedule_engine as engine
+from schedule_model import SLOT_FIELDS
+
+SCHEMA_VERSION = 2
+VERSION_KEY = 'versione_schema'
+
+MAX_ORE = 10
+
+_TIME = re.compile(r'^(\d{1,2}):(\d{2})$')
+
+# Campi di primo livello di tipo stringa
+_TEXT_FIELDS = ('docente', 'materie', 'istituto', 'anno_scolastico')
+
+
+class ConfigValidationError(ValueError):
+    """Configurazione non valida e non migrabile"""
+
+    def __init__(self, path, message):
+        super().__init__(f"{path}: {message}")
+        self.path = path
+
+
+def _hour(value, path):
+    try:
+        ora = int(value)
+    except (TypeError, ValueError):
+        raise ConfigValidationError(path, f"ora non valida {value!r}")
+    if not 1 <= ora <= MAX_ORE:
+        raise ConfigValidationError(path, f"ora fuori intervallo (1-{MAX_ORE}): {ora}")
+    return ora
+
+
+def _day(value, path):
+    if value not in engine.GIORNI:
+        raise ConfigValidationError(path, f"giorno sconosciuto {value!r}")
+    return value
+
+
+def _time(value, path):
+    match = _TIME.match(value) if isinstance(value, str) else None
+    if match is None or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+        raise ConfigValidationError(path, f"orario non valido {value!r} (atteso HH:MM)")
+    return f"{int(match.group(1)):02d}:{match.group(2)}"
+
+
+def default_times(ora):
+    """Orario di default di un'ora: DEFAULT_ORARI o ore da 60 minuti dalle 08:15"""
+    times = engine.DEFAULT_ORARI.get(str(ora))
+    if times is not None:
+        return dict(times)
+    start = 8 * 60 + 15 + (ora - 1) * 60
+    return {'dalle': f"{start // 60:02d}:{start % 60:02d}",
+            'alle': f"{(start + 60) // 60:02d}:{(start + 60) % 60:02d}"}
+
+
+def _slot(value, path):
+    if isinstance(value, str):
+        # Versione 1: solo il nome della classe
+        return {'classe': value, 'edificio': '', 'piano': '', 'aula': ''}
+    if not isinstance(value, dict):
+        raise ConfigValidationError(path, f"slot non valido {value!r}")
+    slot = {}
+    for field in SLOT_FIELDS:
+        item = value.get(field)
+        if item is None:
+            item = ''
+        elif not isinstance(item, str):
+            if not isinstance(item, (int, float)):
+                raise ConfigValidationError(f"{path}.{field}", f"valore non valido {item!r}")
+            item = str(item)
+        slot[field] = item
+    return slot
+
+
+def _migrate_v1(data):
+    """Versione 1 → 2: chiavi e tipi delle ore, slot come stringa, campi mancanti"""
+    defaults = engine.default_schedule_data()
+    for key, value in defaults.items():
+        if data.get(key) is None:
+            data[key] = value
+    if isinstance(data['ore_attive'], (str, int)):
+        data['ore_attive'] = [data['ore_attive']]
+    return data
+
+
+MIGRATIONS = {
+    1: _migrate_v1,
+}
+
+
+def schema_version(data):
+    return data.get(VERSION_KEY, 1)
+
+
+def migrate(data):
+    """Applica in ordine le migrazioni dalla versione del file a SCHEMA_VERSION"""
+    version = schema_version(data)
+    if not isinstance(version, int) or version > SCHEMA_VERSION:
+        raise ConfigValidationError(VERSION_KEY, f"versione non supportata {version!r}")
+    while version < SCHEMA_VERSION:
+        data = MIGRATIONS[version](data)
+        version += 1
+    data[VERSION_KEY] = SCHEMA_VERSION
+    return data
+
+
+def normalize_config(data):
+    """
+    Valida e normalizza la configurazione (modificandola sul posto) e la
+    restituisce; solleva ConfigValidationError se non è recuperabile.
+    """
+    if not isinstance(data, dict):
+        raise ConfigValidationError('$', "la configurazione deve essere un oggetto JSON")
+    data = migrate(data)
+
+    for key in _TEXT_FIELDS:
+        if not isinstance(data.get(key), str):
+            raise ConfigValidationError(key, "deve essere una stringa")
+
+    giorni = data.get('giorni_settimana')
+    if not isinstance(giorni, list):
+        raise ConfigValidationError('giorni_settimana', "deve essere una lista")
+    data['giorni_settimana'] = [_day(g, f"giorni_settimana[{i}]") for i, g in enumerate(giorni)]
+    _day(data.get('giorno_libero'), 'giorno_libero')
+    data['include_giorno_libero'] = bool(data.get('include_giorno_libero'))
+
+    ore = data.get('ore_attive')
+    if not isinstance(ore, list):
+        raise ConfigValidationError('ore_attive', "deve essere una lista")
+    data['ore_attive'] = sorted({_hour(o, f"ore_attive[{i}]") for i, o in enumerate(ore)})
+
+    orari = data.get('orari')
+    if not isinstance(orari, dict):
+        raise ConfigValidationError('orari', "deve essere un oggetto")
+    normalized = {}
+    for key, times in orari.items():
+        ora = str(_hour(key, f"orari.{key}"))
+        if not isinstance(times, dict):
+            raise ConfigValidationError(f"orari.{key}", "atteso {dalle, alle}")
+        normalized[ora] = {'dalle': _time(times.get('dalle'), f"orari.{key}.dalle"),
+                           'alle': _time(times.get('alle'), f"orari.{key}.alle")}
+    for ora in data['ore_attive']:
+        if str(ora) not in normalized:
+            normalized[str(ora)] = default_times(ora)
+    data['orari'] = normalized
+
+    schedule = data.get('schedule')
+    if not isinstance(schedule, dict):
+        raise ConfigValidationError('schedule', "deve essere un oggetto")
+    data['schedule'] = {
+        _day(giorno, f"schedule.{giorno}"): _normalize_day(slots, f"schedule.{giorno}")
+        for giorno, slots in schedule.items()
+    }
+    return data
+
+
+def _normalize_day(slots, path):
+    if not isinstance(slots, dict):
+        raise ConfigValidationError(path, "deve essere un oggetto")
+    return {str(_hour(key, f"{path}.{key}")): _slot(value, f"{path}.{key}")
+            for key, value in slots.items()}
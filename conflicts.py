@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Indice dei conflitti di aula e di classe tra docenti.
+
+ConflictIndex è un indice inverso:
+
+- (giorno, ora, aula) → docenti con lezione in quell'aula;
+- (giorno, ora, classe) → docenti con lezione in quella classe.
+
+I docenti sono identificati dall'id del record dell'archivio (come in
+ViewIndex): due record con lo stesso nome restano distinti e un conflitto
+tra loro viene segnalato; il nome serve solo per la visualizzazione.
+
+L'aula è identificata da edificio + aula (senza distinguere maiuscole e spazi);
+il piano non fa parte della chiave, così un piano scritto in modo diverso da
+due docenti non nasconde il conflitto. Gli slot che non sono lezioni
+(vuoti, DISP., —) non vengono indicizzati.
+
+L'indice si aggiorna slot per slot (update_slot, set_teacher) e ogni
+ricerca costa O(1); la validazione di un intero istituto è lineare nel
+numero di lezioni.
+
+Esempio da riga di comando:
+    python conflicts.py orari.db --anno 2025/2026
+"""
+
+import argparse
+import sys
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from schedule_engine import GIORNI
+from schedule_model import Slot, as_grid
+
+# Tipi di conflitto
+AULA = 'aula'
+CLASSE = 'classe'
+
+Conflict = namedtuple('Conflict', ['tipo', 'giorno', 'ora', 'luogo', 'docenti'])
+
+
+def room_key(slot):
+    """Chiave dell'aula di uno slot, None se l'aula non è indicata"""
+    aula = slot.aula.strip().upper()
+    if not aula:
+        return None
+    return (slot.edificio.strip().upper(), aula)
+
+
+def class_key(slot):
+    """Chiave della classe di uno slot, None se non è una lezione"""
+    if not slot.is_lesson:
+        return None
+    return slot.classe.strip().upper()
+
+
+def _room_label(slot):
+    return ' '.join(p for p in (slot.edificio, slot.aula) if p)
+
+
+class ConflictIndex:
+    """Indice inverso (giorno, ora, aula/classe) → docenti, aggiornabile slot per slot"""
+
+    def __init__(self):
+        self._rooms = defaultdict(set)    # (giorno, ora, chiave aula) -> docenti
+        self._classes = defaultdict(set)  # (giorno, ora, chiave classe) -> docenti
+        self._slots = {}                  # id docente -> {(giorno, ora): Slot}
+        self._names = {}                  # id docente -> nome del docente
+        self._lock = threading.RLock()
+
+    # --- Aggiornamento -------------------------------------------------------
+
+    def update_slot(self, teacher, giorno, ora, slot, docente=None):
+        """Aggiorna lo slot (dict o Slot, None = rimosso) di un docente (id del record)"""
+        if isinstance(slot, dict):
+            slot = Slot.from_dict(slot)
+        position = (giorno, str(ora))
+        with self._lock:
+            if docente is not None:
+                self._names[teacher] = docente
+            slots = self._slots.setdefault(teacher, {})
+            old = slots.get(position)
+            if old is slot:
+                return
+            if old is not None:
+                self._unindex(teacher, position, old)
+            if slot is not None and slot.is_lesson:
+                slots[position] = slot
+                self._index(teacher, position, slot)
+            else:
+                slots.pop(position, None)
+
+    def set_teacher(self, teacher, schedule, docente=None):
+        """
+        Sostituisce l'orario (JSON o ScheduleGrid) di un docente (id del record,
+        docente = nome visualizzato), aggiornando solo gli slot cambiati.
+        """
+        lessons = {(giorno, ora): slot for giorno, ora, slot in as_grid(schedule).iter_lessons()}
+        with self._lock:
+            if docente is not None:
+                self._names[teacher] = docente
+            for position in set(self._slots.get(teacher, ())) - set(lessons):
+                self.update_slot(teacher, *position, None)
+            for (giorno, ora), slot in lessons.items():
+                self.update_slot(teacher, giorno, ora, slot)
+
+    def remove_teacher(self, teacher):
+        with self._lock:
+            for position, slot in self._slots.pop(teacher, {}).items():
+                self._unindex(teacher, position, slot)
+            self._names.pop(teacher, None)
+
+    def _index(self, teacher, position, slot):
+        room = room_key(slot)
+        if room is not None:
+            self._rooms[position + (room,)].add(teacher)
+        self._classes[position + (class_key(slot),)].add(teacher)
+
+    def _unindex(self, teacher, position, slot):
+        room = room_key(slot)
+        keys = [(self._classes, position + (class_key(slot),))]
+        if room is not None:
+            keys.append((self._rooms, position + (room,)))
+        for index, key in keys:
+            teachers = index.get(key)
+            if teachers is not None:
+                teachers.discard(teacher)
+                if not teachers:
+                    del index[key]
+
+    # --- Ricerca -------------------------------------------------------------
+
+    def check_slot(self, teacher, giorno, ora, slot, docente=None):
+        """
+        Conflitti che lo slot (dict o Slot) di `teacher` (id del record, None se
+        non ancora in archivio) avrebbe con gli altri docenti.
+
+        Non modifica l'indice: serve a segnalare i conflitti mentre si compila
+        l'orario, prima di salvarlo. I conflitti riportano i nomi dei docenti
+        (docente = nome di `teacher`, se diverso da quello indicizzato).
+        """
+        if isinstance(slot, dict):
+            slot = Slot.from_dict(slot)
+        if not slot.is_lesson:
+            return []
+        position = (giorno, str(ora))
+        conflicts = []
+        with self._lock:
+            if docente is None:
+                docente = self.teacher_name(teacher)
+            room = room_key(slot)
+            if room is not None:
+                others = self._rooms.get(position + (room,), set()) - {teacher}
+                if others:
+                    conflicts.append(Conflict(AULA, giorno, str(ora), _room_label(slot),
+                                              sorted(self._names_of(others) + [docente])))
+            others = self._classes.get(position + (class_key(slot),), set()) - {teacher}
+            if others:
+                conflicts.append(Conflict(CLASSE, giorno, str(ora), slot.classe,
+                                          sorted(self._names_of(others) + [docente])))
+        return conflicts
+
+    def conflicts(self, teacher=None):
+        """Tutti i conflitti dell'indice (o quelli dell'id `teacher`), ordinati per giorno e ora"""
+        result = []
+        with self._lock:
+            for tipo, index in ((AULA, self._rooms), (CLASSE, self._classes)):
+                for (giorno, ora, _), teachers in index.items():
+                    if len(teachers) > 1 and (teacher is None or teacher in teachers):
+                        slot = self._slots[next(iter(teachers))][(giorno, ora)]
+                        luogo = _room_label(slot) if tipo == AULA else slot.classe
+                        result.append(Conflict(tipo, giorno, ora, luogo,
+                                               sorted(self._names_of(teachers))))
+        result.sort(key=_conflict_order)
+        return result
+
+    def conflicts_for(self, teacher):
+        """Conflitti che coinvolgono un docente (id del record)"""
+        return self.conflicts(teacher)
+
+    def _names_of(self, teachers):
+        return [self.teacher_name(t) for t in teachers]
+
+    def teachers(self):
+        """Id dei docenti indicizzati"""
+        with self._lock:
+            return sorted(self._slots)
+
+    def teacher_name(self, teacher):
+        return self._names.get(teacher, str(teacher))
+
+    def __len__(self):
+        return len(self._slots)
+
+    @classmethod
+    def from_storage(cls, storage, istituto, anno_scolastico):
+        """Indice delle lezioni di un istituto e anno scolastico di un archivio"""
+        index = cls()
+        for record, giorno, ora, slot in storage.iter_lessons(istituto, anno_scolastico):
+            index.update_slot(record['id'], giorno, ora, slot, record['docente'])
+        return index
+
+
+def indexes_by_institute(storage, istituto=None, anno_scolastico=None):
+    """Un ConflictIndex per ogni (istituto, anno scolastico) dell'archivio"""
+    indexes = defaultdict(ConflictIndex)
+    for record, giorno, ora, slot in storage.iter_lessons(istituto, anno_scolastico):
+        scope = (record['istituto'], record['anno_scolastico'])
+        indexes[scope].update_slot(record['id'], giorno, ora, slot, record['docente'])
+    return dict(indexes)
+
+
+def _conflict_order(conflict):
+    giorno = GIORNI.index(conflict.giorno) if conflict.giorno in GIORNI else len(GIORNI)
+    ora = int(conflict.ora) if conflict.ora.isdigit() else 0
+    return (giorno, conflict.giorno, ora, conflict.tipo, conflict.luogo)
+
+
+def format_conflict(conflict):
+    """Descrizione leggibile di un conflitto"""
+    cosa = "Aula" if conflict.tipo == AULA else "Classe"
+    return (f"{cosa} {conflict.luogo} — {conflict.giorno} {conflict.ora}ª ora: "
+            f"{', '.join(conflict.docenti)}")
+
+
+def main(argv=None):
+    from storage import open_storage
+
+    parser = argparse.ArgumentParser(description="Conflitti di aula e classe in un archivio di orari")
+    parser.add_argument('archivio', help="File .db/.sqlite oppure cartella di file JSON")
+    parser.add_argument('--istituto')
+    parser.add_argument('--anno', dest='anno_scolastico')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    indexes = indexes_by_institute(open_storage(args.archivio), args.istituto, args.anno_scolastico)
+    found = {scope: index.conflicts() for scope, index in sorted(indexes.items())}
+    elapsed = time.perf_counter() - start
+
+    total = 0
+    for (istituto, anno_scolastico), conflicts in found.items():
+        print(f"🏫 {istituto} — {anno_scolastico}: {len(conflicts)} conflitti")
+        for conflict in conflicts:
+            print(f"  ⚠️ {format_conflict(conflict)}")
+        total += len(conflicts)
+    teachers = sum(len(index) for index in indexes.values())
+    print(f"🔎 {teachers} docenti, {total} conflitti in {elapsed * 1000:.0f} ms")
+    return 1 if total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
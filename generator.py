@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+Generatore automatico dell'orario di un istituto.
+
+Dato l'elenco delle lezioni settimanali (classe, docente, ore), la
+disponibilità dei docenti (giorno_libero, ore_attive) e le aule, cerca
+un'assegnazione giorno/ora senza conflitti con una ricerca locale
+(simulated annealing):
+
+- vincoli rigidi: un docente, una classe o un'aula non possono avere due
+  lezioni nella stessa ora; le aule comuni ("aule") non possono essere
+  usate da più lezioni di quante ne esistano; un docente non ha lezioni nel
+  giorno libero né fuori dalle sue ore attive (escluse già dal dominio);
+- vincoli morbidi: al massimo MAX_PER_DAY ore della stessa materia al
+  giorno per classe, meno buchi possibili per classi e docenti.
+
+Il costo è aggiornato in modo incrementale: ogni mossa (spostamento di
+un'ora o scambio di due ore della stessa classe) tocca solo i contatori di
+occupazione e le righe giornaliere coinvolte. Più ricerche indipendenti
+(seed diversi) girano in parallelo su tutti i core; vince la migliore.
+Il risultato è scritto nell'archivio (SQLite o cartella JSON) con un orario
+per docente nel formato di config_orario.json.
+
+Formato del problema (JSON):
+    {
+      "istituto": "...", "anno_scolastico": "2025/2026",
+      "giorni": ["LUN", "MAR", "MER", "GIO", "VEN", "SAB"],
+      "ore": [1, 2, 3, 4, 5, 6],
+      "orari": {"1": {"dalle": "08:15", "alle": "09:15"}},            (facoltativo)
+      "aule": [{"edificio": "C", "piano": "PT", "aula": "LAB1"}],      aule comuni
+      "classi": [{"classe": "1A", "edificio": "MA", "piano": "PT", "aula": "A1"}],
+      "docenti": [{"docente": "Rossi", "materie": "Matematica",
+                   "giorno_libero": "MER", "ore_attive": [1, 2, 3, 4, 5]}],
+      "lezioni": [{"classe": "1A", "docente": "Rossi", "ore": 4},
+                  {"classe": "1A", "docente": "Bianchi", "ore": 2, "aula": "comune"}]
+    }
+
+Una lezione usa l'aula della classe; con "aula": "comune" (o se la classe
+non ha un'aula) usa una delle aule comuni; con edificio/piano/aula espliciti
+usa quell'aula.
+
+Esempio:
+    python generator.py problema.json orari.db --tempo 300
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import schedule_engine as engine
+from config_schema import default_times
+
+# Pesi del costo: un conflitto vale più di qualunque miglioramento morbido
+HARD_WEIGHT = 50
+DAY_WEIGHT = 2        # ore della stessa materia oltre MAX_PER_DAY in un giorno
+CLASS_GAP_WEIGHT = 3  # buchi nell'orario di una classe
+TEACHER_GAP_WEIGHT = 1
+
+MAX_PER_DAY = 2
+
+# Temperatura iniziale e finale del simulated annealing
+T_START = 4.0
+T_END = 0.05
+
+CHECK_EVERY = 2000    # iterazioni tra due controlli di tempo/progresso
+SHARED_ROOM = 'comune'
+
+Solution = namedtuple('Solution', ['hard', 'soft', 'slots', 'seed', 'iterations', 'elapsed'])
+
+
+class GeneratorError(ValueError):
+    """Problema non valido o impossibile da risolvere"""
+
+
+def _room_key(data):
+    return (data.get('edificio', ''), data.get('piano', ''), data.get('aula', ''))
+
+
+class Problem:
+    """Problema compilato in indici interi per il solver"""
+
+    def __init__(self, data):
+        self.data = data
+        self.giorni = list(data.get('giorni', engine.GIORNI[:6]))
+        self.ore = [int(o) for o in data.get('ore', range(1, 7))]
+        self.days = len(self.giorni)
+        self.hours = len(self.ore)
+        self.slots = self.days * self.hours
+
+        self.teachers = [t['docente'] for t in data['docenti']]
+        teacher_index = {name: i for i, name in enumerate(self.teachers)}
+        if len(teacher_index) != len(self.teachers):
+            raise GeneratorError("Docenti duplicati nel problema")
+        self.classes = [c['classe'] for c in data.get('classi', [])]
+        class_rooms = {c['classe']: _room_key(c) for c in data.get('classi', []) if c.get('aula')}
+
+        # Ore disponibili di ogni docente (il dominio delle sue lezioni)
+        self.allowed = []
+        for teacher in data['docenti']:
+            libero = teacher.get('giorno_libero')
+            giorni = teacher.get('giorni_settimana', self.giorni)
+            ore = {int(o) for o in teacher.get('ore_attive', self.ore)}
+            self.allowed.append([d * self.hours + h
+                                 for d, giorno in enumerate(self.giorni)
+                                 if giorno != libero and giorno in giorni
+                                 for h, ora in enumerate(self.ore) if ora in ore])
+
+        self.shared_rooms = [_room_key(r) for r in data.get('aule', [])]
+        self.rooms = []       # aule riservate (di classe o esplicite)
+        room_index = {}
+        class_index = {name: i for i, name in enumerate(self.classes)}
+
+        # Ogni ora di lezione è un'unità da collocare
+        self.requirements = []
+        self.unit_teacher, self.unit_class, self.unit_room, self.unit_req = [], [], [], []
+        for lesson in data['lezioni']:
+            teacher = teacher_index.get(lesson['docente'])
+            if teacher is None:
+                raise GeneratorError(f"Docente sconosciuto: {lesson['docente']}")
+            classe = lesson['classe']
+            if classe not in class_index:
+                class_index[classe] = len(self.classes)
+                self.classes.append(classe)
+            if lesson.get('aula') == SHARED_ROOM or (not lesson.get('aula') and classe not in class_rooms):
+                room = -1
+                if not self.shared_rooms:
+                    raise GeneratorError(f"Nessuna aula comune per {classe} ({lesson['docente']})")
+            else:
+                key = _room_key(lesson) if lesson.get('aula') else class_rooms[classe]
+                if key not in room_index:
+                    room_index[key] = len(self.rooms)
+                    self.rooms.append(key)
+                room = room_index[key]
+            req = len(self.requirements)
+            self.requirements.append(lesson)
+            for _ in range(int(lesson['ore'])):
+                self.unit_teacher.append(teacher)
+                self.unit_class.append(class_index[classe])
+                self.unit_room.append(room)
+                self.unit_req.append(req)
+        self.units = len(self.unit_teacher)
+        self._check_capacity()
+
+    def _check_capacity(self):
+        load = [0] * len(self.teachers)
+        class_load = [0] * len(self.classes)
+        for t, c in zip(self.unit_teacher, self.unit_class):
+            load[t] += 1
+            class_load[c] += 1
+        for t, hours in enumerate(load):
+            if hours > len(self.allowed[t]):
+                raise GeneratorError(f"{self.teachers[t]}: {hours} ore da collocare ma solo "
+                                     f"{len(self.allowed[t])} ore disponibili")
+        for c, hours in enumerate(class_load):
+            if hours > self.slots:
+                raise GeneratorError(f"{self.classes[c]}: {hours} ore ma solo {self.slots} ore settimanali")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+
+def _gaps(occ, base, hours):
+    """Ore libere tra la prima e l'ultima ora occupata di una riga giornaliera"""
+    first = -1
+    last = -1
+    busy = 0
+    for h in range(hours):
+        if occ[base + h]:
+            if first < 0:
+                first = h
+            last = h
+            busy += 1
+    return 0 if first < 0 else last - first + 1 - busy
+
+
+class Solver:
+    """Stato della ricerca locale con contatori di occupazione e costo incrementale"""
+
+    def __init__(self, problem, seed=0):
+        self.p = problem
+        self.rng = random.Random(seed)
+        p = problem
+        S, D = p.slots, p.days
+        self.tocc = [0] * (len(p.teachers) * S)
+        self.cocc = [0] * (len(p.classes) * S)
+        self.rocc = [0] * (len(p.rooms) * S)
+        self.pocc = [0] * S
+        self.rday = [0] * (len(p.requirements) * D)
+        self.cgap = [0] * (len(p.classes) * D)
+        self.tgap = [0] * (len(p.teachers) * D)
+        self.allowed_sets = [set(a) for a in p.allowed]
+        self.class_units = [[] for _ in p.classes]
+        for u, c in enumerate(p.unit_class):
+            self.class_units[c].append(u)
+        self.slot = [-1] * p.units
+        self.hard = 0
+        self.soft = 0
+        self._initial_assignment()
+
+    # --- Costo ---------------------------------------------------------------
+
+    def _place(self, u, s):
+        """Aggiunge l'unità u nell'ora s; restituisce (Δrigido, Δmorbido)"""
+        p = self.p
+        S, H = p.slots, p.hours
+        t, c, r = p.unit_teacher[u], p.unit_class[u], p.unit_room[u]
+        d = s // H
+        hard = 0
+        i = t * S + s
+        hard += self.tocc[i] >= 1
+        self.tocc[i] += 1
+        i = c * S + s
+        hard += self.cocc[i] >= 1
+        self.cocc[i] += 1
+        if r >= 0:
+            i = r * S + s
+            hard += self.rocc[i] >= 1
+            self.rocc[i] += 1
+        else:
+            hard += self.pocc[s] >= len(p.shared_rooms)
+            self.pocc[s] += 1
+        i = p.unit_req[u] * p.days + d
+        soft = DAY_WEIGHT * (self.rday[i] >= MAX_PER_DAY)
+        self.rday[i] += 1
+        soft += self._update_gaps(t, c, d)
+        self.slot[u] = s
+        return hard, soft
+
+    def _remove(self, u):
+        """Toglie l'unità u dalla sua ora; restituisce (Δrigido, Δmorbido)"""
+        p = self.p
+        S, H = p.slots, p.hours
+        s = self.slot[u]
+        t, c, r = p.unit_teacher[u], p.unit_class[u], p.unit_room[u]
+        d = s // H
+        hard = 0
+        i = t * S + s
+        self.tocc[i] -= 1
+        hard -= self.tocc[i] >= 1
+        i = c * S + s
+        self.cocc[i] -= 1
+        hard -= self.cocc[i] >= 1
+        if r >= 0:
+            i = r * S + s
+            self.rocc[i] -= 1
+            hard -= self.rocc[i] >= 1
+        else:
+            self.pocc[s] -= 1
+            hard -= self.pocc[s] >= len(p.shared_rooms)
+        i = p.unit_req[u] * p.days + d
+        self.rday[i] -= 1
+        soft = -DAY_WEIGHT * (self.rday[i] >= MAX_PER_DAY)
+        soft += self._update_gaps(t, c, d)
+        self.slot[u] = -1
+        return hard, soft
+
+    def _update_gaps(self, t, c, d):
+        p = self.p
+        S, H = p.slots, p.hours
+        i = c * p.days + d
+        gaps = _gaps(self.cocc, c * S + d * H, H)
+        delta = CLASS_GAP_WEIGHT * (gaps - self.cgap[i])
+        self.cgap[i] = gaps
+        i = t * p.days + d
+        gaps = _gaps(self.tocc, t * S + d * H, H)
+        delta += TEACHER_GAP_WEIGHT * (gaps - self.tgap[i])
+        self.tgap[i] = gaps
+        return delta
+
+    def _move(self, u, s):
+        h1, s1 = self._remove(u)
+        h2, s2 = self._place(u, s)
+        return h1 + h2, s1 + s2
+
+    def recompute(self):
+        """Costo ricalcolato da zero (per i controlli)"""
+        p = self.p
+        hard = sum(max(0, n - 1) for n in self.tocc) + sum(max(0, n - 1) for n in self.cocc)
+        hard += sum(max(0, n - 1) for n in self.rocc)
+        hard += sum(max(0, n - len(p.shared_rooms)) for n in self.pocc)
+        soft = DAY_WEIGHT * sum(max(0, n - MAX_PER_DAY) for n in self.rday)
+        soft += CLASS_GAP_WEIGHT * sum(_gaps(self.cocc, c * p.slots + d * p.hours, p.hours)
+                                       for c in range(len(p.classes)) for d in range(p.days))
+        soft += TEACHER_GAP_WEIGHT * sum(_gaps(self.tocc, t * p.slots + d * p.hours, p.hours)
+                                         for t in range(len(p.teachers)) for d in range(p.days))
+        return hard, soft
+
+    # --- Ricerca -------------------------------------------------------------
+
+    def _initial_assignment(self):
+        """Greedy: prima le unità con meno ore disponibili, nell'ora meno occupata"""
+        p = self.p
+        S = p.slots
+        order = sorted(range(p.units), key=lambda u: (len(p.allowed[p.unit_teacher[u]]),
+                                                       self.rng.random()))
+        for u in order:
+            t, c = p.unit_teacher[u], p.unit_class[u]
+            best = min(p.allowed[t], key=lambda s: (self.tocc[t * S + s] + self.cocc[c * S + s],
+                                                    self.rng.random()))
+            hard, soft = self._place(u, best)
+            self.hard += hard
+            self.soft += soft
+
+    def run(self, max_iterations=None, time_limit=60.0, progress=None, stop=None,
+            report_every=1.0):
+        """Simulated annealing; restituisce (rigido, morbido, ore, iterazioni) della soluzione migliore"""
+        p = self.p
+        rng = self.rng
+        random_ = rng.random
+        units = p.units
+        allowed = p.allowed
+        allowed_sets = self.allowed_sets
+        unit_teacher, unit_class = p.unit_teacher, p.unit_class
+        class_units = self.class_units
+        slot = self.slot
+        move = self._move
+
+        start = time.perf_counter()
+        last_report = start
+        best_cost = HARD_WEIGHT * self.hard + self.soft
+        best = (self.hard, self.soft, list(slot))
+        temperature = T_START
+        iterations = 0
+
+        while units:
+            # Controlli periodici: tempo, temperatura, progresso, arresto
+            if iterations % CHECK_EVERY == 0:
+                elapsed = time.perf_counter() - start
+                fraction = elapsed / time_limit if time_limit else 0.0
+                if max_iterations:
+                    fraction = max(fraction, iterations / max_iterations)
+                cost = HARD_WEIGHT * self.hard + self.soft
+                if cost < best_cost:
+                    best_cost = cost
+                    best = (self.hard, self.soft, list(slot))
+                if fraction >= 1.0 or best_cost == 0 or (stop is not None and stop.is_set()):
+                    break
+                temperature = T_START * (T_END / T_START) ** fraction
+                if progress is not None and time.perf_counter() - last_report >= report_every:
+                    last_report = time.perf_counter()
+                    progress({'iterazioni': iterations, 'conflitti': self.hard, 'penalita': self.soft,
+                              'migliore': best[:2], 'temperatura': temperature,
+                              'secondi': last_report - start})
+            iterations += 1
+
+            u = int(random_() * units)
+            t = unit_teacher[u]
+            old = slot[u]
+            if random_() < 0.5:
+                # Spostamento in un'altra ora disponibile del docente
+                options = allowed[t]
+                s = options[int(random_() * len(options))]
+                if s == old:
+                    continue
+                dh, ds = move(u, s)
+                delta = HARD_WEIGHT * dh + ds
+                if delta <= 0 or random_() < math.exp(-delta / temperature):
+                    self.hard += dh
+                    self.soft += ds
+                else:
+                    move(u, old)
+            else:
+                # Scambio con un'altra ora della stessa classe
+                same_class = class_units[unit_class[u]]
+                v = same_class[int(random_() * len(same_class))]
+                s = slot[v]
+                if s == old or s not in allowed_sets[t] or old not in allowed_sets[unit_teacher[v]]:
+                    continue
+                dh1, ds1 = move(u, s)
+                dh2, ds2 = move(v, old)
+                delta = HARD_WEIGHT * (dh1 + dh2) + ds1 + ds2
+                if delta <= 0 or random_() < math.exp(-delta / temperature):
+                    self.hard += dh1 + dh2
+                    self.soft += ds1 + ds2
+                else:
+                    move(v, s)
+                    move(u, old)
+
+        if HARD_WEIGHT * self.hard + self.soft < best_cost:
+            best = (self.hard, self.soft, list(slot))
+        return best + (iterations,)
+
+
+def _solve(problem_data, seed, max_iterations, time_limit, events=None, stop=None):
+    # Eseguita nei worker: il problema viene ricompilato nel processo
+    start = time.perf_counter()
+    solver = Solver(Problem(problem_data), seed)
+
+    def report(state):
+        if events is not None:
+            events.put(dict(state, seed=seed))
+
+    hard, soft, slots, iterations = solver.run(max_iterations, time_limit, report, stop)
+    if stop is not None and hard == 0 and soft == 0:
+        stop.set()
+    return Solution(hard, soft, slots, seed, iterations, time.perf_counter() - start)
+
+
+def _better(a, b):
+    return b is None or (a.hard, a.soft) < (b.hard, b.soft)
+
+
+def generate(problem, processes=None, seed=0, time_limit=60.0, max_iterations=None, progress=print):
+    """
+    Cerca l'orario con `processes` ricerche indipendenti in parallelo (default:
+    tutti i core) e restituisce la Solution migliore.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    def show(state):
+        best_hard, best_soft = state['migliore']
+        progress(f"⏳ [seed {state['seed']}] {state['secondi']:5.1f}s — {state['iterazioni']} iterazioni, "
+                 f"migliore: {best_hard} conflitti, penalità {best_soft}")
+
+    if processes <= 1:
+        return _solve(problem.data, seed, max_iterations, time_limit,
+                      events=_Callback(show), stop=None)
+
+    # spawn: come per i PDF, il processo principale può essere multithread
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager:
+        events = manager.Queue()
+        stop = manager.Event()
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+            pending = {executor.submit(_solve, problem.data, seed + i, max_iterations, time_limit,
+                                       events, stop) for i in range(processes)}
+            best = None
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    solution = future.result()
+                    if _better(solution, best):
+                        best = solution
+                while True:
+                    try:
+                        show(events.get_nowait())
+                    except queue.Empty:
+                        break
+    return best
+
+
+class _Callback:
+    """Adattatore con l'interfaccia put() di una coda per l'esecuzione nel processo"""
+
+    def __init__(self, func):
+        self.put = func
+
+
+def build_schedules(problem, solution):
+    """Un orario per docente (formato config_orario.json) dalla soluzione"""
+    p = problem
+    data = p.data
+    orari = {str(o): default_times(o) for o in p.ore}
+    orari.update(data.get('orari', {}))
+
+    # Le aule comuni vengono distribuite ora per ora tra le lezioni che le usano
+    shared_free = {}
+    schedules = {}
+    for t, teacher in enumerate(data['docenti']):
+        schedule_data = engine.default_schedule_data()
+        schedule_data.update({
+            'docente': teacher['docente'],
+            'materie': teacher.get('materie', ''),
+            'istituto': data.get('istituto', engine.ISTITUTO_DEFAULT),
+            'anno_scolastico': data.get('anno_scolastico', engine.ANNO_SCOLASTICO_DEFAULT),
+            'giorni_settimana': list(p.giorni),
+            'giorno_libero': teacher.get('giorno_libero') or engine.GIORNI[-1],
+            'include_giorno_libero': False,
+            'ore_giornaliere': p.hours,
+            'ore_attive': list(p.ore),
+            'orari': {str(o): dict(orari[str(o)]) for o in p.ore},
+            'schedule': {giorno: {str(ora): engine.empty_slot() for ora in p.ore}
+                         for giorno in p.giorni},
+        })
+        schedules[t] = schedule_data
+
+    for u, s in enumerate(solution.slots):
+        t, c, r = p.unit_teacher[u], p.unit_class[u], p.unit_room[u]
+        if r >= 0:
+            edificio, piano, aula = p.rooms[r]
+        else:
+            free = shared_free.setdefault(s, list(p.shared_rooms))
+            edificio, piano, aula = free.pop(0) if free else ('', '', '')
+        giorno, ora = p.giorni[s // p.hours], p.ore[s % p.hours]
+        schedules[t]['schedule'][giorno][str(ora)] = {
+            'classe': p.classes[c], 'edificio': edificio, 'piano': piano, 'aula': aula}
+    return [schedules[t] for t in range(len(p.teachers))]
+
+
+def main(argv=None):
+    from storage import open_storage
+
+    parser = argparse.ArgumentParser(description="Genera automaticamente l'orario di un istituto")
+    parser.add_argument('problema', help="File JSON con classi, docenti, aule e lezioni")
+    parser.add_argument('archivio', help="Archivio di output (.db/.sqlite o cartella JSON)")
+    parser.add_argument('--tempo', type=float, default=120.0,
+                        help="Secondi massimi di ricerca (default 120)")
+    parser.add_argument('--iterazioni', type=int, default=None,
+                        help="Iterazioni massime per ricerca (default: solo limite di tempo)")
+    parser.add_argument('--processi', type=int, default=None,
+                        help="Ricerche in parallelo (default: numero di CPU)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--salva-con-conflitti', action='store_true',
+                        help="Salva l'orario anche se restano conflitti (sovrascrive l'archivio)")
+    args = parser.parse_args(argv)
+
+    try:
+        problem = Problem.load(args.problema)
+    except GeneratorError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"📋 {len(problem.classes)} classi, {len(problem.teachers)} docenti, "
+          f"{problem.units} ore da collocare in {problem.slots} ore settimanali")
+
+    solution = generate(problem, args.processi, args.seed, args.tempo, args.iterazioni)
+    print("=" * 40)
+    print(f"📊 Seed {solution.seed}: {solution.hard} conflitti, penalità {solution.soft}, "
+          f"{solution.iterations} iterazioni in {solution.elapsed:.1f}s")
+    # Un orario con conflitti non sostituisce quelli già in archivio, salvo richiesta esplicita
+    if solution.hard and not args.salva_con_conflitti:
+        print("❌ Restano conflitti: archivio non modificato "
+              "(aumentare --tempo, rivedere i vincoli o usare --salva-con-conflitti)")
+        return 1
+
+    storage = open_storage(args.archivio)
+    for schedule_data in build_schedules(problem, solution):
+        storage.save(schedule_data)
+    print(f"💾 {len(problem.teachers)} orari salvati in {args.archivio}")
+    if solution.hard:
+        print("⚠️ Restano conflitti: aumentare --tempo o rivedere i vincoli")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Esportazione dell'orario in formato iCalendar (ICS).
+
+Ogni ora di lezione (e ogni ora a disposizione) diventa un evento
+settimanale ricorrente (RRULE) dall'inizio alla fine dell'anno scolastico;
+i giorni di vacanza sono esclusi con EXDATE. Gli UID sono stabili, quindi un
+calendario iscritto al feed aggiorna gli eventi invece di duplicarli.
+
+Il feed viene rigenerato solo quando cambia l'hash dell'orario: il testo
+ICS è memorizzato nella cache dei PDF (memoria + disco) con la stessa chiave
+basata sul contenuto.
+
+Esempio:
+    python ics_export.py config_orario.json orario.ics
+"""
+
+import argparse
+import hashlib
+import re
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+import schedule_engine as engine
+from pdf_cache import PDF_CACHE, pdf_cache_key
+from schedule_model import as_grid
+
+TZID = 'Europe/Rome'
+PRODID = '-//Gestione Orario Docente//IT'
+
+# Giorno dell'orario → giorno della settimana in RRULE (BYDAY)
+WEEKDAYS = {'LUN': 'MO', 'MAR': 'TU', 'MER': 'WE', 'GIO': 'TH', 'VEN': 'FR', 'SAB': 'SA', 'DOM': 'SU'}
+
+# Inizio e fine delle lezioni (mese, giorno) se non indicati
+DEFAULT_START = (9, 15)
+DEFAULT_END = (6, 10)
+
+VTIMEZONE = [
+    "BEGIN:VTIMEZONE",
+    f"TZID:{TZID}",
+    "BEGIN:DAYLIGHT",
+    "TZOFFSETFROM:+0100",
+    "TZOFFSETTO:+0200",
+    "TZNAME:CEST",
+    "DTSTART:19700329T020000",
+    "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU",
+    "END:DAYLIGHT",
+    "BEGIN:STANDARD",
+    "TZOFFSETFROM:+0200",
+    "TZOFFSETTO:+0100",
+    "TZNAME:CET",
+    "DTSTART:19701025T030000",
+    "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+]
+
+
+# "2025/2026", "2025-26", "2025"
+_SCHOOL_YEAR = re.compile(r'^\s*(\d{4})\s*(?:[/-]\s*(?:\d{2}|\d{4}))?\s*$')
+
+
+class SchoolYearError(ValueError):
+    """Anno scolastico da cui non si ricavano le date delle lezioni"""
+
+
+def first_year(anno_scolastico):
+    """Anno solare di inizio delle lezioni ("2025/2026", "2025-26" → 2025)"""
+    match = _SCHOOL_YEAR.match(str(anno_scolastico))
+    if not match:
+        raise SchoolYearError(f"Anno scolastico non riconosciuto: {anno_scolastico!r} "
+                              "(usare ad esempio 2025/2026)")
+    return int(match.group(1))
+
+
+def school_year(anno_scolastico, start=None, end=None):
+    """(primo giorno, ultimo giorno) delle lezioni per "2025/2026" """
+    first = first_year(anno_scolastico)
+    return (start or date(first, *DEFAULT_START), end or date(first + 1, *DEFAULT_END))
+
+
+def easter(year):
+    """Domenica di Pasqua (calendario gregoriano)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    day = (h + l - 7 * m + 33 * month + 19) % 32
+    return date(year, month, day)
+
+
+def school_holidays(anno_scolastico):
+    """
+    Giorni senza lezione: festività nazionali, vacanze di Natale
+    (23 dicembre - 6 gennaio) e di Pasqua (giovedì santo - martedì dopo Pasqua).
+    """
+    first = first_year(anno_scolastico)
+    second = first + 1
+    holidays = {date(first, 11, 1), date(first, 12, 8),
+                date(second, 4, 25), date(second, 5, 1), date(second, 6, 2)}
+    day = date(first, 12, 23)
+    while day <= date(second, 1, 6):
+        holidays.add(day)
+        day += timedelta(days=1)
+    pasqua = easter(second)
+    for offset in range(-3, 3):
+        holidays.add(pasqua + timedelta(days=offset))
+    return holidays
+
+
+def _escape(text):
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Spezza le righe oltre 75 ottetti come richiesto da RFC 5545"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return [line]
+    parts = []
+    while data:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(data))
+        # Non spezzare un carattere UTF-8 a metà
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(('' if not parts else ' ') + data[:cut].decode('utf-8'))
+        data = data[cut:]
+    return parts
+
+
+def _local(day, hhmm):
+    hours, minutes = (int(p) for p in hhmm.split(':'))
+    return datetime(day.year, day.month, day.day, hours, minutes).strftime('%Y%m%dT%H%M%S')
+
+
+def _is_event(slot):
+    return slot.is_lesson or slot.classe == 'DISP.'
+
+
+def build_ics(schedule_data, start=None, end=None, holidays=None, now=None):
+    """Testo ICS dell'orario (eventi settimanali ricorrenti con le vacanze escluse)"""
+    anno_scolastico = schedule_data['anno_scolastico']
+    docente = schedule_data['docente']
+    first_day, last_day = school_year(anno_scolastico, start, end)
+    if holidays is None:
+        holidays = school_holidays(anno_scolastico)
+    stamp = (now or datetime.now(timezone.utc)).strftime('%Y%m%dT%H%M%SZ')
+    until = last_day.strftime('%Y%m%dT235959Z')
+    orari = schedule_data['orari']
+    grid = as_grid(schedule_data['schedule'])
+
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN",
+             "METHOD:PUBLISH", f"X-WR-CALNAME:{_escape(f'Orario {docente} {anno_scolastico}')}",
+             f"X-WR-TIMEZONE:{TZID}"] + VTIMEZONE
+
+    for giorno in engine.active_days(schedule_data):
+        if giorno not in WEEKDAYS:
+            continue
+        weekday = engine.GIORNI.index(giorno)
+        first = first_day + timedelta(days=(weekday - first_day.weekday()) % 7)
+        excluded = sorted(d for d in holidays if first <= d <= last_day and d.weekday() == weekday)
+
+        for ora, slot in zip(schedule_data['ore_attive'], grid.row(giorno, schedule_data['ore_attive'])):
+            if slot is None or not _is_event(slot):
+                continue
+            orario = orari[str(ora)]
+            if slot.is_lesson:
+                summary = f"{slot.classe} {slot.location}".strip()
+            else:
+                summary = f"{slot.classe} (a disposizione)"
+            uid = hashlib.sha1(f"{docente}|{anno_scolastico}|{giorno}|{ora}".encode('utf-8')).hexdigest()
+
+            lines += ["BEGIN:VEVENT",
+                      f"UID:{uid}@orario-docente",
+                      f"DTSTAMP:{stamp}",
+                      f"DTSTART;TZID={TZID}:{_local(first, orario['dalle'])}",
+                      f"DTEND;TZID={TZID}:{_local(first, orario['alle'])}",
+                      f"RRULE:FREQ=WEEKLY;BYDAY={WEEKDAYS[giorno]};UNTIL={until}",
+                      f"SUMMARY:{_escape(summary)}"]
+            if slot.location:
+                lines.append(f"LOCATION:{_escape(slot.location)}")
+            lines.append(f"DESCRIPTION:{_escape(f'{ora}ª ora - ' + schedule_data['materie'])}")
+            if excluded:
+                lines.append(f"EXDATE;TZID={TZID}:"
+                             + ",".join(_local(d, orario['dalle']) for d in excluded))
+            lines.append("END:VEVENT")
+
+    lines.append("END:VCALENDAR")
+    folded = [part for line in lines for part in _fold(line)]
+    return "\r\n".join(folded) + "\r\n"
+
+
+def ics_cache_key(schedule_data, start=None, end=None):
+    variant = "ics"
+    if start or end:
+        variant += f"-{start or ''}-{end or ''}"
+    return pdf_cache_key(schedule_data, variant)
+
+
+def cached_ics(schedule_data, start=None, end=None, cache=PDF_CACHE):
+    """Feed ICS in byte, rigenerato solo se l'orario è cambiato; (byte, dalla_cache)"""
+    key = ics_cache_key(schedule_data, start, end)
+    data = cache.get(key) if cache is not None else None
+    if data:
+        return data, True
+    data = build_ics(schedule_data, start, end).encode('utf-8')
+    if cache is not None:
+        cache.put(key, data)
+    return data, False
+
+
+def ics_filename(schedule_data):
+    docente = schedule_data['docente']
+    return "orario_" + "".join(c if c.isalnum() else '_' for c in docente) + ".ics"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Esporta l'orario in formato iCalendar")
+    parser.add_argument('config', help="File JSON dell'orario (es. config_orario.json)")
+    parser.add_argument('output', help="File .ics di output")
+    parser.add_argument('--inizio', type=date.fromisoformat, help="Primo giorno di lezione (AAAA-MM-GG)")
+    parser.add_argument('--fine', type=date.fromisoformat, help="Ultimo giorno di lezione (AAAA-MM-GG)")
+    args = parser.parse_args(argv)
+
+    schedule_data = engine.load_config(args.config)
+    if schedule_data is None:
+        print(f"❌ File non trovato: {args.config}")
+        return 1
+    try:
+        text = build_ics(schedule_data, args.inizio, args.fine)
+    except SchoolYearError as e:
+        print(f"❌ {e}")
+        return 1
+    with open(args.output, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    print(f"📅 Calendario scritto in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Cache dei PDF generati, indicizzata sul contenuto dell'orario.
+
+La chiave è l'hash SHA-256 dei dati dell'orario più il formato di stampa
+(standard/tascabile/a4): finché l'orario non cambia, i download successivi
+vengono serviti senza rieseguire ReportLab.
+
+Due livelli:
+- memoria (per processo), LRU con limite in byte ed età massima;
+- disco (condiviso tra processi), con limite in byte ed età massima; oltre
+  il limite vengono rimossi i file usati meno di recente (l'ultimo uso è
+  l'atime, aggiornato a ogni lettura, anche servita dalla memoria; l'età
+  resta quella della scrittura).
+
+La dimensione del disco è un totale aggiornato a ogni scrittura: la cartella
+viene scandita solo oltre il limite o ogni DISK_SCAN_INTERVAL secondi (per i
+file scaduti e quelli scritti da altri processi), non a ogni PDF.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# Da incrementare quando cambia il layout dei PDF, per invalidare la cache
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.environ.get('ORARIO_PDF_CACHE_DIR', '.cache_pdf')
+DEFAULT_MAX_MEMORY_BYTES = 32 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 3600  # secondi
+DISK_SCAN_INTERVAL = 600  # secondi tra due scansioni della cartella
+DISK_TOUCH_INTERVAL = 60  # secondi tra due aggiornamenti dell'atime di un PDF in memoria
+
+
+def _json_default(obj):
+    # ScheduleGrid viene serializzata come il corrispondente JSON
+    if hasattr(obj, 'to_schedule'):
+        return obj.to_schedule()
+    return str(obj)
+
+
+def schedule_hash(schedule_data):
+    """Hash stabile del contenuto dell'orario (indipendente dall'ordine delle chiavi)"""
+    payload = json.dumps(schedule_data, sort_keys=True, ensure_ascii=False, default=_json_default)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def pdf_cache_key(schedule_data, format_type):
+    """Chiave di cache per un orario in un dato formato"""
+    return f"v{CACHE_VERSION}_{format_type}_{schedule_hash(schedule_data)}"
+
+
+class PDFCache:
+    """Cache a due livelli (memoria + disco) per i PDF dell'orario"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR,
+                 max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES,
+                 max_disk_bytes=DEFAULT_MAX_DISK_BYTES,
+                 max_age=DEFAULT_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age = max_age
+        self._memory = OrderedDict()  # chiave -> (timestamp, dati)
+        self._memory_bytes = 0
+        self._touched = {}            # chiave -> ultimo aggiornamento dell'atime su disco
+        self._disk_bytes = None       # byte su disco (None = da calcolare con una scansione)
+        self._disk_scanned = 0.0      # ora dell'ultima scansione della cartella
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # Ai processi di un pool passano solo le impostazioni: memoria e lock sono per processo
+        return {'cache_dir': self.cache_dir, 'max_memory_bytes': self.max_memory_bytes,
+                'max_disk_bytes': self.max_disk_bytes, 'max_age': self.max_age}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    # --- Livello in memoria -------------------------------------------------
+
+    def _memory_get(self, key, now):
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        created, data = entry
+        if now - created >= self.max_age:
+            self._memory_drop(key)
+            return None
+        self._memory.move_to_end(key)
+        return data
+
+    def _memory_put(self, key, data, created):
+        if len(data) > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_drop(key)
+        self._memory[key] = (created, data)
+        self._memory_bytes += len(data)
+        # Eviction LRU finché si rientra nel limite
+        while self._memory_bytes > self.max_memory_bytes:
+            oldest = next(iter(self._memory))
+            self._memory_drop(oldest)
+
+    def _memory_drop(self, key):
+        _, data = self._memory.pop(key)
+        self._memory_bytes -= len(data)
+        self._touched.pop(key, None)
+
+    def _memory_touch(self, key, now):
+        """True se l'atime su disco di un PDF servito dalla memoria va aggiornato"""
+        if not self.cache_dir or now - self._touched.get(key, 0) < DISK_TOUCH_INTERVAL:
+            return False
+        self._touched[key] = now
+        return True
+
+    # --- Livello su disco ---------------------------------------------------
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def _disk_get(self, key, now):
+        if not self.cache_dir:
+            return None, None
+        path = self._disk_path(key)
+        try:
+            mtime = os.path.getmtime(path)
+            if now - mtime >= self.max_age:
+                os.remove(path)
+                return None, None
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None, None
+        self._disk_touch(path, now, mtime)
+        return data, mtime
+
+    @staticmethod
+    def _disk_touch(path, now, mtime=None):
+        """Ultimo uso per l'LRU del disco (l'mtime, cioè l'età, non cambia)"""
+        try:
+            if mtime is None:
+                mtime = os.path.getmtime(path)
+            os.utime(path, (now, mtime))
+        except OSError:
+            pass
+
+    def _disk_put(self, key, data):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Scrittura atomica: altri processi non vedono mai file parziali
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        except OSError:
+            return
+        path = self._disk_path(key)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except OSError:
+            # Disco pieno o cartella rimossa: nessun file temporaneo orfano
+            self._safe_remove(tmp_path)
+            return
+        now = time.time()
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(data) - replaced
+            scan = (self._disk_bytes is None or self._disk_bytes > self.max_disk_bytes
+                    or now - self._disk_scanned >= DISK_SCAN_INTERVAL)
+        if scan:
+            try:
+                self._disk_evict(now)
+            except OSError:
+                pass
+
+    def _disk_evict(self, now):
+        """Rimuove i file scaduti e, se serve, i meno usati di recente oltre il limite in byte"""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if now - stat.st_mtime >= self.max_age:
+                    self._safe_remove(entry.path)
+                    continue
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            self._safe_remove(path)
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+            self._disk_scanned = now
+
+    @staticmethod
+    def _safe_remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # --- API pubblica -------------------------------------------------------
+
+    def get(self, key):
+        """Restituisce i byte del PDF in cache oppure None"""
+        now = time.time()
+        with self._lock:
+            data = self._memory_get(key, now)
+            if data is not None:
+                self.hits += 1
+                touch = self._memory_touch(key, now)
+        if data is not None:
+            if touch:
+                # Anche i PDF serviti dalla memoria contano come usati per l'LRU del disco
+                self._disk_touch(self._disk_path(key), now)
+            return data
+        data, created = self._disk_get(key, now)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._memory_put(key, data, created)
+            if key in self._memory:
+                self._touched[key] = now
+        return data
+
+    def put(self, key, data):
+        """Salva i byte del PDF in entrambi i livelli"""
+        with self._lock:
+            self._memory_put(key, data, time.time())
+        self._disk_put(key, data)
+
+    def clear(self):
+        """Svuota entrambi i livelli"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._touched.clear()
+            self._disk_bytes = None
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.pdf'):
+                    self._safe_remove(os.path.join(self.cache_dir, name))
+
+
+# Istanza condivisa dal processo
+PDF_CACHE = PDFCache()
@@ -0,0 +1,206 @@
+"""
+Coda asincrona per la generazione dei PDF.
+
+La generazione avviene in un pool di worker (processi di default, thread con
+ORARIO_PDF_EXECUTOR=thread): l'interfaccia riceve subito un PDFJob e ne
+controlla lo stato ai rerun successivi. Richieste duplicate per lo stesso
+orario e formato vengono unite in un unico job; i PDF completati finiscono
+nella cache dei PDF.
+
+Con più istituti (tenancy.py) ogni job usa la cache del proprio istituto e
+al massimo tenant.max_pdf_jobs job per istituto sono nei worker: gli altri
+restano "in coda" e partono quando uno di quelli dello stesso istituto
+termina, così un'esportazione di massa non blocca gli altri istituti.
+"""
+
+import copy
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import profiling
+import schedule_engine as engine
+from pdf_cache import PDF_CACHE, pdf_cache_key
+
+# Stati di un job
+IN_CODA = 'in coda'
+IN_CORSO = 'in corso'
+COMPLETATO = 'completato'
+ERRORE = 'errore'
+
+# Per quanto tempo (secondi) un job terminato resta consultabile
+JOB_TTL = 600
+
+
+def _render(schedule_data, format_type):
+    # Eseguita nei worker: solo dati serializzabili in ingresso e in uscita.
+    # Le misure delle fasi tornano al processo principale con il risultato
+    with profiling.REGISTRY.capture() as samples:
+        try:
+            return engine.render_pdf(schedule_data, format_type), None, False, samples
+        except engine.EmptyScheduleError as e:
+            return None, str(e), True, samples
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}", False, samples
+
+
+class PDFJob:
+    """Handle di una generazione PDF in corso o terminata"""
+
+    def __init__(self, key, format_type, tenant_id=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.format_type = format_type
+        self.tenant_id = tenant_id
+        self.status = IN_CODA
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.pdf_data = None
+        self.error = None
+        # True se l'orario non contiene lezioni (non è un vero errore)
+        self.empty = False
+        self.from_cache = False
+        self._done = threading.Event()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Attende la fine del job; restituisce True se terminato"""
+        return self._done.wait(timeout)
+
+    @property
+    def elapsed(self):
+        end = self.finished_at or time.time()
+        return end - self.submitted_at
+
+    def _finish(self, pdf_data=None, error=None, empty=False):
+        self.pdf_data = pdf_data
+        self.error = error
+        self.empty = empty
+        self.status = COMPLETATO if pdf_data else ERRORE
+        self.finished_at = time.time()
+        self._done.set()
+
+
+class PDFJobQueue:
+    """Pool di worker con coalescenza delle richieste per (orario, formato)"""
+
+    def __init__(self, max_workers=None, executor=None, cache=PDF_CACHE):
+        self.cache = cache
+        if executor is None:
+            executor = os.environ.get('ORARIO_PDF_EXECUTOR', 'process')
+        if max_workers is None and os.environ.get('ORARIO_PDF_WORKERS'):
+            max_workers = int(os.environ['ORARIO_PDF_WORKERS'])
+        if executor == 'thread':
+            self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                                thread_name_prefix='pdf-worker')
+            self._remote = False
+        else:
+            # spawn: il server Streamlit è multithread, fork non è sicuro
+            self._executor = ProcessPoolExecutor(max_workers=max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            self._remote = True
+        self._jobs = {}      # id -> PDFJob
+        self._inflight = {}  # (istituto, chiave di cache) -> PDFJob non ancora terminato
+        self._running = {}   # istituto -> job nei worker
+        self._waiting = {}   # istituto -> deque di (job, dati, cache) oltre il limite
+        self._lock = threading.Lock()
+
+    def submit(self, schedule_data, format_type="standard", tenant=None):
+        """Accoda la generazione e restituisce subito il PDFJob"""
+        key = pdf_cache_key(schedule_data, format_type)
+        tenant_id = tenant.id if tenant is not None else None
+        cache = tenant.pdf_cache if tenant is not None else self.cache
+        limit = tenant.max_pdf_jobs if tenant is not None else None
+        # La cache può leggere dal disco: fuori dal lock della coda
+        cached = cache.get(key) if cache is not None else None
+        with self._lock:
+            self._expire()
+            job = None if cached else self._inflight.get((tenant_id, key))
+            if job is not None:
+                return job
+
+            job = PDFJob(key, format_type, tenant_id)
+            self._jobs[job.id] = job
+            if cached:
+                job.from_cache = True
+                job._finish(cached)
+                return job
+            self._inflight[(tenant_id, key)] = job
+            if limit and self._running.get(tenant_id, 0) >= limit:
+                # Limite dell'istituto raggiunto: parte quando se ne libera uno
+                self._waiting.setdefault(tenant_id, deque()).append(
+                    (job, copy.deepcopy(schedule_data), cache))
+                return job
+            self._running[tenant_id] = self._running.get(tenant_id, 0) + 1
+
+        self._start(job, copy.deepcopy(schedule_data), cache)
+        return job
+
+    def _start(self, job, schedule_data, cache):
+        while job is not None:
+            job.status = IN_CORSO
+            job.started_at = time.time()
+            try:
+                future = self._executor.submit(_render, schedule_data, job.format_type)
+            except Exception as e:
+                # Pool rotto o chiuso: il job termina con errore e libera il suo posto,
+                # altrimenti le richieste successive si unirebbero a un job infinito
+                future = Future()
+                future.set_exception(e)
+                job, schedule_data, cache = self._complete(job, cache, future) or (None, None, None)
+                continue
+            future.add_done_callback(lambda f, job=job, cache=cache: self._on_done(job, cache, f))
+            return
+
+    def _on_done(self, job, cache, future):
+        following = self._complete(job, cache, future)
+        if following is not None:
+            self._start(*following)
+
+    def _complete(self, job, cache, future):
+        """Chiude il job e restituisce il prossimo (job, dati, cache) in attesa dell'istituto"""
+        try:
+            pdf_data, error, empty, samples = future.result()
+        except Exception as e:
+            pdf_data, error, empty, samples = None, f"{type(e).__name__}: {e}", False, []
+        if samples and self._remote:
+            # Worker in un altro processo: le misure non sono nel registro locale
+            profiling.REGISTRY.merge(samples)
+        if pdf_data and cache is not None:
+            cache.put(job.key, pdf_data)
+        with self._lock:
+            self._inflight.pop((job.tenant_id, job.key), None)
+            waiting = self._waiting.get(job.tenant_id)
+            following = waiting.popleft() if waiting else None
+            if following is None:
+                self._running[job.tenant_id] -= 1
+            if waiting is not None and not waiting:
+                del self._waiting[job.tenant_id]
+        job._finish(pdf_data, error, empty)
+        return following
+
+    def pending(self, tenant_id=None):
+        """Job dell'istituto in attesa che si liberi un posto"""
+        with self._lock:
+            return len(self._waiting.get(tenant_id, ()))
+
+    def get(self, job_id):
+        """PDFJob per id, None se sconosciuto o scaduto"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _expire(self):
+        now = time.time()
+        for job_id in [j.id for j in self._jobs.values()
+                       if j.done() and now - j.finished_at > JOB_TTL]:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,227 @@
+"""
+Salvataggio incrementale della configurazione dell'orario.
+
+Invece di riscrivere tutto config_orario.json a ogni modifica:
+
+- ChangeTracker raccoglie i campi e gli slot modificati dall'interfaccia;
+- ConfigStore accoda le modifiche come righe JSON compatte in un journal
+  (config_orario.json.journal) e, oltre una soglia, compatta in background
+  journal + snapshot in un nuovo snapshot;
+- lo snapshot viene sempre sostituito in modo atomico (file temporaneo +
+  os.replace), quindi un crash durante la scrittura non lo corrompe mai.
+
+Al caricamento si legge lo snapshot e si riapplicano i record del journal.
+"""
+
+import copy
+import json
+import os
+import tempfile
+import threading
+
+# Numero di record nel journal oltre il quale si compatta
+DEFAULT_COMPACT_THRESHOLD = 200
+
+
+def atomic_write_json(data, path, indent=2):
+    """Scrive un file JSON in modo atomico"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def apply_record(schedule_data, record):
+    """Applica un record del journal ai dati dell'orario"""
+    kind = record['t']
+    if kind == 'set':
+        schedule_data[record['k']] = record['v']
+    elif kind == 'slot':
+        schedule = schedule_data.setdefault('schedule', {})
+        schedule.setdefault(record['g'], {})[record['o']] = record['v']
+    else:
+        raise ValueError(f"Record di journal sconosciuto: {kind}")
+
+
+class ChangeTracker:
+    """Raccoglie le modifiche di una sessione (l'ultimo valore vince)"""
+
+    def __init__(self):
+        self._fields = {}
+        self._slots = {}
+
+    def field(self, key, value):
+        """Segna come modificato un campo di primo livello (docente, orari, ...)"""
+        self._fields[key] = copy.deepcopy(value)
+        if key == 'schedule':
+            # Lo schedule completo sostituisce gli slot modificati prima
+            self._slots.clear()
+
+    def slot(self, giorno, ora, slot):
+        """Segna come modificato uno slot"""
+        self._slots[(giorno, str(ora))] = dict(slot)
+
+    @property
+    def dirty_days(self):
+        """Giorni con slot modificati"""
+        return {giorno for giorno, _ in self._slots}
+
+    def __bool__(self):
+        return bool(self._fields or self._slots)
+
+    def __len__(self):
+        return len(self._fields) + len(self._slots)
+
+    def drain(self):
+        """Restituisce i record in ordine di applicazione e svuota il tracker"""
+        records = [{'t': 'set', 'k': k, 'v': v} for k, v in self._fields.items()]
+        records += [{'t': 'slot', 'g': g, 'o': o, 'v': v} for (g, o), v in self._slots.items()]
+        self._fields.clear()
+        self._slots.clear()
+        return records
+
+
+class ConfigStore:
+    """Snapshot JSON + journal di modifiche per un file di configurazione"""
+
+    def __init__(self, path, compact_threshold=DEFAULT_COMPACT_THRESHOLD):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._compactor = None
+        self._journal_records = self._count_lines(self.journal_path)
+
+    @staticmethod
+    def _count_lines(path):
+        try:
+            with open(path, 'rb') as f:
+                return sum(1 for _ in f)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _read_journal(path):
+        records = []
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Riga troncata da un crash durante l'append: ignorala
+                        continue
+        except OSError:
+            pass
+        return records
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _load_unlocked(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r') as f:
+            schedule_data = json.load(f)
+        for record in self._read_journal(self.journal_path):
+            apply_record(schedule_data, record)
+        return schedule_data
+
+    def load(self):
+        """Snapshot + record del journal, None se non c'è configurazione"""
+        with self._lock:
+            return self._load_unlocked()
+
+    def save_snapshot(self, schedule_data):
+        """Riscrive lo snapshot completo (atomico) e azzera il journal"""
+        with self._lock:
+            atomic_write_json(schedule_data, self.path)
+            self._remove_journal()
+
+    def append(self, records, schedule_data=None):
+        """Accoda i record al journal.
+
+        Se non esiste ancora uno snapshot, viene scritto quello completo
+        (schedule_data) al posto del journal.
+        """
+        if not records:
+            return
+        if not self.exists():
+            if schedule_data is not None:
+                self.save_snapshot(schedule_data)
+            return
+        payload = ''.join(json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n'
+                          for r in records)
+        with self._lock:
+            with open(self.journal_path, 'a+') as f:
+                # Se un crash ha lasciato una riga troncata, non accodarle il nuovo record
+                if f.tell() > 0:
+                    f.seek(f.tell() - 1)
+                    if f.read(1) != '\n':
+                        payload = '\n' + payload
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_records += len(records)
+            should_compact = self._journal_records >= self.compact_threshold
+        if should_compact:
+            self.compact_async()
+
+    def flush(self, tracker, schedule_data=None):
+        """Accoda le modifiche raccolte da un ChangeTracker"""
+        self.append(tracker.drain(), schedule_data)
+
+    def _remove_journal(self):
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._journal_records = 0
+
+    def compact(self):
+        """Fonde journal e snapshot in un nuovo snapshot atomico.
+
+        Un crash tra la scrittura dello snapshot e la rimozione del journal
+        non fa danni: i record sono valori assoluti e riapplicarli è idempotente.
+        """
+        with self._lock:
+            if not os.path.exists(self.journal_path):
+                return
+            schedule_data = self._load_unlocked()
+            atomic_write_json(schedule_data, self.path)
+            self._remove_journal()
+
+    def compact_async(self):
+        """Avvia la compattazione in un thread in background (se non già attiva)"""
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return self._compactor
+            self._compactor = threading.Thread(target=self.compact, name='config-compactor',
+                                               daemon=True)
+            self._compactor.start()
+            return self._compactor
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path):
+    """ConfigStore condiviso dal processo per un percorso"""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ConfigStore(path)
+        return store
@@ -0,0 +1,167 @@
+"""
+Strumentazione delle fasi di rendering ed export.
+
+Con ORARIO_PROFILE=1 il motore misura le fasi della generazione PDF
+(stili, Paragraph, Table, doc.build) e della visualizzazione a video; ogni
+fase ha un istogramma con bucket fissi, esportabile in JSON o nel formato
+testuale di Prometheus. Senza la variabile stage() restituisce un context
+manager vuoto condiviso e il costo è trascurabile.
+
+profile_call() esegue una singola chiamata sotto cProfile e restituisce il
+file .prof (leggibile con pstats o snakeviz) insieme al riepilogo testuale.
+
+Esempio:
+    with profiling.stage('pdf.build'):
+        doc.build([table])
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import marshal
+import os
+import pstats
+import threading
+import time
+
+ENABLED = os.environ.get('ORARIO_PROFILE', '').lower() in ('1', 'true', 'si', 'on')
+
+# Limiti superiori dei bucket (secondi), come negli istogrammi di Prometheus
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+METRIC_NAME = 'orario_stage_seconds'
+
+_NULL = contextlib.nullcontext()
+
+
+class StageHistogram:
+    """Numero, somma, minimo, massimo e bucket cumulativi delle durate di una fase"""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min or 0.0,
+            'max': self.max,
+            'buckets': dict(zip((str(b) for b in BUCKETS), self.buckets)),
+        }
+
+
+class StageRegistry:
+    """Istogrammi per fase, condivisi dai thread del processo"""
+
+    def __init__(self):
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record(self, name, seconds):
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                histogram = self._stages[name] = StageHistogram()
+            histogram.observe(seconds)
+        samples = getattr(self._local, 'samples', None)
+        if samples is not None:
+            samples.append((name, seconds))
+
+    def merge(self, samples):
+        """Aggiunge le misure raccolte in un altro processo (worker dei PDF)"""
+        for name, seconds in samples:
+            self.record(name, seconds)
+
+    @contextlib.contextmanager
+    def capture(self):
+        """Raccoglie anche in una lista le misure del thread corrente"""
+        previous = getattr(self._local, 'samples', None)
+        samples = self._local.samples = []
+        try:
+            yield samples
+        finally:
+            self._local.samples = previous
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def snapshot(self):
+        """{fase: statistiche} ordinato per nome"""
+        with self._lock:
+            return {name: self._stages[name].to_dict() for name in sorted(self._stages)}
+
+    def to_json(self):
+        return json.dumps({'enabled': ENABLED, 'stages': self.snapshot()}, indent=2)
+
+    def to_prometheus(self):
+        """Istogrammi nel formato di esposizione testuale di Prometheus"""
+        lines = [f"# HELP {METRIC_NAME} Durata delle fasi di rendering ed export",
+                 f"# TYPE {METRIC_NAME} histogram"]
+        for name, stats in self.snapshot().items():
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            for bound, count in stats['buckets'].items():
+                lines.append(f'{METRIC_NAME}_bucket{{stage="{label}",le="{bound}"}} {count}')
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{label}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{label}"}} {stats["sum"]:.6f}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{label}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = StageRegistry()
+
+
+@contextlib.contextmanager
+def _timed(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.record(name, time.perf_counter() - start)
+
+
+def stage(name):
+    """Context manager che misura una fase (vuoto se la profilazione è spenta)"""
+    if not ENABLED:
+        return _NULL
+    return _timed(name)
+
+
+def enable(flag=True):
+    """Attiva o disattiva la profilazione nel processo corrente"""
+    global ENABLED
+    ENABLED = bool(flag)
+
+
+def profile_call(func, *args, limit=25, **kwargs):
+    """
+    Esegue func sotto cProfile; restituisce (risultato, byte .prof, riepilogo).
+
+    I byte .prof hanno lo stesso formato di Profile.dump_stats().
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    profiler.create_stats()
+    # Prima di pstats.Stats, che svuota profiler.stats
+    prof_data = marshal.dumps(profiler.stats)
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+    return result, prof_data, stream.getvalue()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Differenze tra due versioni degli orari e feed delle modifiche.
+
+Una versione è l'insieme degli orari di uno o più docenti, letta da:
+
+- un file di configurazione (config_orario.json, con il suo journal);
+- un archivio (SQLite o cartella JSON);
+- un'istantanea dell'archivio salvata con --salva (file JSON con tutti gli
+  orari, da confrontare in seguito con l'archivio modificato).
+
+diff_versions() confronta i docenti con la stessa chiave (istituto, anno
+scolastico, docente) slot per slot: il costo è lineare nel numero di slot.
+La chiave permette di confrontare fonti diverse (un file di configurazione non
+ha l'id del record), quindi due record con la stessa chiave nella stessa
+versione sono un errore (DuplicateTeacherError), non un docente che sparisce.
+change_feed() trasforma le differenze nell'elenco di ciò che va rigenerato:
+docenti e giorni modificati, PDF da ristampare per formato (il tascabile non
+riporta materie, istituto e anno, quindi non cambia se cambiano solo
+quelli), classi, aule e piani le cui viste sono cambiate.
+
+Esempi:
+    python schedule_diff.py orari.db --salva foto_settembre.json
+    python schedule_diff.py foto_settembre.json orari.db
+    python schedule_diff.py foto_settembre.json orari.db --feed modifiche.json
+    python schedule_diff.py vecchio/config_orario.json config_orario.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import namedtuple
+from datetime import datetime
+
+import schedule_engine as engine
+from config_schema import VERSION_KEY, normalize_config
+from persistence import atomic_write_json, get_store
+from schedule_model import as_grid
+from storage import teacher_key
+from conflicts import class_key, room_key
+from views import AULA, CLASSE, PIANO, VIEW_KINDS, floor_key
+
+SNAPSHOT_KEY = 'versione_istantanea'
+SNAPSHOT_VERSION = 1
+
+# Stato di un docente tra le due versioni
+AGGIUNTO = 'aggiunto'
+RIMOSSO = 'rimosso'
+MODIFICATO = 'modificato'
+
+# Campi (oltre agli slot) che compaiono nei PDF di ciascun formato
+_LAYOUT_FIELDS = ('docente', 'giorni_settimana', 'giorno_libero', 'include_giorno_libero',
+                  'ore_attive', 'orari')
+PDF_FIELDS = {
+    'tascabile': _LAYOUT_FIELDS,
+    'standard': _LAYOUT_FIELDS + ('materie', 'istituto', 'anno_scolastico'),
+    'a4': _LAYOUT_FIELDS + ('materie', 'istituto', 'anno_scolastico'),
+}
+
+
+
+class DuplicateTeacherError(ValueError):
+    """Due orari della stessa versione hanno la stessa chiave docente"""
+
+
+SlotChange = namedtuple('SlotChange', ['giorno', 'ora', 'prima', 'dopo'])
+FieldChange = namedtuple('FieldChange', ['campo', 'prima', 'dopo'])
+TeacherDiff = namedtuple('TeacherDiff', ['chiave', 'stato', 'campi', 'slot', 'prima', 'dopo'])
+
+
+# --- Differenze -----------------------------------------------------------------
+
+def _position_order(position):
+    giorno, ora = position
+    day = engine.GIORNI.index(giorno) if giorno in engine.GIORNI else len(engine.GIORNI)
+    return (day, giorno, int(ora) if ora.isdigit() else 0, ora)
+
+
+def diff_slots(old_schedule, new_schedule):
+    """
+    SlotChange (prima/dopo: Slot, None se assente) per ogni ora cambiata tra
+    due orari (JSON o ScheduleGrid), ordinati per giorno e ora.
+    """
+    old = {(giorno, ora): slot for giorno, ora, slot in as_grid(old_schedule).iter_slots()}
+    changes = []
+    for giorno, ora, slot in as_grid(new_schedule).iter_slots():
+        # Gli Slot sono condivisi: stesso contenuto → stesso oggetto
+        previous = old.pop((giorno, ora), None)
+        if previous is not slot and not (_is_blank(previous) and _is_blank(slot)):
+            changes.append(SlotChange(giorno, ora, previous, slot))
+    for (giorno, ora), previous in old.items():
+        if not _is_blank(previous):
+            changes.append(SlotChange(giorno, ora, previous, None))
+    changes.sort(key=lambda c: _position_order((c.giorno, c.ora)))
+    return changes
+
+
+def _is_blank(slot):
+    # Uno slot vuoto equivale a uno slot assente
+    return slot is None or not any(slot.astuple())
+
+
+def diff_fields(old_data, new_data):
+    """FieldChange per i campi di primo livello (escluso l'orario) che sono cambiati"""
+    changes = []
+    for campo in sorted((set(old_data) | set(new_data)) - {'schedule', VERSION_KEY}):
+        prima, dopo = old_data.get(campo), new_data.get(campo)
+        if prima != dopo:
+            changes.append(FieldChange(campo, prima, dopo))
+    return changes
+
+
+def diff_schedule_data(old_data, new_data):
+    """(campi cambiati, slot cambiati) tra due versioni dell'orario di un docente"""
+    return diff_fields(old_data, new_data), diff_slots(old_data['schedule'], new_data['schedule'])
+
+
+def diff_versions(old_version, new_version):
+    """
+    TeacherDiff dei docenti aggiunti, rimossi o modificati tra due versioni
+    ({chiave docente: schedule_data}), ordinati per chiave.
+    """
+    diffs = []
+    for key in sorted(set(old_version) | set(new_version)):
+        prima, dopo = old_version.get(key), new_version.get(key)
+        if prima is None:
+            stato, campi = AGGIUNTO, []
+            slot = diff_slots({}, dopo['schedule'])
+        elif dopo is None:
+            stato, campi = RIMOSSO, []
+            slot = diff_slots(prima['schedule'], {})
+        else:
+            campi, slot = diff_schedule_data(prima, dopo)
+            if not campi and not slot:
+                continue
+            stato = MODIFICATO
+        diffs.append(TeacherDiff(key, stato, campi, slot, prima, dopo))
+    return diffs
+
+
+# --- Feed delle modifiche -------------------------------------------------------
+
+def _visible(schedule_data, giorno, ora):
+    """True se l'ora compare nelle tabelle e nei PDF del docente"""
+    return (schedule_data is not None and giorno in engine.active_days(schedule_data)
+            and int(ora) in schedule_data['ore_attive'])
+
+
+def _pdf_formats(diff):
+    """Formati PDF del docente da ristampare"""
+    if diff.stato == RIMOSSO:
+        return []
+    if diff.stato == AGGIUNTO:
+        return list(engine.PDF_FORMATS)
+    campi = {c.campo for c in diff.campi}
+    slot_visible = any(_visible(diff.prima, c.giorno, c.ora) or _visible(diff.dopo, c.giorno, c.ora)
+                       for c in diff.slot)
+    return [format_type for format_type in engine.PDF_FORMATS
+            if slot_visible or campi & set(PDF_FIELDS.get(format_type, _LAYOUT_FIELDS))]
+
+
+def _view_keys(slot):
+    if slot is None or not slot.is_lesson:
+        return []
+    keys = [(CLASSE, class_key(slot), slot.classe.strip()),
+            (AULA, room_key(slot), ' '.join(p for p in (slot.edificio, slot.aula) if p)),
+            (PIANO, floor_key(slot), ' '.join(p for p in (slot.edificio, slot.piano) if p))]
+    return [(kind, key, label) for kind, key, label in keys if key is not None]
+
+
+def change_feed(diffs):
+    """
+    Elenco (serializzabile in JSON) di ciò che le modifiche rendono obsoleto:
+    docenti con i giorni e i formati PDF da rigenerare, classi, aule e piani.
+    """
+    docenti = []
+    views = {kind: {} for kind in VIEW_KINDS}
+    pdf_count = 0
+    for diff in diffs:
+        istituto, anno_scolastico, docente = diff.chiave
+        layout = diff.stato != MODIFICATO or any(c.campo in _LAYOUT_FIELDS for c in diff.campi)
+        if layout:
+            days = engine.active_days(diff.dopo or diff.prima)
+        else:
+            days = sorted({c.giorno for c in diff.slot}, key=lambda g: _position_order((g, '0')))
+        formats = _pdf_formats(diff)
+        pdf_count += len(formats)
+        docenti.append({
+            'docente': docente,
+            'istituto': istituto,
+            'anno_scolastico': anno_scolastico,
+            'stato': diff.stato,
+            'giorni': days,
+            'pdf': formats,
+            'campi': [c.campo for c in diff.campi],
+            'slot': [{'giorno': c.giorno, 'ora': c.ora,
+                      'prima': c.prima.to_dict() if c.prima is not None else None,
+                      'dopo': c.dopo.to_dict() if c.dopo is not None else None}
+                     for c in diff.slot],
+        })
+        for change in diff.slot:
+            for slot in (change.prima, change.dopo):
+                for kind, key, label in _view_keys(slot):
+                    views[kind].setdefault((istituto, anno_scolastico, key), label)
+
+    feed = {'docenti': docenti}
+    for kind, name in ((CLASSE, 'classi'), (AULA, 'aule'), (PIANO, 'piani')):
+        feed[name] = [{'istituto': scope[0], 'anno_scolastico': scope[1], 'nome': label}
+                      for scope, label in sorted(views[kind].items())]
+    feed['riepilogo'] = {'docenti': len(docenti),
+                         'slot': sum(len(d['slot']) for d in docenti),
+                         'pdf': pdf_count}
+    return feed
+
+
+def format_slot_change(change):
+    """Descrizione leggibile di uno slot cambiato"""
+    def describe(slot):
+        if _is_blank(slot):
+            return "—"
+        return ' '.join(p for p in (slot.classe, slot.location) if p)
+    return f"{change.giorno} {change.ora}ª ora: {describe(change.prima)} → {describe(change.dopo)}"
+
+
+# --- Versioni -------------------------------------------------------------------
+
+def _add_teacher(version, origins, schedule_data, origin):
+    # origins: chiave -> provenienza dell'orario (per il messaggio d'errore)
+    key = teacher_key(schedule_data)
+    if key in version:
+        istituto, anno_scolastico, docente = key
+        raise DuplicateTeacherError(f"{docente} ({istituto}, {anno_scolastico}) compare due volte: "
+                                    f"{origins[key]} e {origin}")
+    version[key] = schedule_data
+    origins[key] = origin
+
+
+def version_from_storage(storage, istituto=None, anno_scolastico=None):
+    """
+    {chiave docente: schedule_data} di un archivio; solleva DuplicateTeacherError
+    se due record hanno la stessa chiave.
+    """
+    version, origins = {}, {}
+    for record in storage.list_teachers(istituto, anno_scolastico):
+        schedule_data = storage.load(record['id'])
+        if schedule_data is not None:
+            _add_teacher(version, origins, schedule_data, f"record {record['id']}")
+    return version
+
+
+def load_version(location):
+    """
+    Versione da un archivio (.db o cartella), da un'istantanea salvata con
+    save_snapshot o da un file di configurazione (snapshot + journal).
+    """
+    if os.path.isdir(location) or location.endswith(('.db', '.sqlite', '.sqlite3')):
+        from storage import open_storage
+        return version_from_storage(open_storage(location))
+    with open(location, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and SNAPSHOT_KEY in data:
+        version, origins = {}, {}
+        for position, schedule_data in enumerate(data['orari'], start=1):
+            _add_teacher(version, origins, normalize_config(schedule_data), f"orario n. {position}")
+        return version
+    # File di configurazione: lo snapshot più le modifiche del journal
+    schedule_data = normalize_config(get_store(location).load())
+    return {teacher_key(schedule_data): schedule_data}
+
+
+def save_snapshot(version, path):
+    """Salva una versione come istantanea JSON (atomica)"""
+    atomic_write_json({SNAPSHOT_KEY: SNAPSHOT_VERSION,
+                       'creata': datetime.now().isoformat(timespec='seconds'),
+                       'orari': [version[key] for key in sorted(version)]}, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Differenze tra due versioni degli orari")
+    parser.add_argument('prima', help="Archivio, istantanea o file di configurazione")
+    parser.add_argument('dopo', nargs='?', help="Versione da confrontare con la prima")
+    parser.add_argument('--salva', help="Salva la prima versione come istantanea in questo file")
+    parser.add_argument('--feed', help="Scrive il feed delle modifiche (JSON) in questo file")
+    args = parser.parse_args(argv)
+
+    try:
+        old_version = load_version(args.prima)
+        new_version = load_version(args.dopo) if args.dopo else None
+    except DuplicateTeacherError as e:
+        print(f"❌ {e}")
+        return 1
+    if args.salva:
+        save_snapshot(old_version, args.salva)
+        print(f"📸 Istantanea di {len(old_version)} orari salvata in {args.salva}")
+        if not args.dopo:
+            return 0
+    if not args.dopo:
+        parser.error("indicare la versione da confrontare (o --salva)")
+
+    diffs = diff_versions(old_version, new_version)
+    feed = change_feed(diffs)
+    for diff, item in zip(diffs, feed['docenti']):
+        print(f"👤 {item['docente']} ({item['anno_scolastico']}) — {item['stato']}")
+        for campo in diff.campi:
+            print(f"   ✏️ {campo.campo}: {campo.prima!r} → {campo.dopo!r}")
+        for change in diff.slot:
+            print(f"   🔄 {format_slot_change(change)}")
+        if item['pdf']:
+            print(f"   🖨️ PDF da ristampare: {', '.join(item['pdf'])}")
+    summary = feed['riepilogo']
+    print("=" * 40)
+    print(f"📊 {summary['docenti']} docenti, {summary['slot']} ore cambiate, "
+          f"{summary['pdf']} PDF da ristampare; {len(feed['classi'])} classi, "
+          f"{len(feed['aule'])} aule, {len(feed['piani'])} piani coinvolti")
+    if args.feed:
+        atomic_write_json(feed, args.feed)
+        print(f"📝 Feed scritto in {args.feed}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
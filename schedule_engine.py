@@ -0,0 +1,513 @@
+"""
+Motore di rendering dell'orario, indipendente da Streamlit.
+
+Tutte le funzioni ricevono i dati dell'orario (lo stesso dizionario salvato
+in config_orario.json) e restituiscono righe di tabella, Markdown o byte PDF.
+Può essere importato da worker, job batch e benchmark senza avviare
+l'interfaccia.
+"""
+
+import functools
+import html
+import io
+import json
+import os
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+
+# Solo le dimensioni di pagina: il resto di ReportLab (platypus, stili) viene
+# importato alla prima generazione di un PDF
+from reportlab.lib.pagesizes import landscape, A7, A4
+
+import profiling
+from persistence import atomic_write_json
+from pdf_cache import PDF_CACHE, pdf_cache_key, schedule_hash
+from schedule_model import as_grid
+
+# Costanti
+ISTITUTO_DEFAULT = 'Liceo Scientifico "E. Fermi" Ragusa'
+DOCENTE_DEFAULT = 'Cristina Bellina Terra'
+MATERIE_DEFAULT = 'Matematica e Fisica'
+ANNO_SCOLASTICO_DEFAULT = '2025/2026'
+CONFIG_PATH = 'config_orario.json'
+
+GIORNI = ['LUN', 'MAR', 'MER', 'GIO', 'VEN', 'SAB', 'DOM']
+
+DEFAULT_ORARI = {
+    '1': {'dalle': '08:15', 'alle': '09:15'},
+    '2': {'dalle': '09:15', 'alle': '10:15'},
+    '3': {'dalle': '10:15', 'alle': '11:15'},
+    '4': {'dalle': '11:15', 'alle': '12:15'},
+    '5': {'dalle': '12:15', 'alle': '13:15'},
+    '6': {'dalle': '13:15', 'alle': '14:15'}
+}
+
+# Numero massimo di tabelle memorizzate da cached_table
+TABLE_CACHE_SIZE = 256
+
+# Impostazioni di pagina per i formati PDF
+PDF_FORMATS = {
+    'tascabile': {
+        'pagesize': landscape(A7),
+        'margins': 2,
+        'font_size': 5.5,
+        'leading': 6.0,
+        'day_col_width': 35,
+        'hour_col_width': 45,
+    },
+    'a4': {
+        'pagesize': A4,
+        'margins': 20,
+        'font_size': 10,
+        'leading': 12,
+        'day_col_width': 80,
+        'hour_col_width': 110,
+    },
+    'standard': {
+        'pagesize': landscape(A4),
+        'margins': 15,
+        'font_size': 8,
+        'leading': 10,
+        'day_col_width': 80,
+        'hour_col_width': 110,
+    },
+}
+
+
+class PDFGenerationError(Exception):
+    """Errore durante la generazione del PDF"""
+
+
+class EmptyScheduleError(PDFGenerationError):
+    """L'orario non contiene lezioni da stampare"""
+
+
+# --- Dati ---------------------------------------------------------------------
+
+SLOT_FIELDS = ('classe', 'edificio', 'piano', 'aula')
+
+
+def empty_slot():
+    """Slot vuoto di un'ora"""
+    return {'classe': '', 'edificio': '', 'piano': '', 'aula': ''}
+
+
+def day_rows(schedule_data, giorno):
+    """Slot delle ore attive di un giorno, nell'ordine delle ore (per l'editor a griglia)"""
+    day = schedule_data.get('schedule', {}).get(giorno, {})
+    return [{field: day.get(str(ora), {}).get(field, '') for field in SLOT_FIELDS}
+            for ora in schedule_data['ore_attive']]
+
+
+def changed_slots(schedule_data, giorno, rows):
+    """
+    Confronta le righe modificate nell'editor con l'orario del giorno e
+    restituisce {ora: nuovo slot} solo per le ore che sono cambiate.
+    Le celle svuotate (None/NaN) diventano stringhe vuote.
+    """
+    day = schedule_data.get('schedule', {}).get(giorno, {})
+    changes = {}
+    for ora, row in zip(schedule_data['ore_attive'], rows):
+        slot = {field: row.get(field) if isinstance(row.get(field), str) else ''
+                for field in SLOT_FIELDS}
+        if slot != day.get(str(ora)):
+            changes[str(ora)] = slot
+    return changes
+
+
+def default_schedule_data():
+    """Configurazione di default per un nuovo docente"""
+    return {
+        'docente': DOCENTE_DEFAULT,
+        'materie': MATERIE_DEFAULT,
+        'istituto': ISTITUTO_DEFAULT,
+        'anno_scolastico': ANNO_SCOLASTICO_DEFAULT,
+        'giorni_settimana': ['LUN', 'MAR', 'MER', 'GIO', 'VEN', 'SAB'],
+        'giorno_libero': 'DOM',
+        'include_giorno_libero': False,
+        'ore_giornaliere': 6,
+        'ore_attive': [1, 2, 3, 4, 5, 6],
+        'orari': {ora: dict(times) for ora, times in DEFAULT_ORARI.items()},
+        'schedule': {}
+    }
+
+
+def example_schedule():
+    """Orario di esempio"""
+    return {
+        'LUN': {
+            '1': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''},
+            '2': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''},
+            '3': {'classe': '2Esa', 'edificio': 'MB', 'piano': 'PT', 'aula': 'A15'},
+            '4': {'classe': '1Dsa', 'edificio': 'MA', 'piano': 'PT', 'aula': 'A1'},
+            '5': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''},
+            '6': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''}
+        },
+        'MAR': {
+            '1': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
+            '2': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
+            '3': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
+            '4': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
+            '5': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
+            '6': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''}
+        },
+        'MER': {
+            '1': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
+            '2': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
+            '3': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
+            '4': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''},
+            '5': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''},
+            '6': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''}
+        },
+        'GIO': {
+            '1': {'classe': '1Bsa', 'edificio': 'MB', 'piano': 'PT', 'aula': 'A16'},
+            '2': {'classe': '—', 'edificio': '', 'piano': '', 'aula': ''},
+            '3': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
+            '4': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
+            '5': {'classe': '1Asa', 'edificio': 'MA', 'piano': '2P', 'aula': 'A20'},
+            '6': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''}
+        },
+        'VEN': {
+            '1': {'classe': '1Dsa', 'edificio': 'MA', 'piano': 'PT', 'aula': 'A1'},
+            '2': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
+            '3': {'classe': '2Esa', 'edificio': 'MB', 'piano': 'PT', 'aula': 'A15'},
+            '4': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
+            '5': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
+            '6': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''}
+        },
+        'SAB': {
+            '1': {'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'},
+            '2': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
+            '3': {'classe': '1Bsa', 'edificio': 'MB', 'piano': 'PT', 'aula': 'A13'},
+            '4': {'classe': '1Asa', 'edificio': 'MA', 'piano': '2P', 'aula': 'A20'},
+            '5': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''},
+            '6': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''}
+        }
+    }
+
+
+def load_config(path=CONFIG_PATH):
+    """Carica e normalizza la configurazione salvata, None se il file non esiste"""
+    from config_schema import normalize_config
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return normalize_config(json.load(f))
+
+
+def save_config(schedule_data, path=CONFIG_PATH):
+    """Salva la configurazione su file JSON (sostituzione atomica)"""
+    atomic_write_json(schedule_data, path)
+
+
+def active_days(schedule_data):
+    """Giorni da visualizzare/stampare (escluso il giorno libero se non incluso)"""
+    return [g for g in schedule_data['giorni_settimana']
+            if g != schedule_data['giorno_libero'] or schedule_data['include_giorno_libero']]
+
+
+def slot_times(orari, ore):
+    """Stringhe "dalle-alle" per le ore richieste (configurazione normalizzata)"""
+    return [f"{orari[str(ora)]['dalle']}-{orari[str(ora)]['alle']}" for ora in ore]
+
+
+# --- Tabelle a video ------------------------------------------------------------
+
+def format_cell(slot, time_str, format_type="Standard"):
+    """Testo di una cella per la visualizzazione (Standard/Compatto/Tascabile)"""
+    if not slot.is_lesson:
+        return slot.classe
+
+    location = slot.location
+    if format_type == "Tascabile":
+        # Formato compatto per stampa tascabile
+        text = f"{time_str} {slot.classe}"
+        if location:
+            text += f" {location}"
+    elif format_type == "Compatto":
+        # Formato compatto per visualizzazione
+        text = f"**{time_str}** {slot.classe}"
+        if location:
+            text += f" 📍{location}"
+    else:
+        # Formato standard
+        text = f"**{time_str}**\n{slot.classe}"
+        if location:
+            text += f"\n📍 {location}"
+    return text
+
+
+def build_table_rows(schedule_data, show_empty=False, format_type="Standard"):
+    """
+    Restituisce (header, righe) della tabella settimanale.
+
+    Con i dati di compact_schedule_data la griglia viene riusata invece di
+    essere ricostruita dal JSON a ogni chiamata.
+    """
+    grid = as_grid(schedule_data.get('schedule'))
+    ore_attive = schedule_data['ore_attive']
+    times = slot_times(schedule_data['orari'], ore_attive)
+
+    header = ["Giorno"] + [f"{i}ª" for i in ore_attive]
+
+    data_rows = []
+    for giorno in active_days(schedule_data):
+        row = [giorno]
+        for slot, time_str in zip(grid.row(giorno, ore_attive), times):
+            if slot is not None and (slot.classe or show_empty):
+                row.append(format_cell(slot, time_str, format_type))
+            else:
+                row.append('')
+        data_rows.append(row)
+
+    return header, data_rows
+
+
+def build_markdown_table(header, data_rows):
+    """Tabella Markdown con i ritorni a capo convertiti in <br/>"""
+    lines = ["| " + " | ".join(header) + " |",
+             "| " + " | ".join(["---"] * len(header)) + " |"]
+    for row in data_rows:
+        lines.append("| " + " | ".join(cell.replace('\n', '<br/>') for cell in row) + " |")
+    return "\n".join(lines) + "\n"
+
+
+_BOLD = re.compile(r'\*\*(.+?)\*\*')
+
+
+def build_html_table(header, data_rows):
+    """Tabella HTML con il grassetto Markdown (**...**) e i ritorni a capo convertiti"""
+    def cell(text):
+        return _BOLD.sub(r'<b>\1</b>', html.escape(text)).replace('\n', '<br/>')
+
+    lines = ["<table>", "<thead><tr>" + "".join(f"<th>{cell(h)}</th>" for h in header) + "</tr></thead>",
+             "<tbody>"]
+    for row in data_rows:
+        lines.append("<tr>" + "".join(f"<td>{cell(c)}</td>" for c in row) + "</tr>")
+    lines.append("</tbody></table>")
+    return "\n".join(lines) + "\n"
+
+
+_table_cache = OrderedDict()  # (hash, formato, show_empty) -> (header, righe, markdown)
+_table_cache_lock = threading.Lock()
+
+
+def cached_table(schedule_data, show_empty=False, format_type="Standard", content_hash=None):
+    """Come build_table_rows + build_markdown_table, con memoizzazione.
+
+    La chiave è (hash del contenuto, formato, show_empty): i rerun che non
+    modificano l'orario riusano celle formattate e Markdown. Restituisce
+    (header, righe, markdown) come tuple da non modificare.
+    """
+    if content_hash is None:
+        content_hash = schedule_hash(schedule_data)
+    key = (content_hash, format_type, bool(show_empty))
+    with _table_cache_lock:
+        entry = _table_cache.get(key)
+        if entry is not None:
+            _table_cache.move_to_end(key)
+            return entry
+
+    with profiling.stage('display.table'):
+        header, data_rows = build_table_rows(schedule_data, show_empty, format_type)
+        entry = (tuple(header), tuple(tuple(row) for row in data_rows),
+                 build_markdown_table(header, data_rows))
+    with _table_cache_lock:
+        _table_cache[key] = entry
+        while len(_table_cache) > TABLE_CACHE_SIZE:
+            _table_cache.popitem(last=False)
+    return entry
+
+
+def invalidate_table_cache(content_hash=None):
+    """Rimuove le tabelle memorizzate per un hash (o tutte se None)"""
+    with _table_cache_lock:
+        if content_hash is None:
+            _table_cache.clear()
+            return
+        for key in [k for k in _table_cache if k[0] == content_hash]:
+            del _table_cache[key]
+
+
+# --- PDF ------------------------------------------------------------------------
+
+# Stili di un formato: corpo delle celle, intestazione e titolo
+PDFStyles = namedtuple('PDFStyles', ['body', 'header', 'title', 'table'])
+
+
+@functools.lru_cache(maxsize=None)
+def pdf_styles(format_type):
+    """Stili ReportLab precalcolati per un formato, creati una volta per processo.
+
+    Sono condivisi tra tutte le esportazioni e non vanno modificati: ogni
+    formato ha i propri oggetti, quindi un'esportazione tascabile non cambia
+    più i font di quella successiva in A4.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+
+    if format_type not in PDF_FORMATS:
+        format_type = 'standard'
+    settings = PDF_FORMATS[format_type]
+    font_size = settings['font_size']
+    tascabile = format_type == "tascabile"
+    sample = getSampleStyleSheet()
+
+    # Celle e intestazione condividono lo stesso stile centrato
+    body = ParagraphStyle(f"orario_{format_type}_body", parent=sample["Normal"],
+                          fontSize=font_size, leading=settings['leading'],
+                          alignment=1)  # CENTER
+    title = ParagraphStyle(f"orario_{format_type}_title", parent=sample["Title"],
+                           fontSize=font_size + (1 if tascabile else 2),
+                           alignment=1)  # CENTER
+
+    # I comandi usano indici negativi: valgono per qualunque numero di ore
+    commands = [
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),  # Centratura verticale
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),   # Centratura orizzontale
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ]
+    # Unisci le righe del titolo su tutte le colonne
+    for r in range(title_row_count(format_type)):
+        commands.append(("SPAN", (0, r), (-1, r)))
+    if not tascabile:
+        commands.append(("FONTSIZE", (0, 0), (-1, -1), font_size))
+
+    return PDFStyles(body=body, header=body, title=title, table=TableStyle(commands))
+
+
+def title_row_count(format_type):
+    """Righe di intestazione (titolo, docente, ...) sopra la riga delle ore"""
+    return 1 if format_type == "tascabile" else 6
+
+
+def pdf_cell_text(slot, time_str, format_type):
+    """Markup ReportLab di una cella del PDF"""
+    if not slot.is_lesson:
+        return slot.classe
+
+    location = slot.location
+    if format_type == "tascabile":
+        text = f"{time_str} {slot.classe}"
+        if location:
+            text += f" {location}"
+    else:
+        text = f"<b>{time_str}</b><br/>{slot.classe}"
+        if location:
+            text += f"<br/>{location}"
+    return text
+
+
+def build_pdf_table(schedule_data, format_type="standard"):
+    """
+    Costruisce la Table ReportLab dell'orario; solleva EmptyScheduleError se vuoto.
+
+    Come build_table_rows, riusa la griglia dei dati di compact_schedule_data.
+    """
+    from reportlab.platypus import Table, Paragraph
+
+    if not schedule_data.get('schedule'):
+        raise EmptyScheduleError("Nessun orario configurato")
+
+    settings = PDF_FORMATS.get(format_type, PDF_FORMATS['standard'])
+    ore_attive = schedule_data['ore_attive']
+    grid = as_grid(schedule_data['schedule'])
+    tascabile = format_type == "tascabile"
+
+    # Stili precalcolati del formato (il primo accesso carica getSampleStyleSheet)
+    with profiling.stage('pdf.styles'):
+        styles = pdf_styles(format_type)
+    style = styles.body
+    header_style = styles.header
+    title_style = styles.title
+
+    # Costruzione dei Paragraph (parsing del markup)
+    with profiling.stage('pdf.paragraphs'):
+        docente = schedule_data['docente']
+        padding = [""] * len(ore_attive)
+
+        table_data = []
+        if tascabile:
+            # Per formato tascabile, solo il nome del docente
+            table_data.append([Paragraph(f"<b>{docente}</b>", title_style)] + padding)
+        else:
+            # Per formati più grandi, tutte le informazioni
+            materie = schedule_data['materie']
+            istituto = schedule_data['istituto']
+            anno_scolastico = schedule_data['anno_scolastico']
+            table_data.append([Paragraph("<b>ORARIO SETTIMANALE</b>", title_style)] + padding)
+            table_data.append([Paragraph(f"<b>{docente}</b>", style)] + padding)
+            table_data.append([Paragraph(f"{materie}", style)] + padding)
+            table_data.append([Paragraph(f"{istituto}", style)] + padding)
+            table_data.append([Paragraph(f"A.S. {anno_scolastico}", style)] + padding)
+            table_data.append([""] + padding)  # Riga vuota
+
+        header = ["Giorno"] + [f"{i}ª ora" for i in ore_attive]
+        table_data.append([Paragraph(f"<b>{h}</b>", header_style) for h in header])
+
+        times = slot_times(schedule_data['orari'], ore_attive)
+        has_data = False
+        for giorno in active_days(schedule_data):
+            row = [Paragraph(f"<b>{giorno}</b>", style)]
+            for slot, time_str in zip(grid.row(giorno, ore_attive), times):
+                if slot is None:
+                    row.append(Paragraph("", style))
+                    continue
+                row.append(Paragraph(pdf_cell_text(slot, time_str, format_type), style))
+                has_data = has_data or slot.is_lesson
+            table_data.append(row)
+
+    if not has_data:
+        raise EmptyScheduleError("Nessun dato da stampare nell'orario")
+
+    col_widths = [settings['day_col_width']] + [settings['hour_col_width']] * len(ore_attive)
+    # Solo la creazione dell'oggetto: il layout della Table avviene in doc.build (pdf.build)
+    with profiling.stage('pdf.table_init'):
+        table = Table(table_data, colWidths=col_widths)
+        table.setStyle(styles.table)
+    return table
+
+
+def render_pdf(schedule_data, format_type="standard"):
+    """Genera il PDF dell'orario e ne restituisce i byte"""
+    from reportlab.platypus import SimpleDocTemplate
+
+    settings = PDF_FORMATS.get(format_type, PDF_FORMATS['standard'])
+    table = build_pdf_table(schedule_data, format_type)
+
+    buffer = io.BytesIO()
+    margins = settings['margins']
+    doc = SimpleDocTemplate(buffer, pagesize=settings['pagesize'],
+                            rightMargin=margins, leftMargin=margins,
+                            topMargin=margins, bottomMargin=margins)
+    # Layout della Table (wrap/split, la parte costosa) e scrittura del PDF
+    with profiling.stage('pdf.build'):
+        doc.build([table])
+
+    pdf_data = buffer.getvalue()
+    if not pdf_data:
+        raise PDFGenerationError("PDF generato vuoto")
+    return pdf_data
+
+
+def render_pdf_cached(schedule_data, format_type="standard", cache=PDF_CACHE):
+    """Come render_pdf, ma serve dalla cache se l'orario non è cambiato.
+
+    Restituisce (byte_pdf, dalla_cache).
+    """
+    key = pdf_cache_key(schedule_data, format_type)
+    pdf_data = cache.get(key)
+    if pdf_data:
+        return pdf_data, True
+    pdf_data = render_pdf(schedule_data, format_type)
+    cache.put(key, pdf_data)
+    return pdf_data, False
+
+
+def pdf_filename(format_type):
+    """Nome del file PDF con timestamp"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"orario_docente_{format_type}_{timestamp}.pdf"
@@ -0,0 +1,221 @@
+"""
+Modello compatto dell'orario settimanale.
+
+Il JSON salvato usa dizionari annidati schedule[giorno][str(ora)] con quattro
+stringhe per slot. Qui lo stesso contenuto è rappresentato da:
+
+- Slot: oggetto immutabile con __slots__, condiviso tra tutti gli orari che
+  contengono la stessa combinazione classe/edificio/piano/aula (il pool ha
+  riferimenti deboli: uno slot che nessun orario usa più viene liberato);
+- ScheduleGrid: griglia densa giorni×ore in un'unica lista piatta.
+
+La conversione da/verso il formato JSON è senza perdita: i giorni e le ore
+presenti nel file (anche fuori da ore_attive) vengono conservati.
+"""
+
+import sys
+import threading
+import weakref
+
+SLOT_FIELDS = ('classe', 'edificio', 'piano', 'aula')
+
+# Valori di "classe" che non rappresentano una lezione
+NON_LESSON_MARKERS = ('DISP.', '—', '')
+
+
+class Slot:
+    """Contenuto di un'ora di lezione (immutabile e condiviso)"""
+
+    __slots__ = SLOT_FIELDS + ('__weakref__',)
+
+    _pool = weakref.WeakValueDictionary()
+    _pool_lock = threading.Lock()
+
+    def __new__(cls, classe='', edificio='', piano='', aula=''):
+        key = (classe, edificio, piano, aula)
+        slot = cls._pool.get(key)
+        if slot is None:
+            with cls._pool_lock:
+                # Un solo oggetto per contenuto anche con più thread
+                slot = cls._pool.get(key)
+                if slot is None:
+                    slot = super().__new__(cls)
+                    for field, value in zip(SLOT_FIELDS, key):
+                        object.__setattr__(slot, field, sys.intern(value))
+                    cls._pool[key] = slot
+        return slot
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Slot è immutabile")
+
+    def __reduce__(self):
+        return (Slot, self.astuple())
+
+    def __repr__(self):
+        return f"Slot({self.classe!r}, {self.edificio!r}, {self.piano!r}, {self.aula!r})"
+
+    @classmethod
+    def from_dict(cls, data):
+        """Crea lo slot da un dizionario JSON (campi mancanti = stringa vuota)"""
+        return cls(*(str(data.get(field) or '') for field in SLOT_FIELDS))
+
+    def astuple(self):
+        return (self.classe, self.edificio, self.piano, self.aula)
+
+    def to_dict(self):
+        return dict(zip(SLOT_FIELDS, self.astuple()))
+
+    @property
+    def is_lesson(self):
+        """True se lo slot è una lezione (non vuoto, DISP. o —)"""
+        return self.classe not in NON_LESSON_MARKERS
+
+    @property
+    def location(self):
+        """Edificio, piano e aula separati da spazi (solo le parti presenti)"""
+        return ' '.join([p for p in (self.edificio, self.piano, self.aula) if p])
+
+
+EMPTY_SLOT = Slot()
+
+
+class ScheduleGrid:
+    """Griglia densa giorni×ore; una cella None indica uno slot assente nel JSON"""
+
+    __slots__ = ('days', 'hours', 'cells', '_day_index', '_hour_index')
+
+    def __init__(self, days=(), hours=()):
+        self.days = tuple(days)
+        self.hours = tuple(str(h) for h in hours)
+        self.cells = [None] * (len(self.days) * len(self.hours))
+        self._reindex()
+
+    def _reindex(self):
+        self._day_index = {d: i for i, d in enumerate(self.days)}
+        self._hour_index = {h: i for i, h in enumerate(self.hours)}
+
+    # --- Conversione JSON ---------------------------------------------------
+
+    @classmethod
+    def from_schedule(cls, schedule):
+        """Crea la griglia da schedule[giorno][ora] (ore int o str)"""
+        days = list(schedule)
+        hours = []
+        seen = set()
+        for day in schedule.values():
+            for ora in day:
+                ora = str(ora)
+                if ora not in seen:
+                    seen.add(ora)
+                    hours.append(ora)
+        grid = cls(days, hours)
+        width = len(grid.hours)
+        hour_index = grid._hour_index
+        cells = grid.cells
+        for d, day in enumerate(schedule.values()):
+            base = d * width
+            for ora, slot in day.items():
+                cells[base + hour_index[str(ora)]] = Slot.from_dict(slot)
+        return grid
+
+    def to_schedule(self):
+        """Converte la griglia nel formato JSON schedule[giorno][str(ora)]"""
+        width = len(self.hours)
+        schedule = {}
+        for d, giorno in enumerate(self.days):
+            day = {}
+            for h, ora in enumerate(self.hours):
+                slot = self.cells[d * width + h]
+                if slot is not None:
+                    day[ora] = slot.to_dict()
+            schedule[giorno] = day
+        return schedule
+
+    # --- Accesso ------------------------------------------------------------
+
+    def get(self, giorno, ora):
+        """Slot di un giorno e ora, None se assente"""
+        d = self._day_index.get(giorno)
+        h = self._hour_index.get(str(ora))
+        if d is None or h is None:
+            return None
+        return self.cells[d * len(self.hours) + h]
+
+    def set(self, giorno, ora, slot):
+        """Imposta uno slot, aggiungendo giorno o ora alla griglia se mancano"""
+        ora = str(ora)
+        if giorno not in self._day_index:
+            self.days += (giorno,)
+            self.cells.extend([None] * len(self.hours))
+            self._reindex()
+        if ora not in self._hour_index:
+            width = len(self.hours)
+            cells = []
+            for d in range(len(self.days)):
+                cells.extend(self.cells[d * width:(d + 1) * width])
+                cells.append(None)
+            self.hours += (ora,)
+            self.cells = cells
+            self._reindex()
+        self.cells[self._day_index[giorno] * len(self.hours) + self._hour_index[ora]] = slot
+
+    def row(self, giorno, ore):
+        """Slot (o None) di un giorno per le ore richieste, nell'ordine dato"""
+        d = self._day_index.get(giorno)
+        if d is None:
+            return [None] * len(ore)
+        base = d * len(self.hours)
+        hour_index = self._hour_index
+        cells = self.cells
+        result = []
+        for ora in ore:
+            h = hour_index.get(str(ora))
+            result.append(None if h is None else cells[base + h])
+        return result
+
+    def iter_slots(self):
+        """Genera (giorno, ora, slot) per ogni slot presente"""
+        width = len(self.hours)
+        for i, slot in enumerate(self.cells):
+            if slot is not None:
+                yield self.days[i // width], self.hours[i % width], slot
+
+    def iter_lessons(self):
+        """Genera (giorno, ora, slot) per le sole lezioni"""
+        for giorno, ora, slot in self.iter_slots():
+            if slot.is_lesson:
+                yield giorno, ora, slot
+
+    def __len__(self):
+        return len(self.days)
+
+    def __bool__(self):
+        return bool(self.days)
+
+    def __eq__(self, other):
+        if not isinstance(other, ScheduleGrid):
+            return NotImplemented
+        return self.to_schedule() == other.to_schedule()
+
+
+def as_grid(schedule):
+    """Accetta un orario JSON o una ScheduleGrid e restituisce la griglia"""
+    if isinstance(schedule, ScheduleGrid):
+        return schedule
+    return ScheduleGrid.from_schedule(schedule or {})
+
+
+def compact_schedule_data(schedule_data):
+    """Copia dei dati dell'orario con 'schedule' in forma di ScheduleGrid"""
+    compact = dict(schedule_data)
+    compact['schedule'] = as_grid(schedule_data.get('schedule'))
+    return compact
+
+
+def expand_schedule_data(schedule_data):
+    """Copia dei dati dell'orario con 'schedule' nel formato JSON"""
+    expanded = dict(schedule_data)
+    schedule = schedule_data.get('schedule')
+    if isinstance(schedule, ScheduleGrid):
+        expanded['schedule'] = schedule.to_schedule()
+    return expanded
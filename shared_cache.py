@@ -0,0 +1,190 @@
+"""
+Cache degli orari condivisa da tutte le sessioni del processo.
+
+Cento studenti che aprono l'orario dello stesso docente non devono fare
+cento parse di config_orario.json né tenerne cento copie in memoria:
+
+- SharedScheduleCache carica il file una sola volta e consegna a ogni
+  sessione un ScheduleLease sullo stesso snapshot;
+- lo snapshot è congelato (FrozenDict/FrozenList): le letture sono quelle di
+  un normale dizionario, una scrittura solleva TypeError invece di
+  modificare i dati di tutte le sessioni;
+- quando un utente inizia a modificare, la sessione chiede una copia
+  privata (lease.copy()) e rilascia il lease (copy-on-write);
+- se cambia l'mtime (o la dimensione) del file o del suo journal, il lease
+  successivo punta a un nuovo snapshot; quello vecchio resta valido per chi
+  lo usa ancora e viene liberato quando l'ultimo riferimento è rilasciato.
+
+I lease vengono rilasciati anche dal garbage collector, quindi una sessione
+Streamlit scaduta non tiene in vita uno snapshot vecchio.
+"""
+
+import os
+import threading
+import weakref
+
+_READ_ONLY = "Snapshot condiviso in sola lettura: usare una copia privata per modificarlo"
+
+
+class FrozenDict(dict):
+    """dict in sola lettura; copia, deepcopy e pickle producono un dict normale"""
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(_READ_ONLY)
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class FrozenList(list):
+    """list in sola lettura; copia, deepcopy e pickle producono una list normale"""
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(_READ_ONLY)
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+def freeze(value):
+    """Copia congelata (ricorsiva) di dict e list"""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    """Copia modificabile (ricorsiva) di un valore congelato"""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return value
+
+
+def file_stamp(path):
+    """(mtime_ns, dimensione) del file e del suo journal; None per i file mancanti"""
+    stamp = []
+    for name in (path, path + '.journal'):
+        try:
+            st = os.stat(name)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+class _Snapshot:
+    __slots__ = ('path', 'stamp', 'data', 'refs', '__weakref__')
+
+    def __init__(self, path, stamp, data):
+        self.path = path
+        self.stamp = stamp
+        self.data = data
+        self.refs = 0
+
+
+class ScheduleLease:
+    """Riferimento di una sessione a uno snapshot condiviso"""
+
+    __slots__ = ('_snapshot', '_finalizer', '__weakref__')
+
+    def __init__(self, cache, snapshot):
+        self._snapshot = snapshot
+        self._finalizer = weakref.finalize(self, cache._release, snapshot)
+
+    @property
+    def data(self):
+        """Dati congelati dello snapshot (None se il file non esiste)"""
+        return self._snapshot.data
+
+    @property
+    def stamp(self):
+        return self._snapshot.stamp
+
+    @property
+    def released(self):
+        return not self._finalizer.alive
+
+    def copy(self):
+        """Copia privata e modificabile dei dati (copy-on-write)"""
+        return thaw(self._snapshot.data)
+
+    def release(self):
+        """Rilascia il riferimento (idempotente)"""
+        self._finalizer()
+
+
+class SharedScheduleCache:
+    """Snapshot per percorso con conteggio dei riferimenti e invalidazione per mtime"""
+
+    def __init__(self, loader):
+        # loader(path) -> dati dell'orario o None se il file non esiste
+        self.loader = loader
+        self.loads = 0
+        self.hits = 0
+        self._current = {}   # percorso -> snapshot più recente
+        self._live = set()   # snapshot con riferimenti attivi
+        self._lock = threading.RLock()
+
+    def acquire(self, path):
+        """Lease sullo snapshot aggiornato del file (caricato solo se è cambiato)"""
+        stamp = file_stamp(path)
+        with self._lock:
+            snapshot = self._current.get(path)
+            if snapshot is not None and snapshot.stamp == stamp:
+                self.hits += 1
+            else:
+                data = self.loader(path)
+                snapshot = _Snapshot(path, stamp, freeze(data) if data is not None else None)
+                self._current[path] = snapshot
+                self.loads += 1
+            snapshot.refs += 1
+            self._live.add(snapshot)
+            return ScheduleLease(self, snapshot)
+
+    def is_fresh(self, lease):
+        return lease.stamp == file_stamp(lease._snapshot.path)
+
+    def refresh(self, lease):
+        """Stesso lease se il file non è cambiato, altrimenti un lease sul nuovo snapshot"""
+        if not lease.released and self.is_fresh(lease):
+            return lease
+        new_lease = self.acquire(lease._snapshot.path)
+        lease.release()
+        return new_lease
+
+    def _release(self, snapshot):
+        with self._lock:
+            snapshot.refs -= 1
+            if snapshot.refs <= 0:
+                self._live.discard(snapshot)
+
+    def invalidate(self, path=None):
+        """Dimentica lo snapshot corrente (i lease esistenti restano validi)"""
+        with self._lock:
+            if path is None:
+                self._current.clear()
+            else:
+                self._current.pop(path, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loads': self.loads,
+                'hits': self.hits,
+                'snapshots': len(self._live),
+                'refs': sum(s.refs for s in self._live),
+            }
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Sito statico con gli orari di docenti, classi, aule e piani.
+
+Dall'archivio (SQLite o cartella JSON) genera una cartella di file HTML e
+PDF servibile da qualunque web server o CDN, senza Python a ogni richiesta:
+
+    sito/
+      index.html                  elenco di docenti, classi, aule e piani
+      docenti/rossi.html          tabella Standard
+      docenti/rossi-compatto.html tabella Compatto
+      docenti/rossi-standard.pdf  PDF (uno per formato richiesto)
+      classi/1a.html ...
+      aule/a15-mb-pt.html ...
+      piani/mb-pt.html ...
+      .manifest.json              hash dei dati di ogni pagina
+
+Gli orari di classi, aule e piani sono le viste di ViewIndex (views.py)
+sugli orari dei docenti dello stesso istituto e anno scolastico. Ogni pagina è ricostruita
+solo se l'hash dei suoi dati (o i formati richiesti) è cambiato rispetto
+all'ultima esecuzione; le pagine che non esistono più vengono rimosse e i
+file vengono sostituiti in modo atomico.
+
+Esempio:
+    python static_site.py orari.db sito/ --pdf standard tascabile
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import unicodedata
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import schedule_engine as engine
+from pdf_cache import schedule_hash
+from schedule_model import compact_schedule_data
+from views import VIEW_KINDS, ViewIndex
+
+# Da incrementare quando cambia il layout delle pagine, per rigenerarle tutte
+SITE_VERSION = 1
+
+MANIFEST_FILE = '.manifest.json'
+HTML_FORMATS = ('Standard', 'Compatto')
+
+# Sezioni del sito: tipo di pagina -> (cartella, titolo dell'indice)
+SECTIONS = {
+    'docente': ('docenti', 'Docenti'),
+    'classe': ('classi', 'Classi'),
+    'aula': ('aule', 'Aule'),
+    'piano': ('piani', 'Piani'),
+}
+
+Page = namedtuple('Page', ['id', 'kind', 'title', 'scope', 'schedule_data'])
+BuildReport = namedtuple('BuildReport', ['built', 'skipped', 'removed', 'errors'])
+
+HTML_PAGE = """<!DOCTYPE html>
+<html lang="it">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 1.5em; }}
+nav a {{ margin-right: 1em; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #999; padding: 0.3em 0.6em; text-align: center; vertical-align: middle; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def slugify(text):
+    """Nome di file sicuro per URL: minuscole ASCII, cifre e trattini"""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'pagina'
+
+
+# --- Pagine ---------------------------------------------------------------------
+
+def build_pages(teachers):
+    """
+    Pagine del sito da una lista di (record, schedule_data) dei docenti: una
+    per docente più quelle di classi, aule e piani (viste di ViewIndex).
+    """
+    pages = []
+    scopes = defaultdict(list)
+    for record, schedule_data in sorted(teachers, key=lambda t: (t[1]['docente'], str(t[0]['id']))):
+        scope = (schedule_data['istituto'], schedule_data['anno_scolastico'])
+        docente = schedule_data['docente']
+        pages.append(Page(('docente', scope, docente, record['id']), 'docente', docente, scope, schedule_data))
+        scopes[scope].append((record, schedule_data))
+
+    for scope, records in sorted(scopes.items()):
+        index = ViewIndex.from_records(records, *scope)
+        for kind in VIEW_KINDS:
+            for key in index.keys(kind):
+                pages.append(Page((kind, scope, key), kind, index.label(kind, key), scope,
+                                  index.schedule_data(kind, key)))
+    return pages
+
+
+def page_key(page):
+    """Id della pagina come stringa, per riconoscerla nel manifest"""
+    return json.dumps(page.id, ensure_ascii=False)
+
+
+def _base_path(page):
+    return f"{SECTIONS[page.kind][0]}/{slugify(page.title)}"
+
+
+def assign_paths(pages, previous=None):
+    """
+    Percorso (senza estensione) di ogni pagina, univoco e stabile tra le
+    esecuzioni: una pagina già nel manifest precedente (previous) mantiene il
+    suo percorso, così i suffissi dei titoli uguali ("rossi-2") non cambiano
+    quando si aggiungono o si tolgono altre pagine.
+    """
+    known = {entry['id']: path for path, entry in (previous or {}).items() if 'id' in entry}
+    paths = {}
+    used = set()
+    for page in pages:
+        path = known.get(page_key(page))
+        base = _base_path(page)
+        if path is not None and path not in used and re.fullmatch(re.escape(base) + r'(-\d+)?', path):
+            paths[page.id] = path
+            used.add(path)
+    for page in pages:
+        if page.id in paths:
+            continue
+        base = _base_path(page)
+        path, n = base, 2
+        while path in used:
+            path, n = f"{base}-{n}", n + 1
+        used.add(path)
+        paths[page.id] = path
+    return paths
+
+
+def page_hash(page, pdf_formats):
+    """Hash dei dati della pagina e delle opzioni che ne cambiano i file"""
+    payload = json.dumps([SITE_VERSION, page.title, sorted(pdf_formats)], ensure_ascii=False)
+    return hashlib.sha256((payload + schedule_hash(page.schedule_data)).encode('utf-8')).hexdigest()
+
+
+# --- Rendering ------------------------------------------------------------------
+
+def _html_page(title, body):
+    return HTML_PAGE.format(title=html.escape(title), body=body).encode('utf-8')
+
+
+def _html_file(path, format_type):
+    return f"{path}.html" if format_type == HTML_FORMATS[0] else f"{path}-{slugify(format_type)}.html"
+
+
+def _pdf_file(path, format_type):
+    return f"{path}-{format_type}.pdf"
+
+
+def render_html(page, path, format_type, pdf_files):
+    """Pagina HTML di un orario in un formato di tabella"""
+    schedule_data = page.schedule_data
+    name = os.path.basename(path)
+    links = ['<a href="../index.html">← Indice</a>']
+    for other in HTML_FORMATS:
+        if other != format_type:
+            links.append(f'<a href="{os.path.basename(_html_file(name, other))}">{other}</a>')
+    for pdf_format in pdf_files:
+        links.append(f'<a href="{os.path.basename(_pdf_file(name, pdf_format))}">PDF {pdf_format}</a>')
+
+    header, rows = engine.build_table_rows(schedule_data, False, format_type)
+    body = (f"<nav>{' '.join(links)}</nav>\n"
+            f"<h1>{html.escape(schedule_data['docente'])}</h1>\n"
+            f"<p>{html.escape(schedule_data['materie'])} — "
+            f"{html.escape(schedule_data['istituto'])} — "
+            f"A.S. {html.escape(schedule_data['anno_scolastico'])}</p>\n"
+            + engine.build_html_table(header, rows))
+    return _html_page(schedule_data['docente'], body)
+
+
+def render_pdfs(schedule_data, formats):
+    """{formato: byte del PDF} (i formati senza lezioni sono omessi); eseguita nei processi del pool"""
+    pdfs = {}
+    # Una sola griglia per tutti i formati
+    schedule_data = compact_schedule_data(schedule_data)
+    for format_type in formats:
+        try:
+            pdfs[format_type] = engine.render_pdf(schedule_data, format_type)
+        except engine.EmptyScheduleError:
+            pass
+    return pdfs
+
+
+def render_index(pages, paths):
+    """Indice del sito: docenti, classi, aule e piani per istituto e anno scolastico"""
+    scopes = sorted({page.scope for page in pages})
+    parts = ["<h1>📚 Orari</h1>"]
+    for scope in scopes:
+        if len(scopes) > 1:
+            parts.append(f"<h2>{html.escape(scope[0])} — A.S. {html.escape(scope[1])}</h2>")
+        for kind, (_, heading) in SECTIONS.items():
+            items = [f'<li><a href="{paths[p.id]}.html">{html.escape(p.title)}</a></li>'
+                     for p in pages if p.kind == kind and p.scope == scope]
+            if items:
+                parts.append(f"<h3>{heading} ({len(items)})</h3>\n<ul>\n" + "\n".join(items) + "\n</ul>")
+    return _html_page("Orari", "\n".join(parts))
+
+
+# --- File -----------------------------------------------------------------------
+
+def _write(output, relative, data):
+    """Scrittura atomica: chi serve il sito non vede mai file a metà"""
+    path = os.path.join(output, relative)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_if_changed(output, relative, data):
+    path = os.path.join(output, relative)
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    _write(output, relative, data)
+    return True
+
+
+def _remove(output, relative):
+    try:
+        os.remove(os.path.join(output, relative))
+    except OSError:
+        pass
+
+
+def load_manifest(output):
+    try:
+        with open(os.path.join(output, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return manifest.get('pagine', {}) if manifest.get('versione') == SITE_VERSION else {}
+
+
+def build_site(pages, output, pdf_formats=('standard',), workers=None, force=False, progress=print):
+    """
+    Scrive il sito nella cartella output, rigenerando solo le pagine cambiate.
+    Restituisce un BuildReport (pagine rigenerate, invariate, rimosse, errori).
+    """
+    os.makedirs(output, exist_ok=True)
+    previous = load_manifest(output)
+    paths = assign_paths(pages, previous)
+    manifest = {}
+    todo = []
+    skipped = 0
+
+    for page in pages:
+        path = paths[page.id]
+        digest = page_hash(page, pdf_formats)
+        entry = None if force else previous.get(path)
+        if (entry is not None and entry['hash'] == digest
+                and all(os.path.exists(os.path.join(output, f)) for f in entry['file'])):
+            manifest[path] = dict(entry, id=page_key(page))
+            skipped += 1
+        else:
+            todo.append((page, path, digest))
+
+    errors = []
+    if todo:
+        jobs = [(page.schedule_data, list(pdf_formats)) for page, _, _ in todo]
+        if workers == 1 or len(todo) == 1 or not pdf_formats:
+            results = [render_pdfs(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(render_pdfs, *zip(*jobs)))
+
+        for (page, path, digest), pdfs in zip(todo, results):
+            try:
+                files = []
+                for format_type, pdf_data in pdfs.items():
+                    _write(output, _pdf_file(path, format_type), pdf_data)
+                    files.append(_pdf_file(path, format_type))
+                # Una sola griglia per le tabelle di tutti i formati
+                page = page._replace(schedule_data=compact_schedule_data(page.schedule_data))
+                for format_type in HTML_FORMATS:
+                    _write(output, _html_file(path, format_type), render_html(page, path, format_type, pdfs))
+                    files.append(_html_file(path, format_type))
+            except Exception as e:
+                errors.append((path, f"{type(e).__name__}: {e}"))
+                progress(f"⚠️ {path}: {e}")
+                continue
+            # File della versione precedente che non esistono più (es. formato PDF tolto)
+            for stale in set(previous.get(path, {}).get('file', ())) - set(files):
+                _remove(output, stale)
+            manifest[path] = {'id': page_key(page), 'hash': digest, 'titolo': page.title, 'file': files}
+            progress(f"✅ {path}")
+
+    removed = 0
+    for path in set(previous) - set(paths.values()):
+        for relative in previous[path]['file']:
+            _remove(output, relative)
+        removed += 1
+
+    _write_if_changed(output, 'index.html', render_index(pages, paths))
+    _write_if_changed(output, MANIFEST_FILE,
+                      json.dumps({'versione': SITE_VERSION, 'pagine': manifest},
+                                 ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8'))
+    return BuildReport(len(todo) - len(errors), skipped, removed, errors)
+
+
+def load_teachers(storage, istituto=None, anno_scolastico=None):
+    """(record, schedule_data) di tutti i docenti dell'archivio"""
+    teachers = []
+    for record in storage.list_teachers(istituto, anno_scolastico):
+        schedule_data = storage.load(record['id'])
+        if schedule_data is not None:
+            teachers.append((record, schedule_data))
+    return teachers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sito statico con gli orari di docenti, classi, aule e piani")
+    parser.add_argument('archivio', help="File .db/.sqlite oppure cartella di file JSON")
+    parser.add_argument('output', help="Cartella del sito")
+    parser.add_argument('--pdf', nargs='*', choices=list(engine.PDF_FORMATS), default=['standard'],
+                        help="Formati PDF da generare (default: standard; nessuno con --pdf senza valori)")
+    parser.add_argument('--istituto')
+    parser.add_argument('--anno', dest='anno_scolastico')
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processi per i PDF (default: numero di CPU)")
+    parser.add_argument('--forza', action='store_true', help="Rigenera tutte le pagine")
+    args = parser.parse_args(argv)
+
+    from storage import open_storage
+    start = time.perf_counter()
+    pages = build_pages(load_teachers(open_storage(args.archivio), args.istituto, args.anno_scolastico))
+    if not pages:
+        print("❌ Nessun orario nell'archivio")
+        return 1
+    report = build_site(pages, args.output, args.pdf, args.workers, args.forza)
+    elapsed = time.perf_counter() - start
+
+    print("=" * 40)
+    print(f"🌐 {len(pages)} pagine in {args.output}: {report.built} rigenerate, "
+          f"{report.skipped} invariate, {report.removed} rimosse ({elapsed:.2f}s)")
+    if report.errors:
+        print(f"⚠️ {len(report.errors)} pagine non generate")
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
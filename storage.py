@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Archivio degli orari di più docenti.
+
+ScheduleStorage è l'interfaccia comune; le implementazioni sono:
+
+- JSONDirectoryStorage: una cartella con un file JSON per docente (lo stesso
+  formato di config_orario.json);
+- SQLiteStorage: database SQLite locale indicizzato per docente, anno
+  scolastico e istituto, con una tabella degli slot che permette di
+  rispondere a domande come "chi insegna in aula A15 il GIO alla 3ª ora"
+  con una ricerca sull'indice.
+
+Esempi da riga di comando:
+    python storage.py orari.db importa orari/*.json
+    python storage.py orari.db elenco
+    python storage.py orari.db aula GIO 3 A15
+    python storage.py orari.db esporta 7 docente.json
+"""
+
+import abc
+import argparse
+import glob
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from config_schema import normalize_config
+from persistence import atomic_write_json
+from schedule_engine import ISTITUTO_DEFAULT, ANNO_SCOLASTICO_DEFAULT
+from schedule_model import ScheduleGrid, Slot, as_grid
+
+
+def teacher_key(schedule_data):
+    """(istituto, anno_scolastico, docente) che identifica un orario"""
+    return (schedule_data.get('istituto') or ISTITUTO_DEFAULT,
+            schedule_data.get('anno_scolastico') or ANNO_SCOLASTICO_DEFAULT,
+            schedule_data.get('docente') or '')
+
+
+def _short_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:8]
+
+
+def _plain_schedule_data(schedule_data):
+    # La ScheduleGrid viene salvata nel formato JSON
+    if isinstance(schedule_data.get('schedule'), ScheduleGrid):
+        schedule_data = dict(schedule_data, schedule=schedule_data['schedule'].to_schedule())
+    return schedule_data
+
+
+class ScheduleStorage(abc.ABC):
+    """Interfaccia comune degli archivi di orari"""
+
+    @abc.abstractmethod
+    def list_teachers(self, istituto=None, anno_scolastico=None):
+        """Elenco di dict con id, docente, istituto, anno_scolastico"""
+
+    @abc.abstractmethod
+    def load(self, teacher_id):
+        """Dati dell'orario di un docente, None se non esiste"""
+
+    @abc.abstractmethod
+    def save(self, schedule_data):
+        """Salva (o aggiorna) l'orario e ne restituisce l'id"""
+
+    @abc.abstractmethod
+    def delete(self, teacher_id):
+        """Elimina l'orario di un docente"""
+
+    @abc.abstractmethod
+    def find_in_room(self, giorno, ora, aula, edificio=None, anno_scolastico=None, istituto=None):
+        """Docenti con lezione in un'aula a un dato giorno e ora"""
+
+    @abc.abstractmethod
+    def find_class(self, giorno, ora, classe, anno_scolastico=None, istituto=None):
+        """Docenti con lezione in una classe a un dato giorno e ora"""
+
+    def iter_lessons(self, istituto=None, anno_scolastico=None):
+        """Genera (record, giorno, ora, slot) per tutte le lezioni dell'archivio"""
+        for record in self.list_teachers(istituto, anno_scolastico):
+            schedule_data = self.load(record['id']) or {}
+            for giorno, ora, slot in as_grid(schedule_data.get('schedule')).iter_lessons():
+                yield record, giorno, ora, slot
+
+    def import_json(self, path):
+        """Importa un file JSON nel formato di config_orario.json"""
+        with open(path, 'r') as f:
+            return self.save(normalize_config(json.load(f)))
+
+    def export_json(self, teacher_id, path):
+        """Esporta l'orario di un docente come file JSON"""
+        schedule_data = self.load(teacher_id)
+        if schedule_data is None:
+            raise KeyError(teacher_id)
+        atomic_write_json(schedule_data, path)
+
+
+class JSONDirectoryStorage(ScheduleStorage):
+    """Un file JSON per docente in una cartella (le ricerche leggono tutti i file)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def valid_id(teacher_id):
+        """True se l'id è un nome di file della cartella (niente percorsi)"""
+        teacher_id = str(teacher_id)
+        return bool(teacher_id) and not any(c in teacher_id for c in '/\\\0') and '..' not in teacher_id
+
+    def _path(self, teacher_id):
+        if not self.valid_id(teacher_id):
+            raise KeyError(teacher_id)
+        return os.path.join(self.directory, f"{teacher_id}.json")
+
+    def _iter(self):
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.json'))):
+            teacher_id = os.path.splitext(os.path.basename(path))[0]
+            with open(path, 'r') as f:
+                yield teacher_id, json.load(f)
+
+    @staticmethod
+    def _record(teacher_id, schedule_data):
+        istituto, anno_scolastico, docente = teacher_key(schedule_data)
+        return {'id': teacher_id, 'docente': docente, 'istituto': istituto,
+                'anno_scolastico': anno_scolastico}
+
+    def _matching(self, istituto, anno_scolastico):
+        for teacher_id, schedule_data in self._iter():
+            record = self._record(teacher_id, schedule_data)
+            if istituto and record['istituto'] != istituto:
+                continue
+            if anno_scolastico and record['anno_scolastico'] != anno_scolastico:
+                continue
+            yield record, schedule_data
+
+    def list_teachers(self, istituto=None, anno_scolastico=None):
+        return [record for record, _ in self._matching(istituto, anno_scolastico)]
+
+    def load(self, teacher_id):
+        if not self.valid_id(teacher_id):
+            return None
+        path = self._path(teacher_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return normalize_config(json.load(f))
+
+    def save(self, schedule_data):
+        schedule_data = _plain_schedule_data(schedule_data)
+        key = teacher_key(schedule_data)
+        for teacher_id, existing in self._iter():
+            if teacher_key(existing) == key:
+                break
+        else:
+            teacher_id = self._new_id(key)
+        atomic_write_json(schedule_data, self._path(teacher_id))
+        return teacher_id
+
+    def _new_id(self, key):
+        # docente_anno_<hash dell'istituto>: lo stesso docente in due istituti
+        # non condivide il file; un secondo hash separa i nomi che differiscono
+        # solo per la punteggiatura ("D'Angelo" / "D Angelo")
+        istituto, anno_scolastico, docente = key
+        slug = '_'.join(''.join(c if c.isalnum() else '_' for c in part)
+                        for part in (docente, anno_scolastico))
+        teacher_id = f"{slug}_{_short_hash(istituto)}"
+        if os.path.exists(self._path(teacher_id)):
+            teacher_id = f"{teacher_id}_{_short_hash('|'.join(key))}"
+        return teacher_id
+
+    def delete(self, teacher_id):
+        path = self._path(teacher_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _find(self, giorno, ora, match, anno_scolastico, istituto):
+        result = []
+        for record, schedule_data in self._matching(istituto, anno_scolastico):
+            slot = as_grid(schedule_data.get('schedule')).get(giorno, ora)
+            if slot is not None and slot.is_lesson and match(slot):
+                result.append(dict(record, classe=slot.classe, edificio=slot.edificio,
+                                   piano=slot.piano, aula=slot.aula))
+        return result
+
+    def iter_lessons(self, istituto=None, anno_scolastico=None):
+        for record, schedule_data in self._matching(istituto, anno_scolastico):
+            for giorno, ora, slot in as_grid(schedule_data.get('schedule')).iter_lessons():
+                yield record, giorno, ora, slot
+
+    def find_in_room(self, giorno, ora, aula, edificio=None, anno_scolastico=None, istituto=None):
+        return self._find(giorno, ora,
+                          lambda s: s.aula == aula and (edificio is None or s.edificio == edificio),
+                          anno_scolastico, istituto)
+
+    def find_class(self, giorno, ora, classe, anno_scolastico=None, istituto=None):
+        return self._find(giorno, ora, lambda s: s.classe == classe, anno_scolastico, istituto)
+
+
+class ConnectionPool:
+    """Pool di connessioni SQLite condivisibili tra thread"""
+
+    def __init__(self, path, size=4):
+        self.path = path
+        self._pool = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            self._pool.put(self._connect())
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Connessione in prestito; commit all'uscita, rollback in caso di errore"""
+        conn = self._pool.get()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS teachers (
+    id INTEGER PRIMARY KEY,
+    istituto TEXT NOT NULL,
+    anno_scolastico TEXT NOT NULL,
+    docente TEXT NOT NULL,
+    config TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (istituto, anno_scolastico, docente)
+);
+CREATE INDEX IF NOT EXISTS idx_teachers_docente ON teachers (docente);
+
+CREATE TABLE IF NOT EXISTS slots (
+    teacher_id INTEGER NOT NULL REFERENCES teachers (id) ON DELETE CASCADE,
+    giorno TEXT NOT NULL,
+    ora TEXT NOT NULL,
+    classe TEXT NOT NULL,
+    edificio TEXT NOT NULL,
+    piano TEXT NOT NULL,
+    aula TEXT NOT NULL,
+    PRIMARY KEY (teacher_id, giorno, ora)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_slots_aula ON slots (giorno, ora, aula, edificio);
+CREATE INDEX IF NOT EXISTS idx_slots_classe ON slots (giorno, ora, classe);
+"""
+
+
+class SQLiteStorage(ScheduleStorage):
+    """Archivio SQLite: configurazione completa + tabella indicizzata delle lezioni"""
+
+    def __init__(self, path, pool_size=4):
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def close(self):
+        self.pool.close()
+
+    def list_teachers(self, istituto=None, anno_scolastico=None):
+        query = "SELECT id, docente, istituto, anno_scolastico FROM teachers"
+        conditions, params = self._filters(istituto, anno_scolastico, prefix='')
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY istituto, anno_scolastico, docente"
+        with self.pool.connection() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def load(self, teacher_id):
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT config FROM teachers WHERE id = ?", (teacher_id,)).fetchone()
+        return normalize_config(json.loads(row['config'])) if row else None
+
+    def save(self, schedule_data):
+        schedule_data = _plain_schedule_data(schedule_data)
+        istituto, anno_scolastico, docente = teacher_key(schedule_data)
+        config = json.dumps(schedule_data, ensure_ascii=False)
+        lessons = [(giorno, ora) + slot.astuple()
+                   for giorno, ora, slot in as_grid(schedule_data.get('schedule')).iter_lessons()]
+        with self.pool.connection() as conn:
+            conn.execute(
+                "INSERT INTO teachers (istituto, anno_scolastico, docente, config, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (istituto, anno_scolastico, docente) "
+                "DO UPDATE SET config = excluded.config, updated_at = excluded.updated_at",
+                (istituto, anno_scolastico, docente, config, time.time()))
+            teacher_id = conn.execute(
+                "SELECT id FROM teachers WHERE istituto = ? AND anno_scolastico = ? AND docente = ?",
+                (istituto, anno_scolastico, docente)).fetchone()['id']
+            conn.execute("DELETE FROM slots WHERE teacher_id = ?", (teacher_id,))
+            conn.executemany(
+                "INSERT INTO slots (teacher_id, giorno, ora, classe, edificio, piano, aula) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(teacher_id,) + lesson for lesson in lessons])
+        return teacher_id
+
+    def delete(self, teacher_id):
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM teachers WHERE id = ?", (teacher_id,))
+
+    @staticmethod
+    def _filters(istituto, anno_scolastico, prefix='t.'):
+        conditions, params = [], []
+        if istituto:
+            conditions.append(f"{prefix}istituto = ?")
+            params.append(istituto)
+        if anno_scolastico:
+            conditions.append(f"{prefix}anno_scolastico = ?")
+            params.append(anno_scolastico)
+        return conditions, params
+
+    def _find(self, conditions, params, anno_scolastico, istituto):
+        extra, extra_params = self._filters(istituto, anno_scolastico)
+        query = ("SELECT t.id, t.docente, t.istituto, t.anno_scolastico, "
+                 "s.classe, s.edificio, s.piano, s.aula "
+                 "FROM slots s JOIN teachers t ON t.id = s.teacher_id "
+                 "WHERE " + " AND ".join(conditions + extra) + " ORDER BY t.docente")
+        with self.pool.connection() as conn:
+            return [dict(row) for row in conn.execute(query, params + extra_params)]
+
+    def iter_lessons(self, istituto=None, anno_scolastico=None):
+        # Una sola query sulla tabella delle lezioni, senza decodificare le configurazioni
+        conditions, params = self._filters(istituto, anno_scolastico)
+        query = ("SELECT t.id, t.docente, t.istituto, t.anno_scolastico, "
+                 "s.giorno, s.ora, s.classe, s.edificio, s.piano, s.aula "
+                 "FROM slots s JOIN teachers t ON t.id = s.teacher_id")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self.pool.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        for row in rows:
+            record = {'id': row['id'], 'docente': row['docente'], 'istituto': row['istituto'],
+                      'anno_scolastico': row['anno_scolastico']}
+            yield record, row['giorno'], row['ora'], Slot(row['classe'], row['edificio'],
+                                                          row['piano'], row['aula'])
+
+    def find_in_room(self, giorno, ora, aula, edificio=None, anno_scolastico=None, istituto=None):
+        conditions = ["s.giorno = ?", "s.ora = ?", "s.aula = ?"]
+        params = [giorno, str(ora), aula]
+        if edificio is not None:
+            conditions.append("s.edificio = ?")
+            params.append(edificio)
+        return self._find(conditions, params, anno_scolastico, istituto)
+
+    def find_class(self, giorno, ora, classe, anno_scolastico=None, istituto=None):
+        return self._find(["s.giorno = ?", "s.ora = ?", "s.classe = ?"],
+                          [giorno, str(ora), classe], anno_scolastico, istituto)
+
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def open_storage(location):
+    """Archivio condiviso dal processo: .db/.sqlite → SQLite, altrimenti cartella JSON"""
+    key = os.path.abspath(location)
+    with _storages_lock:
+        storage = _storages.get(key)
+        if storage is None:
+            if location.endswith(('.db', '.sqlite', '.sqlite3')):
+                storage = SQLiteStorage(location)
+            else:
+                storage = JSONDirectoryStorage(location)
+            _storages[key] = storage
+        return storage
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archivio degli orari dei docenti")
+    parser.add_argument('archivio', help="File .db (SQLite) oppure cartella di file JSON")
+    commands = parser.add_subparsers(dest='comando', required=True)
+
+    importa = commands.add_parser('importa', help="Importa file JSON")
+    importa.add_argument('files', nargs='+')
+
+    esporta = commands.add_parser('esporta', help="Esporta un docente in JSON")
+    esporta.add_argument('id')
+    esporta.add_argument('file')
+
+    elenco = commands.add_parser('elenco', help="Elenco dei docenti")
+    elenco.add_argument('--istituto')
+    elenco.add_argument('--anno')
+
+    aula = commands.add_parser('aula', help="Chi insegna in un'aula a un dato giorno e ora")
+    aula.add_argument('giorno')
+    aula.add_argument('ora')
+    aula.add_argument('aula')
+    aula.add_argument('--edificio')
+
+    classe = commands.add_parser('classe', help="Chi insegna in una classe a un dato giorno e ora")
+    classe.add_argument('giorno')
+    classe.add_argument('ora')
+    classe.add_argument('classe')
+
+    args = parser.parse_args(argv)
+    storage = open_storage(args.archivio)
+
+    if args.comando == 'importa':
+        for path in args.files:
+            teacher_id = storage.import_json(path)
+            print(f"✅ {path} → {teacher_id}")
+    elif args.comando == 'esporta':
+        teacher_id = int(args.id) if isinstance(storage, SQLiteStorage) else args.id
+        storage.export_json(teacher_id, args.file)
+        print(f"✅ {args.file}")
+    elif args.comando == 'elenco':
+        for record in storage.list_teachers(args.istituto, args.anno):
+            print(f"{record['id']}\t{record['docente']}\t{record['anno_scolastico']}\t{record['istituto']}")
+    else:
+        if args.comando == 'aula':
+            results = storage.find_in_room(args.giorno, args.ora, args.aula, args.edificio)
+        else:
+            results = storage.find_class(args.giorno, args.ora, args.classe)
+        if not results:
+            print("Nessun docente trovato")
+        for record in results:
+            print(f"{record['docente']}\t{record['classe']}\t{record['edificio']} {record['piano']} {record['aula']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Più istituti (tenant) serviti dallo stesso processo.
+
+Ogni istituto ha una propria cartella sotto ORARIO_TENANTS:
+
+    tenants/
+      fermi/
+        istituto.json         impostazioni, valori predefiniti e limiti
+        config_orario.json    orario salvato dall'app (snapshot + journal)
+        orari.db              archivio dei docenti (facoltativo, vedi "archivio")
+        cache_pdf/            cache su disco dei PDF e dei calendari
+
+istituto.json (tutti i campi sono facoltativi):
+    {
+      "nome": "Liceo Scientifico \"E. Fermi\" Ragusa",
+      "archivio": "orari.db",
+      "predefiniti": {"istituto": "...", "docente": "...", "materie": "...",
+                      "anno_scolastico": "2025/2026"},
+      "limiti": {"pdf_concorrenti": 2, "cache_memoria_mb": 8}
+    }
+
+Cache, PDF e archivio di un istituto non sono mai condivisi con gli altri;
+"pdf_concorrenti" limita i PDF generati contemporaneamente per l'istituto,
+così un'esportazione di massa non occupa tutti i worker del server. Le
+impostazioni di un istituto vengono lette solo quando una sessione (o una
+richiesta) lo usa.
+
+Senza ORARIO_TENANTS resta il comportamento a istituto singolo: il tenant
+predefinito usa config_orario.json, ORARIO_ARCHIVIO e la cache dei PDF del
+processo.
+
+Esempio:
+    python tenancy.py crea fermi --nome "Liceo Fermi" --archivio orari.db
+    python tenancy.py elenco
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+
+import schedule_engine as engine
+from pdf_cache import DEFAULT_MAX_AGE, DEFAULT_MAX_DISK_BYTES, PDF_CACHE, PDFCache
+from persistence import atomic_write_json
+
+TENANTS_DIR = os.environ.get('ORARIO_TENANTS')
+SETTINGS_FILE = 'istituto.json'
+DEFAULT_TENANT = 'predefinito'
+
+# Limiti di un istituto se non indicati in istituto.json
+DEFAULT_LIMITS = {
+    'pdf_concorrenti': 2,
+    'cache_memoria_mb': 8,
+}
+
+# Campi dell'orario che un istituto può predefinire
+DEFAULT_FIELDS = ('istituto', 'docente', 'materie', 'anno_scolastico')
+
+_TENANT_ID = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+
+
+class TenantError(ValueError):
+    """Istituto inesistente o impostazioni non valide"""
+
+
+class TenantBusyError(RuntimeError):
+    """Tutti i PDF contemporanei dell'istituto sono occupati"""
+
+
+class _PDFSlot:
+    __slots__ = ('semaphore', 'timeout', 'tenant_id')
+
+    def __init__(self, semaphore, timeout, tenant_id):
+        self.semaphore = semaphore
+        self.timeout = timeout
+        self.tenant_id = tenant_id
+
+    def __enter__(self):
+        if self.semaphore is not None and not self.semaphore.acquire(timeout=self.timeout):
+            raise TenantBusyError(f"Istituto {self.tenant_id}: troppi PDF in generazione, riprovare")
+        return self
+
+    def __exit__(self, *exc):
+        if self.semaphore is not None:
+            self.semaphore.release()
+        return False
+
+
+def validate_tenant_id(tenant_id):
+    """Id dell'istituto usato come nome di cartella (niente percorsi)"""
+    if not isinstance(tenant_id, str) or not _TENANT_ID.match(tenant_id):
+        raise TenantError(f"Id istituto non valido: {tenant_id!r} (minuscole, cifre, '-' e '_')")
+    return tenant_id
+
+
+def _archive_name(tenant_id, name):
+    """Archivio dentro la cartella dell'istituto (niente percorsi assoluti o "..")"""
+    if (not isinstance(name, str) or os.path.isabs(name) or '\\' in name
+            or any(part in ('', '.', '..') for part in name.split('/'))):
+        raise TenantError(f"{tenant_id}: archivio non valido {name!r} (nome nella cartella dell'istituto)")
+    return name
+
+
+class Tenant:
+    """Spazio dei dati di un istituto: orario salvato, archivio, cache e limiti"""
+
+    def __init__(self, tenant_id, path=None, settings=None, archive=None, pdf_cache=None):
+        self.id = tenant_id
+        self.path = path
+        self.settings = settings or {}
+        self.name = self.settings.get('nome') or tenant_id
+
+        limits = dict(DEFAULT_LIMITS)
+        limits.update(self.settings.get('limiti') or {})
+        for key, value in limits.items():
+            if value is not None and (not isinstance(value, int) or value < 1):
+                raise TenantError(f"{tenant_id}: limite {key} non valido {value!r}")
+        self.limits = limits
+
+        defaults = self.settings.get('predefiniti') or {}
+        for key, value in defaults.items():
+            if key not in DEFAULT_FIELDS or not isinstance(value, str):
+                raise TenantError(f"{tenant_id}: valore predefinito non valido {key}={value!r}")
+        self.defaults = defaults
+
+        if path is None:
+            self.config_path = engine.CONFIG_PATH
+            self.archive = archive
+            self.pdf_cache = pdf_cache if pdf_cache is not None else PDF_CACHE
+        else:
+            self.config_path = os.path.join(path, engine.CONFIG_PATH)
+            name = archive or self.settings.get('archivio')
+            self.archive = os.path.join(path, _archive_name(tenant_id, name)) if name else None
+            self.pdf_cache = pdf_cache if pdf_cache is not None else PDFCache(
+                cache_dir=os.path.join(path, 'cache_pdf'),
+                max_memory_bytes=limits['cache_memoria_mb'] * 1024 * 1024,
+                max_disk_bytes=DEFAULT_MAX_DISK_BYTES,
+                max_age=DEFAULT_MAX_AGE)
+        # PDF generati contemporaneamente per questo istituto (None = nessun limite)
+        limit = limits['pdf_concorrenti']
+        self.pdf_slots = threading.BoundedSemaphore(limit) if limit else None
+
+    def __repr__(self):
+        return f"Tenant({self.id!r})"
+
+    @property
+    def max_pdf_jobs(self):
+        return self.limits['pdf_concorrenti']
+
+    def pdf_slot(self, timeout=None):
+        """
+        Context manager che occupa uno dei PDF contemporanei dell'istituto;
+        solleva TenantBusyError se non si libera entro timeout secondi.
+        """
+        return _PDFSlot(self.pdf_slots, timeout, self.id)
+
+    def default(self, key):
+        """Valore predefinito di un campo dell'orario per l'istituto"""
+        if key in self.defaults:
+            return self.defaults[key]
+        return engine.default_schedule_data()[key]
+
+    def default_schedule_data(self):
+        """Configurazione di un nuovo docente con i valori predefiniti dell'istituto"""
+        schedule_data = engine.default_schedule_data()
+        schedule_data.update(self.defaults)
+        return schedule_data
+
+    def open_storage(self):
+        """Archivio dei docenti dell'istituto (None se non configurato)"""
+        if not self.archive:
+            return None
+        from storage import open_storage
+        return open_storage(self.archive)
+
+
+def _legacy_tenant():
+    return Tenant(DEFAULT_TENANT, archive=os.environ.get('ORARIO_ARCHIVIO') or None,
+                  settings={'limiti': {'pdf_concorrenti': None}})
+
+
+class TenantRegistry:
+    """Istituti di una cartella, caricati al primo uso e condivisi dal processo"""
+
+    def __init__(self, root=TENANTS_DIR):
+        self.root = root
+        self._tenants = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.root)
+
+    def _path(self, tenant_id):
+        return os.path.join(self.root, validate_tenant_id(tenant_id))
+
+    def list(self):
+        """Id degli istituti presenti (senza caricarne le impostazioni)"""
+        if not self.enabled or not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if _TENANT_ID.match(name) and os.path.isdir(os.path.join(self.root, name)))
+
+    def get(self, tenant_id=None):
+        """Tenant per id; senza ORARIO_TENANTS il tenant predefinito a istituto singolo"""
+        if not self.enabled:
+            if tenant_id not in (None, DEFAULT_TENANT):
+                raise TenantError("Gestione di più istituti non attiva (ORARIO_TENANTS)")
+            tenant_id = DEFAULT_TENANT
+        elif tenant_id is None:
+            tenant_id = os.environ.get('ORARIO_TENANT') or DEFAULT_TENANT
+
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is None:
+                tenant = self._load(tenant_id)
+                self._tenants[tenant_id] = tenant
+            return tenant
+
+    def _load(self, tenant_id):
+        if not self.enabled:
+            return _legacy_tenant()
+        path = self._path(tenant_id)
+        if not os.path.isdir(path):
+            raise TenantError(f"Istituto {tenant_id} non trovato")
+        settings = {}
+        settings_path = os.path.join(path, SETTINGS_FILE)
+        if os.path.exists(settings_path):
+            try:
+                with open(settings_path, 'r', encoding='utf-8') as f:
+                    settings = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                raise TenantError(f"{tenant_id}: {SETTINGS_FILE} non leggibile ({e})")
+            if not isinstance(settings, dict):
+                raise TenantError(f"{tenant_id}: {SETTINGS_FILE} deve essere un oggetto JSON")
+        return Tenant(tenant_id, path, settings)
+
+    def create(self, tenant_id, settings=None):
+        """Crea la cartella dell'istituto con le sue impostazioni"""
+        path = self._path(tenant_id)
+        os.makedirs(path, exist_ok=True)
+        atomic_write_json(settings or {}, os.path.join(path, SETTINGS_FILE))
+        with self._lock:
+            self._tenants.pop(tenant_id, None)
+        return self.get(tenant_id)
+
+    def forget(self, tenant_id=None):
+        """Rilegge le impostazioni al prossimo get (tutti gli istituti se None)"""
+        with self._lock:
+            if tenant_id is None:
+                self._tenants.clear()
+            else:
+                self._tenants.pop(tenant_id, None)
+
+
+# Registro condiviso dal processo
+TENANTS = TenantRegistry()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gestione degli istituti (tenant)")
+    parser.add_argument('--cartella', default=TENANTS_DIR or 'tenants',
+                        help="Cartella degli istituti (default: ORARIO_TENANTS o tenants)")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    sub.add_parser('elenco', help="Elenca gli istituti")
+    crea = sub.add_parser('crea', help="Crea un istituto")
+    crea.add_argument('id', help="Id dell'istituto (nome della cartella)")
+    crea.add_argument('--nome', help="Nome visualizzato")
+    crea.add_argument('--archivio', help="Archivio nella cartella dell'istituto (es. orari.db)")
+    crea.add_argument('--pdf-concorrenti', type=int, default=DEFAULT_LIMITS['pdf_concorrenti'])
+    args = parser.parse_args(argv)
+
+    registry = TenantRegistry(args.cartella)
+    try:
+        if args.comando == 'crea':
+            settings = {'nome': args.nome or args.id,
+                        'predefiniti': {'istituto': args.nome or args.id},
+                        'limiti': {'pdf_concorrenti': args.pdf_concorrenti}}
+            if args.archivio:
+                settings['archivio'] = args.archivio
+            tenant = registry.create(args.id, settings)
+            print(f"🏫 Istituto {tenant.id} creato in {tenant.path}")
+        else:
+            for tenant_id in registry.list():
+                tenant = registry.get(tenant_id)
+                print(f"🏫 {tenant.id}: {tenant.name} (PDF contemporanei: {tenant.max_pdf_jobs})")
+    except TenantError as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test per le statistiche settimanali
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import analytics
+import schedule_engine as engine
+from schedule_model import Slot
+
+
+def test_daily_summary():
+    """Test di buchi, cambi di edificio e piani percorsi sull'orario di esempio"""
+    try:
+        schedule_data = engine.default_schedule_data()
+        schedule_data['schedule'] = engine.example_schedule()
+        frame = analytics.schedule_frame(schedule_data)
+        assert len(frame) == 15  # DISP., — e ore vuote esclusi
+
+        daily = analytics.daily_summary(frame).set_index('giorno')
+        # GIO: MB PT → (buco) → C 1P → C 1P → MA 2P
+        gio = daily.loc['GIO']
+        assert (gio['lezioni'], gio['buchi'], gio['cambi_edificio']) == (4, 1, 2)
+        assert gio['piani_percorsi'] == 0 + 1 + 0 + 1 + 2
+        assert list(daily.index) == ['LUN', 'MER', 'GIO', 'VEN', 'SAB']
+
+        hours = analytics.hours_per_class(frame)
+        assert hours.iloc[0]['classe'] == '1Asp' and hours.iloc[0]['ore'] == 7
+        assert hours['ore'].sum() == 15
+        print("✅ Statistiche giornaliere corrette")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nelle statistiche giornaliere: {e}")
+        return False
+
+
+def test_institute_summary():
+    """Test dei totali per docente su più orari"""
+    try:
+        def lesson(classe, edificio, piano):
+            return Slot(classe, edificio, piano, 'A1')
+
+        lessons = [
+            ('Rossi', 'LUN', '1', lesson('1A', 'MA', 'PT')),
+            ('Rossi', 'LUN', '4', lesson('1A', 'MA', '2P')),
+            ('Rossi', 'MAR', '2', lesson('DISP.', '', '')),
+            ('Bianchi', 'LUN', 1, lesson('2B', 'C', '1P')),
+            ('Bianchi', 'LUN', 2, lesson('2B', 'MB', 'piano ?')),
+        ]
+        daily = analytics.daily_summary(analytics.lessons_frame(lessons))
+        teachers = analytics.teacher_summary(daily).set_index('docente')
+
+        assert teachers.loc['Rossi', 'buchi'] == 2 and teachers.loc['Rossi', 'giorni'] == 1
+        assert teachers.loc['Rossi', 'piani_percorsi'] == 2
+        assert teachers.loc['Bianchi', 'cambi_edificio'] == 1
+        assert teachers.loc['Bianchi', 'piani_percorsi'] == 1  # piano sconosciuto = 0
+        assert list(teachers.index) == ['Rossi', 'Bianchi']
+
+        empty = analytics.daily_summary(analytics.lessons_frame([]))
+        assert empty.empty
+        print("✅ Totali per docente corretti")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nei totali per docente: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test delle statistiche"""
+    print("🧪 Test Statistiche Settimanali")
+    print("=" * 40)
+
+    tests = [
+        test_daily_summary,
+        test_institute_summary
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test delle statistiche sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
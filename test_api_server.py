@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test per l'API HTTP in sola lettura
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import http.client
+from urllib.parse import quote
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import schedule_engine as engine
+from api_server import StorageSource, _content_disposition, make_server, route
+from pdf_cache import PDFCache
+from storage import JSONDirectoryStorage, SQLiteStorage
+
+
+def _request(port, path, headers=None, method='GET'):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.request(method, path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response, body
+
+
+def _run_server(directory, pdf_cache=None):
+    storage = SQLiteStorage(os.path.join(directory, 'orari.db'))
+    schedule_data = engine.default_schedule_data()
+    schedule_data['schedule'] = engine.example_schedule()
+    teacher_id = storage.save(schedule_data)
+    server = make_server(StorageSource(storage), port=0, quiet=True,
+                         pdf_cache=pdf_cache or PDFCache(cache_dir=None))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, storage, teacher_id
+
+
+def test_json_and_etag():
+    """Test delle risposte JSON e della rivalidazione con If-None-Match"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            server, storage, teacher_id = _run_server(directory)
+            port = server.server_address[1]
+            try:
+                response, body = _request(port, '/api/docenti')
+                assert response.status == 200
+                assert json.loads(body)[0]['docente'] == engine.DOCENTE_DEFAULT
+
+                response, body = _request(port, f'/api/docenti/{teacher_id}')
+                etag = response.getheader('ETag')
+                assert response.status == 200 and etag
+                assert response.getheader('Cache-Control') == 'public, max-age=60'
+                assert json.loads(body)['schedule']['LUN']['3']['aula'] == 'A15'
+
+                response, body = _request(port, f'/api/docenti/{teacher_id}',
+                                          {'If-None-Match': etag})
+                assert response.status == 304 and body == b''
+
+                # Orario modificato: nuovo ETag
+                schedule_data = storage.load(teacher_id)
+                schedule_data['schedule']['LUN']['3']['aula'] = 'A16'
+                storage.save(schedule_data)
+                response, _ = _request(port, f'/api/docenti/{teacher_id}', {'If-None-Match': etag})
+                assert response.status == 200 and response.getheader('ETag') != etag
+
+                response, body = _request(port, '/api/docenti/999')
+                assert response.status == 404 and 'errore' in json.loads(body)
+            finally:
+                server.shutdown()
+                server.server_close()
+                storage.close()
+        print("✅ JSON ed ETag corretti")
+        return True
+    except Exception as e:
+        print(f"❌ Errore in JSON ed ETag: {e}")
+        return False
+
+
+def test_html_and_pdf():
+    """Test della tabella HTML e del PDF"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            cache = PDFCache(cache_dir=None)
+            server, storage, teacher_id = _run_server(directory, cache)
+            port = server.server_address[1]
+            try:
+                response, body = _request(port, f'/api/docenti/{teacher_id}/orario.html?formato=Compatto')
+                assert response.status == 200
+                assert response.getheader('Content-Type').startswith('text/html')
+                assert '<b>10:15-11:15</b> 2Esa 📍MB PT A15' in body.decode('utf-8')
+
+                response, body = _request(port, f'/api/docenti/{teacher_id}/orario.pdf?formato=tascabile')
+                assert response.status == 200 and body.startswith(b'%PDF')
+                etag = response.getheader('ETag')
+                response, body = _request(port, f'/api/docenti/{teacher_id}/orario.pdf?formato=tascabile',
+                                          {'If-None-Match': etag}, method='HEAD')
+                assert response.status == 304
+
+                # Richiesta condizionale con la cache vuota: 304 senza generare il PDF
+                empty = PDFCache(cache_dir=None)
+                unchanged = route(StorageSource(storage), f'/api/docenti/{teacher_id}/orario.pdf',
+                                  {'formato': 'tascabile'}, empty, if_none_match=etag)
+                assert unchanged.body is None and unchanged.etag == etag and empty.misses == 0
+
+                response, _ = _request(port, f'/api/docenti/{teacher_id}/orario.pdf?formato=A3')
+                assert response.status == 400
+                response, body = _request(port, '/')
+                assert response.status == 200 and b'orario.pdf' in body
+                assert cache.misses == 1  # PDF generato una volta sola
+            finally:
+                server.shutdown()
+                server.server_close()
+                storage.close()
+        print("✅ HTML e PDF corretti")
+        return True
+    except Exception as e:
+        print(f"❌ Errore in HTML e PDF: {e}")
+        return False
+
+
+def test_download_filename():
+    """Test del nome del file scaricato con id non ASCII"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            storage = JSONDirectoryStorage(os.path.join(directory, 'orari'))
+            schedule_data = engine.default_schedule_data()
+            schedule_data['docente'] = 'Łukasz Nowak'
+            schedule_data['schedule'] = engine.example_schedule()
+            teacher_id = storage.save(schedule_data)
+            server = make_server(StorageSource(storage), port=0, quiet=True,
+                                 pdf_cache=PDFCache(cache_dir=None))
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            port = server.server_address[1]
+            try:
+                for name in ('orario.pdf', 'orario.ics'):
+                    response, body = _request(port, f'/api/docenti/{quote(teacher_id)}/{name}')
+                    disposition = response.getheader('Content-Disposition')
+                    assert response.status == 200 and body
+                    assert 'filename="orario__ukasz_Nowak_' in disposition
+                    assert "filename*=UTF-8''orario_%C5%81ukasz_Nowak_" in disposition
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        # Virgolette e ";" non escono dal nome del file
+        disposition = _content_disposition('orario_a"b;c.pdf')
+        assert disposition.startswith('inline; filename="orario_a_b_c.pdf"; filename*=')
+        assert '"' not in disposition.split('filename*=')[1]
+        print("✅ Nome del file scaricato corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nel nome del file scaricato: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test dell'API"""
+    print("🧪 Test API HTTP")
+    print("=" * 40)
+
+    tests = [
+        test_json_and_etag,
+        test_html_and_pdf,
+        test_download_filename
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test dell'API sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
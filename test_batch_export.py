@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Test per l'esportazione PDF di massa
+"""
+
+import sys
+import os
+import re
+import json
+import tempfile
+import zipfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Nessuna cache su disco dei PDF durante i test
+os.environ.setdefault('ORARIO_PDF_CACHE_DIR', '')
+
+import batch_export
+import schedule_engine as engine
+import tenancy
+from batch_export import export_merged, export_zip, find_schedule_files
+from pdf_cache import PDFCache
+from tenancy import TenantRegistry
+
+
+def _write_teachers(directory):
+    """Due docenti validi, uno senza lezioni e un file non valido"""
+    for docente in ('Anna Bianchi', 'Mario Rossi'):
+        schedule_data = engine.default_schedule_data()
+        schedule_data['docente'] = docente
+        schedule_data['schedule'] = engine.example_schedule()
+        engine.save_config(schedule_data, os.path.join(directory, f"{docente.split()[1].lower()}.json"))
+    engine.save_config(engine.default_schedule_data(), os.path.join(directory, 'vuoto.json'))
+    with open(os.path.join(directory, 'rotto.json'), 'w') as f:
+        f.write('{"docente": ')
+    return find_schedule_files(directory)
+
+
+def _media_boxes(pdf_data):
+    """MediaBox (larghezza, altezza) di ogni pagina, nell'ordine del file"""
+    boxes = re.findall(rb'/MediaBox \[ *([\d.]+) +([\d.]+) +([\d.]+) +([\d.]+) *\]', pdf_data)
+    return [(round(float(x1) - float(x0)), round(float(y1) - float(y0))) for x0, y0, x1, y1 in boxes]
+
+
+def _size(format_type):
+    width, height = engine.PDF_FORMATS[format_type]['pagesize']
+    return round(width), round(height)
+
+
+def test_export_zip():
+    """Test dell'archivio ZIP con un PDF per docente e formato"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            paths = _write_teachers(directory)
+            output = os.path.join(directory, 'libretto.zip')
+            messages = []
+            written, errors = export_zip(paths, output, ['standard', 'tascabile'], workers=1,
+                                         progress=messages.append)
+            assert written == 4
+            assert sorted(os.path.basename(path) for path, _ in errors) == ['rotto.json', 'vuoto.json']
+            assert len(messages) == len(paths)
+            with zipfile.ZipFile(output) as archive:
+                assert sorted(archive.namelist()) == [
+                    'bianchi/bianchi_standard.pdf', 'bianchi/bianchi_tascabile.pdf',
+                    'rossi/rossi_standard.pdf', 'rossi/rossi_tascabile.pdf']
+                pdf_data = archive.read('rossi/rossi_tascabile.pdf')
+                assert pdf_data.startswith(b'%PDF') and _media_boxes(pdf_data) == [_size('tascabile')]
+        print("✅ Archivio ZIP corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nell'archivio ZIP: {e}")
+        return False
+
+
+def test_export_merged():
+    """Test del PDF unico con pagine di formati diversi"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            paths = _write_teachers(directory)
+            output = os.path.join(directory, 'libretto.pdf')
+            written, errors = export_merged(paths, output, ['tascabile', 'a4'], workers=1,
+                                            progress=lambda message: None)
+            assert written == 4 and len(errors) == 2
+            with open(output, 'rb') as f:
+                pdf_data = f.read()
+            # Una pagina per docente e formato: A7 e A4 alternate
+            assert len(re.findall(rb'/Type /Page\b', pdf_data)) == 4
+            assert _media_boxes(pdf_data) == [_size('tascabile'), _size('a4')] * 2
+
+            # Nessun orario valido: nessun file scritto
+            empty = os.path.join(directory, 'vuoto.pdf')
+            assert export_merged(paths[2:], empty, ['a4'], workers=1, progress=lambda m: None)[0] == 0
+            assert not os.path.exists(empty)
+        print("✅ PDF unico corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nel PDF unico: {e}")
+        return False
+
+
+def test_tenant_workers():
+    """Test del limite di processi con --istituto"""
+    original_registry, original_export = tenancy.TENANTS, batch_export.export_zip
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            registry = TenantRegistry(os.path.join(directory, 'tenants'))
+            registry.create('fermi', {'limiti': {'pdf_concorrenti': 1}})
+            tenancy.TENANTS = registry
+            calls = []
+            batch_export.export_zip = (lambda paths, output, formats, workers, cache:
+                                       calls.append(workers) or (1, []))
+            _write_teachers(directory)
+            output = os.path.join(directory, 'fermi.zip')
+
+            assert batch_export.main([directory, '--zip', output, '--workers', '4', '--istituto', 'fermi']) == 0
+            assert calls == [1]
+            assert batch_export.main([directory, '--zip', output, '--istituto', 'mancante']) == 1
+            assert calls == [1]
+        print("✅ Limite dei processi per istituto corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nel limite dei processi per istituto: {e}")
+        return False
+    finally:
+        tenancy.TENANTS, batch_export.export_zip = original_registry, original_export
+
+
+def test_tenant_cache():
+    """Test della cache PDF dell'istituto con --istituto"""
+    original_registry, original_cache = tenancy.TENANTS, engine.PDF_CACHE
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            registry = TenantRegistry(os.path.join(directory, 'tenants'))
+            registry.create('fermi')
+            tenancy.TENANTS = registry
+            shared = os.path.join(directory, 'cache_condivisa')
+            engine.PDF_CACHE = PDFCache(cache_dir=shared)
+            teachers = os.path.join(directory, 'orari')
+            os.makedirs(teachers)
+            _write_teachers(teachers)
+            output = os.path.join(directory, 'fermi.zip')
+
+            # I PDF dell'istituto finiscono solo nella sua cache
+            assert batch_export.main([teachers, '--zip', output, '--formati', 'tascabile',
+                                      '--workers', '2', '--istituto', 'fermi']) == 0
+            assert not os.path.exists(shared) or os.listdir(shared) == []
+            tenant_cache = registry.get('fermi').pdf_cache.cache_dir
+            assert len([n for n in os.listdir(tenant_cache) if n.endswith('.pdf')]) == 2
+
+            # Senza --istituto si usa la cache condivisa
+            assert batch_export.main([teachers, '--zip', output, '--formati', 'tascabile',
+                                      '--workers', '2']) == 0
+            assert len(os.listdir(shared)) == 2
+        print("✅ Cache PDF dell'istituto separata")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nella cache PDF dell'istituto: {e}")
+        return False
+    finally:
+        tenancy.TENANTS, engine.PDF_CACHE = original_registry, original_cache
+
+
+def main():
+    """Esegue tutti i test dell'esportazione di massa"""
+    print("🧪 Test Esportazione di Massa")
+    print("=" * 40)
+
+    tests = [
+        test_export_zip,
+        test_export_merged,
+        test_tenant_workers,
+        test_tenant_cache
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test dell'esportazione di massa sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test per il libretto PDF dell'istituto
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import schedule_engine as engine
+from booklet import DEFAULT_MAX_PAGES, BookletWriter, write_booklet
+from storage import JSONDirectoryStorage
+
+
+def _storage(directory, teachers, empty=0):
+    storage = JSONDirectoryStorage(directory)
+    for i in range(teachers + empty):
+        schedule_data = engine.default_schedule_data()
+        schedule_data['docente'] = f"Docente {i:02d}"
+        if i < teachers:
+            schedule_data['schedule'] = engine.example_schedule()
+        storage.save(schedule_data)
+    return storage
+
+
+def _page_count(path):
+    with open(path, 'rb') as f:
+        return f.read().count(b'/Type /Page\n')
+
+
+def test_page_booklet():
+    """Test del libretto con una pagina per docente e divisione in volumi"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            storage = _storage(os.path.join(directory, 'orari'), 3, empty=1)
+            output = os.path.join(directory, 'libretto.pdf')
+            messages = []
+            writer, errors = write_booklet(storage, output, 'a4', progress=messages.append)
+            assert writer.files == [output] and _page_count(output) == 3
+            assert len(errors) == 1 and len(messages) == 4
+            assert writer.bytes_written == os.path.getsize(output)
+
+            writer, _ = write_booklet(storage, output, 'standard', max_pages=2,
+                                      progress=lambda m: None)
+            assert [os.path.basename(p) for p in writer.files] == ['libretto_001.pdf',
+                                                                   'libretto_002.pdf']
+            assert [_page_count(p) for p in writer.files] == [2, 1]
+
+            # Un solo volume pieno: il file è quello indicato, senza numero
+            storage = _storage(os.path.join(directory, 'due'), 2)
+            output = os.path.join(directory, 'due.pdf')
+            writer, _ = write_booklet(storage, output, 'standard', max_pages=2,
+                                      progress=lambda m: None)
+            assert writer.files == [output] and _page_count(output) == 2
+
+            # Per default il libretto è diviso in volumi (memoria limitata)
+            assert BookletWriter(output).max_pages == DEFAULT_MAX_PAGES > 0
+        print("✅ Libretto a pagine corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nel libretto a pagine: {e}")
+        return False
+
+
+def test_pocket_cards():
+    """Test delle schede tascabili impaginate 8 per foglio A4"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            storage = _storage(os.path.join(directory, 'orari'), 9)
+            output = os.path.join(directory, 'schede.pdf')
+            writer, errors = write_booklet(storage, output, 'tascabile', progress=lambda m: None)
+            assert not errors and writer.teachers == 9
+            assert writer.pages == 2 and _page_count(output) == 2
+            with open(output, 'rb') as f:
+                assert b'/MediaBox [ 0 0 595.2756 841.8898 ]' in f.read()
+        print("✅ Schede tascabili corrette")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nelle schede tascabili: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test del libretto"""
+    print("🧪 Test Libretto PDF")
+    print("=" * 40)
+
+    tests = [
+        test_page_booklet,
+        test_pocket_cards
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test del libretto sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test per la validazione e la migrazione della configurazione
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import schedule_engine as engine
+from config_schema import SCHEMA_VERSION, ConfigValidationError, normalize_config
+
+
+def test_migrate_old_layout():
+    """Test della migrazione di un file della versione 1"""
+    try:
+        old = {
+            'docente': 'Mario Rossi',
+            'giorni_settimana': ['LUN', 'MAR'],
+            'giorno_libero': 'DOM',
+            'ore_attive': ['2', 1, 7],
+            'orari': {1: {'dalle': '8:00', 'alle': '09:00'}},
+            'schedule': {'LUN': {1: '3C', '2': {'classe': '4A', 'aula': None}}},
+        }
+        data = normalize_config(old)
+        assert data['versione_schema'] == SCHEMA_VERSION
+        assert data['ore_attive'] == [1, 2, 7]
+        assert data['orari']['1'] == {'dalle': '08:00', 'alle': '09:00'}
+        assert data['orari']['2'] == engine.DEFAULT_ORARI['2']
+        assert data['orari']['7'] == {'dalle': '14:15', 'alle': '15:15'}
+        assert data['schedule']['LUN']['1'] == {'classe': '3C', 'edificio': '', 'piano': '', 'aula': ''}
+        assert data['schedule']['LUN']['2']['aula'] == ''
+        assert data['anno_scolastico'] == engine.ANNO_SCOLASTICO_DEFAULT
+
+        # Il file normalizzato si rende senza controlli aggiuntivi
+        header, rows = engine.build_table_rows(data)
+        assert header == ["Giorno", "1ª", "2ª", "7ª"] and rows[0][1].startswith("**08:00-09:00**")
+
+        # La normalizzazione è idempotente
+        assert normalize_config(json.loads(json.dumps(data))) == data
+        print("✅ Migrazione corretta")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nella migrazione: {e}")
+        return False
+
+
+def test_invalid_config():
+    """Test degli errori con il percorso del campo non valido"""
+    try:
+        cases = [
+            ([], '$'),
+            (dict(engine.default_schedule_data(), giorno_libero='XYZ'), 'giorno_libero'),
+            (dict(engine.default_schedule_data(), ore_attive=[1, 'due']), 'ore_attive[1]'),
+            (dict(engine.default_schedule_data(), orari={'1': {'dalle': '25:00', 'alle': '09:15'}}),
+             'orari.1.dalle'),
+            (dict(engine.default_schedule_data(), schedule={'LUN': {'3': ['2A']}}), 'schedule.LUN.3'),
+            (dict(engine.default_schedule_data(), versione_schema=99), 'versione_schema'),
+        ]
+        for data, path in cases:
+            try:
+                normalize_config(data)
+            except ConfigValidationError as e:
+                assert e.path == path, (e.path, path)
+            else:
+                raise AssertionError(f"nessun errore per {path}")
+
+        # load_config normalizza il file salvato
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'config.json')
+            with open(path, 'w') as f:
+                json.dump({'docente': 'Anna', 'schedule': {}}, f)
+            data = engine.load_config(path)
+            assert data['ore_attive'] == [1, 2, 3, 4, 5, 6] and data['orari']['6']
+        print("✅ Errori di validazione corretti")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nella validazione: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test dello schema"""
+    print("🧪 Test Schema Configurazione")
+    print("=" * 40)
+
+    tests = [
+        test_migrate_old_layout,
+        test_invalid_config
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test dello schema sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
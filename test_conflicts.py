@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test per l'indice dei conflitti di aula e classe
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conflicts import ConflictIndex, AULA, CLASSE, indexes_by_institute
+from storage import JSONDirectoryStorage, SQLiteStorage
+
+
+def _lesson(classe, edificio, aula, piano='PT'):
+    return {'classe': classe, 'edificio': edificio, 'piano': piano, 'aula': aula}
+
+
+def test_conflict_detection():
+    """Test dei conflitti di aula e classe e del loro aggiornamento"""
+    try:
+        index = ConflictIndex()
+        index.set_teacher('Rossi', {'LUN': {'3': _lesson('2Esa', 'MB', 'A15'),
+                                            '4': {'classe': 'DISP.', 'edificio': '',
+                                                  'piano': '', 'aula': ''}}})
+        index.set_teacher('Bianchi', {'LUN': {'3': _lesson('1Asp', 'mb', 'a15 ', piano='1P'),
+                                              '4': {'classe': 'DISP.', 'edificio': '',
+                                                    'piano': '', 'aula': ''}}})
+
+        # Stessa aula (maiuscole, spazi e piano diversi), DISP. ignorato
+        conflicts = index.conflicts()
+        assert len(conflicts) == 1
+        assert conflicts[0].tipo == AULA and conflicts[0].docenti == ['Bianchi', 'Rossi']
+
+        # Controllo di uno slot non ancora salvato
+        found = index.check_slot('Verdi', 'LUN', 3, _lesson('2Esa', 'C', 'A43'))
+        assert [c.tipo for c in found] == [CLASSE]
+        assert index.check_slot('Rossi', 'LUN', 3, _lesson('2Esa', 'MB', 'A15')) != []
+        assert index.check_slot('Verdi', 'LUN', 5, _lesson('2Esa', 'MB', 'A15')) == []
+
+        # Aggiornamento incrementale: spostando Bianchi il conflitto sparisce
+        index.update_slot('Bianchi', 'LUN', '3', _lesson('1Asp', 'C', 'A43'))
+        assert index.conflicts() == []
+        index.update_slot('Bianchi', 'LUN', '3', _lesson('1Asp', 'MB', 'A15'))
+        assert len(index.conflicts_for('Rossi')) == 1
+        index.remove_teacher('Bianchi')
+        assert index.conflicts() == [] and index.teachers() == ['Rossi']
+        print("✅ Rilevamento dei conflitti corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nel rilevamento dei conflitti: {e}")
+        return False
+
+
+def test_institute_validation():
+    """Test della validazione di un istituto da archivio SQLite"""
+    try:
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+        from synthetic import synthetic_schedules
+
+        with tempfile.TemporaryDirectory() as directory:
+            storage = SQLiteStorage(os.path.join(directory, 'orari.db'))
+            for schedule_data in synthetic_schedules(150, seed=1):
+                storage.save(schedule_data)
+
+            start = time.perf_counter()
+            indexes = indexes_by_institute(storage)
+            conflicts = [c for index in indexes.values() for c in index.conflicts()]
+            elapsed = time.perf_counter() - start
+            storage.close()
+
+        assert len(indexes) == 1 and len(next(iter(indexes.values()))) == 150
+        assert conflicts and all(len(c.docenti) > 1 for c in conflicts)
+        assert elapsed < 1.0, f"validazione in {elapsed:.2f}s"
+        print(f"✅ Validazione di 150 docenti in {elapsed * 1000:.0f} ms")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nella validazione dell'istituto: {e}")
+        return False
+
+
+def test_same_name_records():
+    """Test di due record dell'archivio con lo stesso nome di docente"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            # Due file dello stesso docente: la stessa aula alla stessa ora è un conflitto
+            for teacher_id, aula in (('rossi_a', 'A15'), ('rossi_b', 'a15')):
+                schedule_data = {'docente': 'Rossi', 'istituto': 'IIS Test', 'anno_scolastico': '2025/2026',
+                                 'schedule': {'LUN': {'3': _lesson('2Esa', 'MB', aula)}}}
+                with open(os.path.join(directory, f"{teacher_id}.json"), 'w') as f:
+                    json.dump(schedule_data, f)
+            storage = JSONDirectoryStorage(directory)
+            index = ConflictIndex.from_storage(storage, 'IIS Test', '2025/2026')
+            assert index.teachers() == ['rossi_a', 'rossi_b']
+            conflicts = index.conflicts()
+            assert [c.tipo for c in conflicts] == [AULA, CLASSE]
+            assert conflicts[0].docenti == ['Rossi', 'Rossi']
+            assert len(index.conflicts_for('rossi_b')) == 2
+            assert len(indexes_by_institute(storage)[('IIS Test', '2025/2026')].conflicts()) == 2
+
+        # Rinominare un docente non crea conflitti con le sue vecchie lezioni
+        index = ConflictIndex()
+        index.set_teacher(1, {'LUN': {'3': _lesson('2Esa', 'MB', 'A15')}}, 'Rossi')
+        index.set_teacher(1, {'LUN': {'3': _lesson('2Esa', 'MB', 'A15')}}, 'Mario Rossi')
+        assert index.check_slot(1, 'LUN', 3, _lesson('2Esa', 'MB', 'A15'), 'Mario Rossi') == []
+        found = index.check_slot(None, 'LUN', 3, _lesson('2Esa', 'MB', 'A15'), 'Verdi')
+        assert found[0].docenti == ['Mario Rossi', 'Verdi']
+        print("✅ Record con lo stesso nome separati")
+        return True
+    except Exception as e:
+        print(f"❌ Errore con record con lo stesso nome: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test dei conflitti"""
+    print("🧪 Test Conflitti di Aula e Classe")
+    print("=" * 40)
+
+    tests = [
+        test_conflict_detection,
+        test_institute_validation,
+        test_same_name_records
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test dei conflitti sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
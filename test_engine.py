@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test per il motore di rendering indipendente da Streamlit
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _sample_schedule_data():
+    import schedule_engine as engine
+    schedule_data = engine.default_schedule_data()
+    schedule_data['schedule'] = engine.example_schedule()
+    return schedule_data
+
+
+def test_engine_without_streamlit():
+    """Test che il motore non importi Streamlit"""
+    try:
+        import subprocess
+        codice = "import sys, schedule_engine; sys.exit('streamlit' in sys.modules)"
+        result = subprocess.run([sys.executable, '-c', codice],
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        assert result.returncode == 0
+        print("✅ Motore importabile senza Streamlit")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nell'importazione del motore: {e}")
+        return False
+
+
+def test_table_rows():
+    """Test della costruzione delle righe nei tre formati"""
+    try:
+        import schedule_engine as engine
+        schedule_data = _sample_schedule_data()
+
+        header, rows = engine.build_table_rows(schedule_data, False, "Standard")
+        assert header == ["Giorno", "1ª", "2ª", "3ª", "4ª", "5ª", "6ª"]
+        assert [row[0] for row in rows] == ['LUN', 'MAR', 'MER', 'GIO', 'VEN', 'SAB']
+        assert rows[0][3] == "**10:15-11:15**\n2Esa\n📍 MB PT A15"
+        assert rows[1][1] == "DISP."
+
+        _, rows = engine.build_table_rows(schedule_data, False, "Compatto")
+        assert rows[0][3] == "**10:15-11:15** 2Esa 📍MB PT A15"
+
+        _, rows = engine.build_table_rows(schedule_data, False, "Tascabile")
+        assert rows[0][3] == "10:15-11:15 2Esa MB PT A15"
+
+        # Giorno libero escluso dalla tabella
+        schedule_data['giorno_libero'] = 'MAR'
+        _, rows = engine.build_table_rows(schedule_data)
+        assert 'MAR' not in [row[0] for row in rows]
+
+        markdown = engine.build_markdown_table(["Giorno", "1ª"], [["LUN", "a\nb"]])
+        assert markdown == "| Giorno | 1ª |\n| --- | --- |\n| LUN | a<br/>b |\n"
+        print("✅ Righe della tabella corrette")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nelle righe della tabella: {e}")
+        return False
+
+
+def test_cached_table():
+    """Test della memoizzazione delle righe e della tabella Markdown"""
+    try:
+        import schedule_engine as engine
+        from pdf_cache import schedule_hash
+        schedule_data = _sample_schedule_data()
+
+        first = engine.cached_table(schedule_data, False, "Compatto")
+        assert engine.cached_table(schedule_data, False, "Compatto") is first
+        assert engine.cached_table(schedule_data, True, "Compatto") is not first
+
+        header, rows = engine.build_table_rows(schedule_data, False, "Compatto")
+        assert list(first[0]) == header and [list(r) for r in first[1]] == rows
+        assert first[2] == engine.build_markdown_table(header, rows)
+
+        engine.invalidate_table_cache(schedule_hash(schedule_data))
+        assert engine.cached_table(schedule_data, False, "Compatto") is not first
+
+        schedule_data['schedule']['LUN']['3']['aula'] = 'A99'
+        assert 'A99' in engine.cached_table(schedule_data, False, "Compatto")[2]
+        print("✅ Memoizzazione della tabella corretta")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nella memoizzazione della tabella: {e}")
+        return False
+
+
+def test_changed_slots():
+    """Test delle righe dell'editor a griglia e delle sole ore modificate"""
+    try:
+        import schedule_engine as engine
+        schedule_data = _sample_schedule_data()
+
+        rows = engine.day_rows(schedule_data, 'LUN')
+        assert len(rows) == 6 and rows[0] == engine.empty_slot()
+        assert rows[2] == {'classe': '2Esa', 'edificio': 'MB', 'piano': 'PT', 'aula': 'A15'}
+        assert engine.changed_slots(schedule_data, 'LUN', rows) == {}
+
+        rows[2]['aula'] = 'A16'
+        rows[3]['classe'] = None  # cella svuotata nell'editor
+        changes = engine.changed_slots(schedule_data, 'LUN', rows)
+        assert list(changes) == ['3', '4']
+        assert changes['3']['aula'] == 'A16' and changes['4']['classe'] == ''
+        print("✅ Modifiche dell'editor a griglia corrette")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nelle modifiche dell'editor a griglia: {e}")
+        return False
+
+
+def test_pdf_styles():
+    """Test che gli stili PDF siano precalcolati una volta per formato"""
+    try:
+        import schedule_engine as engine
+        for format_type, settings in engine.PDF_FORMATS.items():
+            styles = engine.pdf_styles(format_type)
+            assert engine.pdf_styles(format_type) is styles
+            assert styles.body.fontSize == settings['font_size']
+            assert styles.body.leading == settings['leading']
+        assert engine.pdf_styles('a4').table is not engine.pdf_styles('standard').table
+        assert engine.title_row_count('tascabile') == 1
+        print("✅ Stili PDF precalcolati corretti")
+        return True
+    except Exception as e:
+        print(f"❌ Errore negli stili PDF precalcolati: {e}")
+        return False
+
+
+def test_render_pdf():
+    """Test della generazione PDF nei tre formati"""
+    try:
+        import schedule_engine as engine
+        schedule_data = _sample_schedule_data()
+
+        for format_type in engine.PDF_FORMATS:
+            pdf_data = engine.render_pdf(schedule_data, format_type)
+            assert pdf_data.startswith(b'%PDF')
+
+        vuoto = engine.default_schedule_data()
+        try:
+            engine.render_pdf(vuoto, 'standard')
+            assert False, "EmptyScheduleError attesa"
+        except engine.EmptyScheduleError:
+            pass
+        print("✅ Generazione PDF del motore corretta")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nella generazione PDF del motore: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test del motore"""
+    print("🧪 Test Motore di Rendering")
+    print("=" * 40)
+
+    tests = [
+        test_engine_without_streamlit,
+        test_table_rows,
+        test_cached_table,
+        test_changed_slots,
+        test_pdf_styles,
+        test_render_pdf
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test del motore sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
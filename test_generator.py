@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test per il generatore automatico dell'orario
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+from config_schema import normalize_config
+from conflicts import ConflictIndex
+import generator
+from generator import GeneratorError, Problem, Solver, build_schedules, generate
+from storage import JSONDirectoryStorage
+from synthetic import synthetic_problem
+
+
+def test_incremental_cost():
+    """Test del costo incrementale rispetto al ricalcolo completo"""
+    try:
+        problem = Problem(synthetic_problem(8, seed=1))
+        solver = Solver(problem, seed=3)
+        assert (solver.hard, solver.soft) == solver.recompute()
+        solver.run(max_iterations=20000, time_limit=0)
+        assert (solver.hard, solver.soft) == solver.recompute()
+        assert all(s in problem.allowed[problem.unit_teacher[u]] for u, s in enumerate(solver.slot))
+
+        data = synthetic_problem(2)
+        data['docenti'][0]['ore_attive'] = [1]
+        try:
+            Problem(data)
+        except GeneratorError as e:
+            assert data['docenti'][0]['docente'] in str(e)
+        else:
+            raise AssertionError("docente sovraccarico non segnalato")
+        print("✅ Costo incrementale corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nel costo incrementale: {e}")
+        return False
+
+
+def test_generated_schedules():
+    """Test degli orari generati: nessun conflitto e formato di config_orario.json"""
+    try:
+        problem = Problem(synthetic_problem(12))
+        messages = []
+        solution = generate(problem, processes=1, time_limit=30, max_iterations=60000,
+                            progress=messages.append)
+        assert solution.hard == 0
+
+        schedules = build_schedules(problem, solution)
+        index = ConflictIndex()
+        for schedule_data, teacher in zip(schedules, problem.data['docenti']):
+            normalize_config(schedule_data)
+            lessons = [slot for day in schedule_data['schedule'].values()
+                       for slot in day.values() if slot['classe']]
+            expected = sum(l['ore'] for l in problem.data['lezioni']
+                           if l['docente'] == teacher['docente'])
+            assert len(lessons) == expected
+            libero = schedule_data['schedule'][teacher['giorno_libero']]
+            assert not any(slot['classe'] for slot in libero.values())
+            index.set_teacher(schedule_data['docente'], schedule_data['schedule'])
+        assert index.conflicts() == []
+
+        with tempfile.TemporaryDirectory() as directory:
+            storage = JSONDirectoryStorage(directory)
+            for schedule_data in schedules:
+                storage.save(schedule_data)
+            assert len(storage.list_teachers()) == len(problem.teachers)
+        print("✅ Orari generati corretti")
+        return True
+    except Exception as e:
+        print(f"❌ Errore negli orari generati: {e}")
+        return False
+
+
+def test_conflicts_not_saved():
+    """Test dell'archivio lasciato invariato se restano conflitti"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'problema.json')
+            # Bianchi e Verdi possono solo alla 1ª ora: Rossi deve avere 1A e 1B alla 2ª
+            data = {'giorni': ['LUN'], 'ore': [1, 2],
+                    'classi': [{'classe': '1A', 'edificio': 'MA', 'piano': 'PT', 'aula': 'A1'},
+                               {'classe': '1B', 'edificio': 'MA', 'piano': 'PT', 'aula': 'A2'}],
+                    'docenti': [{'docente': 'Rossi'},
+                                {'docente': 'Bianchi', 'ore_attive': [1]},
+                                {'docente': 'Verdi', 'ore_attive': [1]}],
+                    'lezioni': [{'classe': '1A', 'docente': 'Rossi', 'ore': 1},
+                                {'classe': '1B', 'docente': 'Rossi', 'ore': 1},
+                                {'classe': '1A', 'docente': 'Bianchi', 'ore': 1},
+                                {'classe': '1B', 'docente': 'Verdi', 'ore': 1}]}
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            archive = os.path.join(directory, 'orari')
+            args = [path, archive, '--processi', '1', '--iterazioni', '200', '--tempo', '5']
+
+            assert generator.main(args) == 1
+            assert JSONDirectoryStorage(archive).list_teachers() == []
+            assert generator.main(args + ['--salva-con-conflitti']) == 1
+            assert len(JSONDirectoryStorage(archive).list_teachers()) == 3
+        print("✅ Orari con conflitti non salvati")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nel salvataggio con conflitti: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test del generatore"""
+    print("🧪 Test Generatore Orario")
+    print("=" * 40)
+
+    tests = [
+        test_incremental_cost,
+        test_generated_schedules,
+        test_conflicts_not_saved
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test del generatore sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
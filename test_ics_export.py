@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test per l'esportazione iCalendar
+"""
+
+import sys
+import os
+from datetime import date, datetime, timezone
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import schedule_engine as engine
+from ics_export import SchoolYearError, build_ics, cached_ics, easter, school_holidays, school_year
+from pdf_cache import PDFCache
+
+
+def _schedule_data():
+    schedule_data = engine.default_schedule_data()
+    schedule_data['schedule'] = engine.example_schedule()
+    return schedule_data
+
+
+def _unfold(text):
+    return text.replace('\r\n ', '')
+
+
+def test_holidays():
+    """Test del calcolo della Pasqua e delle vacanze"""
+    try:
+        assert easter(2024) == date(2024, 3, 31)
+        assert easter(2026) == date(2026, 4, 5)
+        holidays = school_holidays('2025/2026')
+        assert date(2025, 12, 8) in holidays and date(2026, 1, 6) in holidays
+        assert date(2026, 4, 2) in holidays and date(2026, 4, 7) in holidays
+        assert date(2026, 4, 8) not in holidays and date(2026, 1, 7) not in holidays
+
+        # Anno scolastico scritto liberamente
+        assert school_holidays('2025-26') == holidays
+        assert school_year(' 2025 - 2026 ') == school_year('2025/2026')
+        try:
+            school_year('A.S. corrente')
+            raise AssertionError("anno scolastico non valido accettato")
+        except SchoolYearError:
+            pass
+        print("✅ Vacanze corrette")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nelle vacanze: {e}")
+        return False
+
+
+def test_recurring_events():
+    """Test degli eventi ricorrenti con eccezioni e righe spezzate"""
+    try:
+        schedule_data = _schedule_data()
+        now = datetime(2025, 9, 1, tzinfo=timezone.utc)
+        text = build_ics(schedule_data, now=now)
+        assert text.startswith("BEGIN:VCALENDAR\r\n") and text.endswith("END:VCALENDAR\r\n")
+        assert all(len(line.encode('utf-8')) <= 75 for line in text.split('\r\n'))
+
+        events = _unfold(text).split("BEGIN:VEVENT\r\n")[1:]
+        lessons = sum(1 for giorno in engine.active_days(schedule_data)
+                      for slot in schedule_data['schedule'][giorno].values()
+                      if slot.get('classe') not in ('', '—'))
+        assert len(events) == lessons
+
+        monday = next(e for e in events if 'DTSTART;TZID=Europe/Rome:20250915T101500' in e)
+        assert 'DTEND;TZID=Europe/Rome:20250915T111500' in monday
+        assert 'RRULE:FREQ=WEEKLY;BYDAY=MO;UNTIL=20260610T235959Z' in monday
+        assert 'SUMMARY:2Esa MB PT A15' in monday
+        assert '20251208T101500' in monday and '20260406T101500' in monday
+
+        # UID stabili: stesso orario, stessi eventi
+        assert build_ics(schedule_data, now=now) == text
+        # Periodo personalizzato
+        short = build_ics(schedule_data, date(2025, 9, 10), date(2025, 10, 31), now=now)
+        assert 'UNTIL=20251031T235959Z' in short and 'EXDATE' not in short
+        print("✅ Eventi ricorrenti corretti")
+        return True
+    except Exception as e:
+        print(f"❌ Errore negli eventi ricorrenti: {e}")
+        return False
+
+
+def test_cached_feed():
+    """Test del feed rigenerato solo quando cambia l'orario"""
+    try:
+        cache = PDFCache(cache_dir=None)
+        schedule_data = _schedule_data()
+        data, from_cache = cached_ics(schedule_data, cache=cache)
+        assert not from_cache and data.startswith(b'BEGIN:VCALENDAR')
+        assert cached_ics(schedule_data, cache=cache) == (data, True)
+
+        schedule_data['schedule']['LUN']['3']['aula'] = 'A16'
+        changed, from_cache = cached_ics(schedule_data, cache=cache)
+        assert not from_cache and b'A16' in changed
+        print("✅ Feed in cache corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nel feed in cache: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test del calendario"""
+    print("🧪 Test Calendario ICS")
+    print("=" * 40)
+
+    tests = [
+        test_holidays,
+        test_recurring_events,
+        test_cached_feed
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test del calendario sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
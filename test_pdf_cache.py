@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test per la cache dei PDF generati
+"""
+
+import sys
+import os
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pdf_cache
+from pdf_cache import PDFCache, pdf_cache_key
+
+
+def _sample_schedule_data():
+    return {
+        'docente': 'Docente Test',
+        'giorni_settimana': ['LUN', 'MAR'],
+        'ore_attive': [1, 2],
+        'orari': {
+            '1': {'dalle': '08:15', 'alle': '09:15'},
+            '2': {'dalle': '09:15', 'alle': '10:15'}
+        },
+        'schedule': {
+            'LUN': {'1': {'classe': '1A', 'edificio': 'A', 'piano': 'PT', 'aula': 'A1'}}
+        }
+    }
+
+
+def test_cache_key():
+    """Test che la chiave dipenda da contenuto e formato, non dall'ordine delle chiavi"""
+    try:
+        data = _sample_schedule_data()
+        riordinato = dict(reversed(list(data.items())))
+        assert pdf_cache_key(data, 'standard') == pdf_cache_key(riordinato, 'standard')
+        assert pdf_cache_key(data, 'standard') != pdf_cache_key(data, 'tascabile')
+
+        modificato = _sample_schedule_data()
+        modificato['schedule']['LUN']['1']['aula'] = 'A2'
+        assert pdf_cache_key(data, 'a4') != pdf_cache_key(modificato, 'a4')
+        print("✅ Chiave di cache corretta")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nella chiave di cache: {e}")
+        return False
+
+
+def test_memory_and_disk_tiers():
+    """Test che i PDF vengano serviti dalla memoria e, dopo un riavvio, dal disco"""
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = PDFCache(cache_dir=cache_dir)
+            assert cache.get('k1') is None
+            cache.put('k1', b'%PDF-1')
+            assert cache.get('k1') == b'%PDF-1'
+
+            # Nuovo processo simulato: memoria vuota, disco condiviso
+            altro = PDFCache(cache_dir=cache_dir)
+            assert altro.get('k1') == b'%PDF-1'
+            assert altro.hits == 1
+        print("✅ Livelli memoria e disco funzionano correttamente")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nei livelli di cache: {e}")
+        return False
+
+
+def test_eviction():
+    """Test dell'eviction per dimensione e per età"""
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = PDFCache(cache_dir=None, max_memory_bytes=10)
+            cache.put('a', b'12345')
+            cache.put('b', b'67890')
+            cache.put('c', b'abcde')
+            assert cache.get('a') is None
+            assert cache.get('c') == b'abcde'
+
+            cache = PDFCache(cache_dir=cache_dir, max_disk_bytes=10)
+            cache.put('a', b'12345')
+            os.utime(os.path.join(cache_dir, 'a.pdf'), (1, 1))
+            cache.put('b', b'67890')
+            cache.put('c', b'abcde')
+            assert not os.path.exists(os.path.join(cache_dir, 'a.pdf'))
+
+            # LRU su disco: un file letto di recente resta, anche se scritto per primo
+            cache = PDFCache(cache_dir=cache_dir, max_memory_bytes=0, max_disk_bytes=10)
+            now = time.time()
+            for name in os.listdir(cache_dir):
+                os.remove(os.path.join(cache_dir, name))
+            cache.put('a', b'12345')
+            cache.put('b', b'67890')
+            os.utime(os.path.join(cache_dir, 'a.pdf'), (now - 200, now - 200))
+            os.utime(os.path.join(cache_dir, 'b.pdf'), (now - 100, now - 100))
+            assert cache.get('a') == b'12345'
+            cache.put('c', b'abcde')
+            assert os.path.exists(os.path.join(cache_dir, 'a.pdf'))
+            assert not os.path.exists(os.path.join(cache_dir, 'b.pdf'))
+
+            # Anche una lettura servita dalla memoria aggiorna l'ultimo uso su disco
+            cache = PDFCache(cache_dir=cache_dir, max_disk_bytes=10)
+            for name in os.listdir(cache_dir):
+                os.remove(os.path.join(cache_dir, name))
+            cache.put('a', b'12345')
+            cache.put('b', b'67890')
+            os.utime(os.path.join(cache_dir, 'a.pdf'), (now - 200, now - 200))
+            os.utime(os.path.join(cache_dir, 'b.pdf'), (now - 100, now - 100))
+            assert cache.get('a') == b'12345' and cache.misses == 0
+            assert os.path.getmtime(os.path.join(cache_dir, 'a.pdf')) == now - 200
+            cache.put('c', b'abcde')
+            assert sorted(os.listdir(cache_dir)) == ['a.pdf', 'c.pdf']
+
+            # La cartella viene scandita solo oltre il limite, non a ogni scrittura
+            scans = []
+            original = pdf_cache.os.scandir
+            def counting_scandir(path):
+                scans.append(path)
+                return original(path)
+            pdf_cache.os.scandir = counting_scandir
+            try:
+                cache = PDFCache(cache_dir=cache_dir, max_disk_bytes=1000)
+                for i in range(50):
+                    cache.put(f"n{i}", b'x' * 10)
+                assert len(scans) == 1
+                for i in range(50, 60):
+                    cache.put(f"n{i}", b'x' * 100)
+                assert 1 < len(scans) < 10
+            finally:
+                pdf_cache.os.scandir = original
+            total = sum(os.path.getsize(os.path.join(cache_dir, n)) for n in os.listdir(cache_dir))
+            assert total <= 1000
+
+            # Scrittura fallita: nessun file temporaneo rimasto
+            original = pdf_cache.os.replace
+            def failing_replace(src, dst):
+                raise OSError("disco pieno")
+            pdf_cache.os.replace = failing_replace
+            try:
+                cache.put('e', b'fghij')
+            finally:
+                pdf_cache.os.replace = original
+            assert not [n for n in os.listdir(cache_dir) if n.endswith('.tmp')]
+
+            cache = PDFCache(cache_dir=cache_dir, max_age=0)
+            cache.put('d', b'vecchio')
+            assert cache.get('d') is None
+        print("✅ Eviction per dimensione ed età corretta")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nell'eviction: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test della cache PDF"""
+    print("🧪 Test Cache PDF")
+    print("=" * 40)
+
+    tests = [
+        test_cache_key,
+        test_memory_and_disk_tiers,
+        test_eviction
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test della cache PDF sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
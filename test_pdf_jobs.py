@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test per la coda asincrona dei PDF
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pdf_jobs
+import schedule_engine as engine
+from pdf_cache import PDFCache
+from pdf_jobs import PDFJobQueue, COMPLETATO, ERRORE
+from tenancy import Tenant
+
+
+def _sample_schedule_data():
+    schedule_data = engine.default_schedule_data()
+    schedule_data['schedule'] = engine.example_schedule()
+    return schedule_data
+
+
+def test_job_lifecycle():
+    """Test che un job venga completato e il PDF finisca in cache"""
+    try:
+        cache = PDFCache(cache_dir=None)
+        queue = PDFJobQueue(max_workers=1, executor='thread', cache=cache)
+        job = queue.submit(_sample_schedule_data(), 'tascabile')
+        assert queue.get(job.id) is job
+        assert job.wait(60)
+        assert job.status == COMPLETATO and job.pdf_data.startswith(b'%PDF')
+
+        # Seconda richiesta: servita subito dalla cache
+        again = queue.submit(_sample_schedule_data(), 'tascabile')
+        assert again.done() and again.from_cache and again.pdf_data == job.pdf_data
+
+        empty = queue.submit(engine.default_schedule_data(), 'standard')
+        assert empty.wait(60) and empty.empty and empty.pdf_data is None
+        queue.shutdown()
+        print("✅ Ciclo di vita dei job corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nel ciclo di vita dei job: {e}")
+        return False
+
+
+def test_job_coalescing():
+    """Test che richieste uguali in corso condividano lo stesso job"""
+    try:
+        release = threading.Event()
+        original = pdf_jobs._render
+
+        def slow_render(schedule_data, format_type):
+            release.wait(10)
+            return original(schedule_data, format_type)
+
+        pdf_jobs._render = slow_render
+        try:
+            queue = PDFJobQueue(max_workers=2, executor='thread', cache=PDFCache(cache_dir=None))
+            first = queue.submit(_sample_schedule_data(), 'a4')
+            second = queue.submit(_sample_schedule_data(), 'a4')
+            other = queue.submit(_sample_schedule_data(), 'standard')
+            assert first is second and first is not other
+            assert not first.done()
+            release.set()
+            assert first.wait(60) and other.wait(60)
+            queue.shutdown()
+        finally:
+            pdf_jobs._render = original
+        print("✅ Coalescenza delle richieste corretta")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nella coalescenza delle richieste: {e}")
+        return False
+
+
+def test_executor_failure():
+    """Test che un pool non più utilizzabile non lasci job appesi"""
+    try:
+        cache = PDFCache(cache_dir=None)
+        tenant = Tenant('fermi', settings={'limiti': {'pdf_concorrenti': 1}}, pdf_cache=cache)
+        queue = PDFJobQueue(max_workers=1, executor='thread', cache=cache)
+        queue.shutdown()
+
+        job = queue.submit(_sample_schedule_data(), 'tascabile', tenant=tenant)
+        assert job.wait(5) and job.status == ERRORE and 'RuntimeError' in job.error
+        # Il posto dell'istituto è stato liberato e la richiesta non resta in volo
+        assert queue._running[tenant.id] == 0 and not queue._inflight
+        again = queue.submit(_sample_schedule_data(), 'tascabile', tenant=tenant)
+        assert again is not job and again.wait(5) and again.status == ERRORE
+        assert queue.pending(tenant.id) == 0
+        print("✅ Errore del pool gestito")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nella gestione del pool non disponibile: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test della coda PDF"""
+    print("🧪 Test Coda PDF")
+    print("=" * 40)
+
+    tests = [
+        test_job_lifecycle,
+        test_job_coalescing,
+        test_executor_failure
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test della coda PDF sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
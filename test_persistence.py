@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test per il salvataggio incrementale della configurazione
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from persistence import ChangeTracker, ConfigStore, atomic_write_json
+
+
+def _base_config():
+    return {
+        'docente': 'Docente Test',
+        'orari': {'1': {'dalle': '08:15', 'alle': '09:15'}},
+        'schedule': {'LUN': {'1': {'classe': '', 'edificio': '', 'piano': '', 'aula': ''}}}
+    }
+
+
+def test_change_tracker():
+    """Test che il tracker raccolga solo l'ultimo valore di ogni modifica"""
+    try:
+        tracker = ChangeTracker()
+        assert not tracker
+        tracker.field('docente', 'A')
+        tracker.field('docente', 'B')
+        tracker.slot('LUN', 1, {'classe': '1A'})
+        tracker.slot('LUN', '1', {'classe': '2A'})
+        tracker.slot('MAR', 2, {'classe': '3A'})
+        assert len(tracker) == 3
+        assert tracker.dirty_days == {'LUN', 'MAR'}
+
+        records = tracker.drain()
+        assert records[0] == {'t': 'set', 'k': 'docente', 'v': 'B'}
+        assert {'t': 'slot', 'g': 'LUN', 'o': '1', 'v': {'classe': '2A'}} in records
+        assert not tracker
+        print("✅ Tracker delle modifiche corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nel tracker delle modifiche: {e}")
+        return False
+
+
+def test_journal_and_compaction():
+    """Test di journal, ricaricamento e compattazione"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'config.json')
+            store = ConfigStore(path, compact_threshold=1000)
+
+            # Senza snapshot la prima modifica scrive la configurazione completa
+            tracker = ChangeTracker()
+            tracker.field('docente', 'Docente Test')
+            store.flush(tracker, _base_config())
+            assert store.load() == _base_config()
+            assert not os.path.exists(store.journal_path)
+
+            tracker.slot('LUN', 1, {'classe': '1A', 'edificio': 'A', 'piano': 'PT', 'aula': 'A1'})
+            tracker.field('docente', 'Nuovo Docente')
+            store.flush(tracker)
+            with open(path) as f:
+                assert json.load(f) == _base_config()  # snapshot non riscritto
+
+            loaded = ConfigStore(path).load()
+            assert loaded['docente'] == 'Nuovo Docente'
+            assert loaded['schedule']['LUN']['1']['classe'] == '1A'
+
+            # Riga troncata da un crash: i record successivi restano validi
+            with open(store.journal_path, 'a') as f:
+                f.write('{"t":"set","k":"doc')
+            tracker.field('materie', 'Fisica')
+            store.flush(tracker)
+            assert store.load()['materie'] == 'Fisica'
+
+            store.compact()
+            assert not os.path.exists(store.journal_path)
+            with open(path) as f:
+                assert json.load(f) == loaded | {'materie': 'Fisica'}
+        print("✅ Journal e compattazione funzionano correttamente")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nel journal: {e}")
+        return False
+
+
+def test_background_compaction():
+    """Test della compattazione automatica oltre la soglia"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'config.json')
+            atomic_write_json(_base_config(), path)
+            store = ConfigStore(path, compact_threshold=3)
+            for i in range(3):
+                store.append([{'t': 'set', 'k': 'versione', 'v': i}])
+            store.compact_async().join()
+            assert not os.path.exists(store.journal_path)
+            with open(path) as f:
+                assert json.load(f)['versione'] == 2
+            assert [n for n in os.listdir(directory) if n.startswith('.tmp_')] == []
+        print("✅ Compattazione in background corretta")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nella compattazione in background: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test di salvataggio"""
+    print("🧪 Test Salvataggio Incrementale")
+    print("=" * 40)
+
+    tests = [
+        test_change_tracker,
+        test_journal_and_compaction,
+        test_background_compaction
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test di salvataggio sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test per la strumentazione delle fasi di rendering
+"""
+
+import sys
+import os
+import json
+import marshal
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import profiling
+import schedule_engine as engine
+from profiling import StageRegistry
+
+
+def test_stage_histograms():
+    """Test degli istogrammi e delle esportazioni JSON e Prometheus"""
+    try:
+        registry = StageRegistry()
+        for seconds in (0.0004, 0.003, 0.003, 0.2):
+            registry.record('pdf.build', seconds)
+        with registry.capture() as samples:
+            registry.record('display.table', 0.002)
+        assert samples == [('display.table', 0.002)]
+
+        stats = registry.snapshot()['pdf.build']
+        assert stats['count'] == 4 and abs(stats['sum'] - 0.2064) < 1e-9
+        assert stats['buckets']['0.0005'] == 1 and stats['buckets']['0.005'] == 3
+        assert stats['buckets']['0.25'] == 4 and stats['max'] == 0.2
+        assert list(json.loads(registry.to_json())['stages']) == ['display.table', 'pdf.build']
+
+        text = registry.to_prometheus()
+        assert '# TYPE orario_stage_seconds histogram' in text
+        assert 'orario_stage_seconds_bucket{stage="pdf.build",le="0.005"} 3' in text
+        assert 'orario_stage_seconds_bucket{stage="pdf.build",le="+Inf"} 4' in text
+        assert 'orario_stage_seconds_count{stage="display.table"} 1' in text
+
+        registry.merge([('pdf.build', 0.01)])
+        assert registry.snapshot()['pdf.build']['count'] == 5
+        print("✅ Istogrammi delle fasi corretti")
+        return True
+    except Exception as e:
+        print(f"❌ Errore negli istogrammi delle fasi: {e}")
+        return False
+
+
+def test_render_stages():
+    """Test delle fasi misurate durante la generazione del PDF"""
+    try:
+        schedule_data = engine.default_schedule_data()
+        schedule_data['schedule'] = engine.example_schedule()
+        enabled = profiling.ENABLED
+        try:
+            profiling.enable(False)
+            assert profiling.stage('pdf.build') is profiling.stage('pdf.table_init')
+
+            profiling.enable(True)
+            profiling.REGISTRY.reset()
+            with profiling.REGISTRY.capture() as samples:
+                engine.render_pdf(schedule_data, 'a4')
+            assert [name for name, _ in samples] == ['pdf.styles', 'pdf.paragraphs',
+                                                     'pdf.table_init', 'pdf.build']
+            assert set(profiling.REGISTRY.snapshot()) == {'pdf.styles', 'pdf.paragraphs',
+                                                          'pdf.table_init', 'pdf.build'}
+        finally:
+            profiling.enable(enabled)
+            profiling.REGISTRY.reset()
+
+        pdf_data, prof_data, summary = profiling.profile_call(engine.render_pdf, schedule_data, 'tascabile')
+        assert pdf_data.startswith(b'%PDF')
+        assert any(key[2] == 'render_pdf' for key in marshal.loads(prof_data))
+        assert 'render_pdf' in summary
+        print("✅ Fasi del PDF misurate correttamente")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nelle fasi del PDF: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test della profilazione"""
+    print("🧪 Test Profilazione")
+    print("=" * 40)
+
+    tests = [
+        test_stage_histograms,
+        test_render_stages
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test della profilazione sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test per le differenze tra versioni degli orari e il feed delle modifiche
+"""
+
+import sys
+import os
+import copy
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import schedule_engine as engine
+import schedule_diff
+from schedule_diff import (AGGIUNTO, MODIFICATO, RIMOSSO, DuplicateTeacherError, change_feed, diff_slots,
+                           diff_versions, load_version)
+from storage import JSONDirectoryStorage, teacher_key
+
+
+def _teacher(docente=engine.DOCENTE_DEFAULT):
+    schedule_data = engine.default_schedule_data()
+    schedule_data['docente'] = docente
+    schedule_data['schedule'] = engine.example_schedule()
+    return schedule_data
+
+
+def test_diff():
+    """Test delle differenze slot per slot e del feed"""
+    try:
+        old = _teacher()
+        new = copy.deepcopy(old)
+        assert diff_slots(old['schedule'], new['schedule']) == []
+
+        # Cambio d'aula il lunedì e ora libera il martedì
+        new['schedule']['LUN']['3'] = {'classe': '2Esa', 'edificio': 'MB', 'piano': 'PT', 'aula': 'A99'}
+        new['schedule']['MAR'].pop('1', None)
+        changes = diff_slots(old['schedule'], new['schedule'])
+        assert [(c.giorno, c.ora) for c in changes] == [('LUN', '3'), ('MAR', '1')]
+        assert changes[0].dopo.aula == 'A99' and changes[1].dopo is None
+
+        rossi = _teacher('Mario Rossi')
+        bianchi = _teacher('Anna Bianchi')
+        diffs = diff_versions({teacher_key(old): old, teacher_key(bianchi): bianchi},
+                              {teacher_key(new): new, teacher_key(rossi): rossi})
+        assert [d.stato for d in diffs] == [RIMOSSO, MODIFICATO, AGGIUNTO]
+
+        feed = change_feed(diffs)
+        by_name = {item['docente']: item for item in feed['docenti']}
+        assert by_name['Anna Bianchi']['pdf'] == []
+        assert sorted(by_name['Mario Rossi']['pdf']) == sorted(engine.PDF_FORMATS)
+        modified = by_name[engine.DOCENTE_DEFAULT]
+        assert 'LUN' in modified['giorni'] and 'GIO' not in modified['giorni']
+        assert sorted(modified['pdf']) == sorted(engine.PDF_FORMATS)
+        assert any(a['nome'] == 'MB A99' for a in feed['aule'])
+        json.dumps(feed)
+
+        # Le materie non compaiono nel tascabile; le ore fuori da ore_attive in nessun PDF
+        titled = copy.deepcopy(new)
+        titled['materie'] = 'Matematica'
+        titled['schedule'].setdefault('VEN', {})['9'] = {'classe': '5A', 'edificio': 'MB', 'piano': 'PT',
+                                                         'aula': 'A15'}
+        feed = change_feed(diff_versions({teacher_key(new): new}, {teacher_key(titled): titled}))
+        assert feed['docenti'][0]['pdf'] == ['a4', 'standard']
+        assert feed['docenti'][0]['giorni'] == ['VEN']
+        print("✅ Differenze e feed corretti")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nelle differenze: {e}")
+        return False
+
+
+def test_versions():
+    """Test delle versioni da archivio, istantanea e file di configurazione"""
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            archive = os.path.join(tmp, 'orari')
+            storage = JSONDirectoryStorage(archive)
+            first, second = _teacher(), _teacher('Mario Rossi')
+            storage.save(first)
+            storage.save(second)
+
+            snapshot = os.path.join(tmp, 'foto.json')
+            assert schedule_diff.main([archive, '--salva', snapshot]) == 0
+            assert load_version(snapshot) == load_version(archive)
+
+            second['schedule']['LUN']['3'] = {'classe': '3C', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'}
+            storage.save(second)
+            feed_path = os.path.join(tmp, 'feed.json')
+            assert schedule_diff.main([snapshot, archive, '--feed', feed_path]) == 0
+            with open(feed_path, 'r', encoding='utf-8') as f:
+                feed = json.load(f)
+            assert [item['docente'] for item in feed['docenti']] == ['Mario Rossi']
+            assert feed['docenti'][0]['giorni'] == ['LUN']
+            assert {c['nome'] for c in feed['classi']} >= {'3C'}
+
+            config = os.path.join(tmp, engine.CONFIG_PATH)
+            engine.save_config(first, config)
+            version = load_version(config)
+            assert diff_versions(version, {teacher_key(first): first}) == []
+        print("✅ Versioni da archivio, istantanea e configurazione corrette")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nelle versioni: {e}")
+        return False
+
+
+def test_same_name_records():
+    """Test di due record dell'archivio con la stessa chiave docente"""
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            archive = os.path.join(tmp, 'orari')
+            JSONDirectoryStorage(archive).save(_teacher('Mario Rossi'))
+            # Secondo file dello stesso docente (es. copiato a mano nella cartella)
+            copy_data = _teacher('Mario Rossi')
+            copy_data['schedule']['LUN']['3'] = {'classe': '3C', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'}
+            engine.save_config(copy_data, os.path.join(archive, 'rossi_copia.json'))
+            try:
+                load_version(archive)
+                raise AssertionError("docente omonimo non segnalato")
+            except DuplicateTeacherError as e:
+                assert 'Mario Rossi' in str(e) and 'rossi_copia' in str(e)
+
+            snapshot = os.path.join(tmp, 'foto.json')
+            assert schedule_diff.main([archive, '--salva', snapshot]) == 1
+            assert not os.path.exists(snapshot)
+        print("✅ Docenti omonimi segnalati")
+        return True
+    except Exception as e:
+        print(f"❌ Errore con docenti omonimi: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test delle differenze"""
+    print("🧪 Test Differenze tra Versioni")
+    print("=" * 40)
+
+    tests = [
+        test_diff,
+        test_versions,
+        test_same_name_records
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test delle differenze sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
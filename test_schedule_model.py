@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test per il modello compatto dell'orario
+"""
+
+import sys
+import os
+import gc
+import json
+import pickle
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from schedule_model import Slot, ScheduleGrid, EMPTY_SLOT, compact_schedule_data, expand_schedule_data
+
+
+def test_roundtrip_json():
+    """Test che la conversione da/verso JSON sia senza perdita"""
+    try:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config_orario.json')
+        with open(path) as f:
+            schedule_data = json.load(f)
+
+        grid = ScheduleGrid.from_schedule(schedule_data['schedule'])
+        assert grid.to_schedule() == schedule_data['schedule']
+        assert expand_schedule_data(compact_schedule_data(schedule_data)) == schedule_data
+        assert pickle.loads(pickle.dumps(grid)) == grid
+        print("✅ Conversione JSON senza perdita")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nella conversione JSON: {e}")
+        return False
+
+
+def test_int_and_str_hours():
+    """Test che ore int e str vengano trattate allo stesso modo"""
+    try:
+        schedule = {
+            'LUN': {1: {'classe': '1A', 'edificio': 'A', 'piano': 'PT', 'aula': 'A1'}},
+            'MAR': {'2': {'classe': 'DISP.'}}
+        }
+        grid = ScheduleGrid.from_schedule(schedule)
+        assert grid.hours == ('1', '2')
+        assert grid.get('LUN', 1) is grid.get('LUN', '1')
+        assert grid.get('MAR', 2) == Slot('DISP.')
+        assert grid.get('MAR', 1) is None
+        assert grid.get('DOM', 1) is None
+        assert grid.row('LUN', [1, 2, 3]) == [Slot('1A', 'A', 'PT', 'A1'), None, None]
+        assert [ora for _, ora, _ in grid.iter_lessons()] == ['1']
+        print("✅ Ore int e str gestite correttamente")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nella gestione delle ore: {e}")
+        return False
+
+
+def test_slot_interning():
+    """Test che gli slot uguali siano condivisi e immutabili"""
+    try:
+        a = Slot.from_dict({'classe': '1Asp', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'})
+        b = Slot('1Asp', 'C', '1P', 'A43')
+        assert a is b
+        assert Slot.from_dict({}) is EMPTY_SLOT
+        assert a.location == 'C 1P A43'
+        assert a.is_lesson and not Slot('—').is_lesson
+        try:
+            a.aula = 'A44'
+            assert False, "Slot dovrebbe essere immutabile"
+        except AttributeError:
+            pass
+
+        grid = ScheduleGrid(['LUN'], ['1'])
+        grid.set('MAR', 3, a)
+        assert grid.days == ('LUN', 'MAR') and grid.hours == ('1', '3')
+        assert grid.get('MAR', '3') is a and grid.get('LUN', 3) is None
+
+        # Il pool non trattiene gli slot che nessun orario usa più
+        Slot('9Z', 'Q', '7P', 'Z99')
+        gc.collect()
+        assert ('9Z', 'Q', '7P', 'Z99') not in Slot._pool
+        assert ('1Asp', 'C', '1P', 'A43') in Slot._pool
+        print("✅ Slot condivisi e immutabili")
+        return True
+    except Exception as e:
+        print(f"❌ Errore negli slot: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test del modello"""
+    print("🧪 Test Modello Orario")
+    print("=" * 40)
+
+    tests = [
+        test_roundtrip_json,
+        test_int_and_str_hours,
+        test_slot_interning
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test del modello sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test per la cache degli orari condivisa tra le sessioni
+"""
+
+import sys
+import os
+import copy
+import gc
+import json
+import pickle
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import schedule_engine as engine
+from pdf_cache import schedule_hash
+from shared_cache import SharedScheduleCache, freeze
+
+
+def test_frozen_snapshot():
+    """Test dello snapshot in sola lettura e delle copie modificabili"""
+    try:
+        schedule_data = engine.default_schedule_data()
+        schedule_data['schedule'] = engine.example_schedule()
+        frozen = freeze(schedule_data)
+
+        assert frozen == schedule_data and schedule_hash(frozen) == schedule_hash(schedule_data)
+        for mutate in (lambda: frozen.__setitem__('docente', 'X'),
+                       lambda: frozen['schedule']['LUN'].update({'1': {}}),
+                       lambda: frozen['ore_attive'].append(7),
+                       lambda: frozen['orari'].pop('1')):
+            try:
+                mutate()
+            except TypeError:
+                pass
+            else:
+                raise AssertionError("modifica non bloccata")
+
+        for plain in (copy.deepcopy(frozen), pickle.loads(pickle.dumps(frozen))):
+            assert type(plain) is dict and type(plain['schedule']['LUN']) is dict
+            assert type(plain['ore_attive']) is list and plain == schedule_data
+            plain['schedule']['LUN']['3']['aula'] = 'B1'
+        assert frozen['schedule']['LUN']['3']['aula'] == 'A15'
+        print("✅ Snapshot in sola lettura corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nello snapshot in sola lettura: {e}")
+        return False
+
+
+def test_shared_leases():
+    """Test di condivisione, invalidazione per mtime e conteggio dei riferimenti"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'config.json')
+            engine.save_config(engine.default_schedule_data(), path)
+            cache = SharedScheduleCache(engine.load_config)
+
+            leases = [cache.acquire(path) for _ in range(100)]
+            assert cache.loads == 1 and cache.hits == 99
+            assert all(lease.data is leases[0].data for lease in leases)
+            assert cache.stats()['refs'] == 100
+
+            # Copy-on-write: la copia privata non tocca lo snapshot
+            private = leases[0].copy()
+            private['docente'] = 'Mario Rossi'
+            leases[0].release()
+            leases[0].release()
+            assert cache.stats()['refs'] == 99
+            assert leases[1].data['docente'] == engine.DOCENTE_DEFAULT
+
+            # Nuovo file: i lease esistenti restano sul vecchio snapshot
+            engine.save_config(private, path)
+            os.utime(path, ns=(1, 1))
+            refreshed = cache.refresh(leases[1])
+            assert refreshed.data['docente'] == 'Mario Rossi' and cache.loads == 2
+            assert leases[2].data['docente'] == engine.DOCENTE_DEFAULT
+            assert cache.stats() == {'loads': 2, 'hits': 99, 'snapshots': 2, 'refs': 99}
+            assert cache.refresh(refreshed) is refreshed
+
+            # I lease non più referenziati vengono rilasciati dal garbage collector
+            del leases
+            gc.collect()
+            assert cache.stats()['snapshots'] == 1 and cache.stats()['refs'] == 1
+
+            missing = cache.acquire(os.path.join(directory, 'assente.json'))
+            assert missing.data is None
+            with open(path) as f:
+                assert json.load(f)['docente'] == 'Mario Rossi'
+        print("✅ Lease condivisi corretti")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nei lease condivisi: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test della cache condivisa"""
+    print("🧪 Test Cache Condivisa")
+    print("=" * 40)
+
+    tests = [
+        test_frozen_snapshot,
+        test_shared_leases
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test della cache condivisa sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
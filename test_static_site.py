@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test per l'esportazione del sito statico
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import schedule_engine as engine
+from static_site import Page, assign_paths, build_pages, build_site, load_teachers, page_key, slugify
+from storage import JSONDirectoryStorage
+
+
+def _archive(directory):
+    storage = JSONDirectoryStorage(os.path.join(directory, 'orari'))
+    first = engine.default_schedule_data()
+    first['schedule'] = engine.example_schedule()
+    second = engine.default_schedule_data()
+    second['docente'] = 'Mario Rossi'
+    second['schedule'] = {'MAR': {'1': {'classe': '2Esa', 'edificio': 'MB', 'piano': 'PT', 'aula': 'A15'}}}
+    return storage, storage.save(first), storage.save(second)
+
+
+def test_pages():
+    """Test delle pagine di docenti, classi, aule e piani"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            storage, _, _ = _archive(directory)
+            pages = {(p.kind, p.title): p for p in build_pages(load_teachers(storage))}
+            assert ('docente', 'Mario Rossi') in pages
+            classe = pages[('classe', '2Esa')].schedule_data
+            assert classe['schedule']['LUN']['3'] == {'classe': engine.DOCENTE_DEFAULT, 'edificio': 'MB',
+                                                      'piano': 'PT', 'aula': 'A15'}
+            assert classe['schedule']['MAR']['1']['classe'] == 'Mario Rossi'
+            aula = pages[('aula', 'A15 (MB PT)')].schedule_data
+            assert aula['schedule']['MAR']['1']['classe'] == '2Esa - Mario Rossi'
+            piano = pages[('piano', 'MB PT')].schedule_data
+            assert piano['schedule']['LUN']['3']['classe'] == 'A15 2Esa'
+            assert slugify("Aula Magna (Sede 2°)") == 'aula-magna-sede-2'
+
+            # Titoli uguali: i suffissi restano legati alla pagina tra le esecuzioni
+            scope = ('Istituto', '2025/2026')
+            rossi = [Page(('docente', scope, 'Rossi', i), 'docente', 'Rossi', scope, {}) for i in (1, 2, 3)]
+            paths = assign_paths(rossi)
+            assert sorted(paths.values()) == ['docenti/rossi', 'docenti/rossi-2', 'docenti/rossi-3']
+            previous = {path: {'id': page_key(p)} for p in rossi for path in [paths[p.id]]}
+            newcomer = Page(('docente', scope, 'Rossi', 0), 'docente', 'Rossi', scope, {})
+            again = assign_paths([newcomer] + rossi[1:], previous)
+            assert [again[p.id] for p in rossi[1:]] == [paths[p.id] for p in rossi[1:]]
+            assert again[newcomer.id] == 'docenti/rossi'
+        print("✅ Pagine di docenti, classi, aule e piani corrette")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nelle pagine: {e}")
+        return False
+
+
+def test_incremental_build():
+    """Test della ricostruzione delle sole pagine cambiate"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            storage, first_id, second_id = _archive(directory)
+            output = os.path.join(directory, 'sito')
+            logs = []
+
+            report = build_site(build_pages(load_teachers(storage)), output, ['tascabile'],
+                                workers=1, progress=logs.append)
+            assert report.built > 0 and report.skipped == 0 and not report.errors
+            with open(os.path.join(output, 'index.html'), encoding='utf-8') as f:
+                index = f.read()
+            assert 'href="classi/2esa.html"' in index and 'href="docenti/mario-rossi.html"' in index
+            with open(os.path.join(output, 'classi', '2esa-compatto.html'), encoding='utf-8') as f:
+                assert 'Mario Rossi 📍MB PT A15' in f.read()
+            with open(os.path.join(output, 'docenti', 'mario-rossi-tascabile.pdf'), 'rb') as f:
+                assert f.read().startswith(b'%PDF')
+
+            again = build_site(build_pages(load_teachers(storage)), output, ['tascabile'], workers=1)
+            assert again.built == 0 and again.skipped == report.built
+
+            # Rossi cambia aula: docente, classe, piano e le due aule, non gli altri
+            schedule_data = storage.load(second_id)
+            schedule_data['schedule']['MAR']['1']['aula'] = 'A99'
+            storage.save(schedule_data)
+            logs.clear()
+            changed = build_site(build_pages(load_teachers(storage)), output, ['tascabile'],
+                                 workers=1, progress=logs.append)
+            assert sorted(logs) == ["✅ aule/a15-mb-pt", "✅ aule/a99-mb-pt", "✅ classi/2esa",
+                                    "✅ docenti/mario-rossi", "✅ piani/mb-pt"]
+            assert changed.removed == 0
+
+            # Rossi eliminato: le sue pagine (e l'aula A99) vengono rimosse
+            storage.delete(second_id)
+            removed = build_site(build_pages(load_teachers(storage)), output, ['tascabile'],
+                                 workers=1, progress=logs.append)
+            assert removed.removed == 2
+            assert not os.path.exists(os.path.join(output, 'docenti', 'mario-rossi.html'))
+            assert not os.path.exists(os.path.join(output, 'aule', 'a99-mb-pt-tascabile.pdf'))
+        print("✅ Ricostruzione incrementale corretta")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nella ricostruzione incrementale: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test del sito statico"""
+    print("🧪 Test Sito Statico")
+    print("=" * 40)
+
+    tests = [
+        test_pages,
+        test_incremental_build
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test del sito statico sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test per l'archivio degli orari (SQLite e cartella JSON)
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config_schema import normalize_config
+from storage import SQLiteStorage, JSONDirectoryStorage
+
+
+def _teacher(docente, aula_gio_3, anno='2025/2026'):
+    return {
+        'docente': docente,
+        'istituto': 'Istituto Test',
+        'anno_scolastico': anno,
+        'giorni_settimana': ['GIO'],
+        'ore_attive': [3],
+        'schedule': {
+            'GIO': {
+                '2': {'classe': 'DISP.', 'edificio': '', 'piano': '', 'aula': ''},
+                '3': {'classe': '1A', 'edificio': 'MB', 'piano': 'PT', 'aula': aula_gio_3}
+            }
+        }
+    }
+
+
+def _check_backend(storage):
+    id_a = storage.save(_teacher('Rossi', 'A15'))
+    storage.save(_teacher('Bianchi', 'A15'))
+    storage.save(_teacher('Verdi', 'A43'))
+    storage.save(_teacher('Rossi', 'A15', anno='2024/2025'))
+
+    # Aggiornamento dello stesso docente: stesso id, niente duplicati
+    assert storage.save(_teacher('Rossi', 'A15')) == id_a
+    assert len(storage.list_teachers(anno_scolastico='2025/2026')) == 3
+    assert len(storage.list_teachers()) == 4
+
+    in_aula = storage.find_in_room('GIO', 3, 'A15', anno_scolastico='2025/2026')
+    assert sorted(r['docente'] for r in in_aula) == ['Bianchi', 'Rossi']
+    assert storage.find_in_room('GIO', '3', 'A15', edificio='C') == []
+    assert storage.find_in_room('GIO', 2, '') == []  # DISP. non è una lezione
+    assert len(storage.find_class('GIO', 3, '1A')) == 4
+
+    # Tutte le lezioni di un anno, senza gli slot DISP.
+    lessons = list(storage.iter_lessons(anno_scolastico='2025/2026'))
+    assert sorted((r['docente'], g, o, s.aula) for r, g, o, s in lessons) == [
+        ('Bianchi', 'GIO', '3', 'A15'), ('Rossi', 'GIO', '3', 'A15'), ('Verdi', 'GIO', '3', 'A43')]
+
+    # Al caricamento la configurazione è migrata allo schema corrente
+    assert storage.load(id_a) == normalize_config(_teacher('Rossi', 'A15'))
+    storage.delete(id_a)
+    assert storage.load(id_a) is None
+    assert len(storage.find_in_room('GIO', 3, 'A15')) == 2
+
+
+def test_sqlite_storage():
+    """Test dell'archivio SQLite"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            storage = SQLiteStorage(os.path.join(directory, 'orari.db'))
+            _check_backend(storage)
+            storage.close()
+        print("✅ Archivio SQLite corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nell'archivio SQLite: {e}")
+        return False
+
+
+def test_json_directory_storage():
+    """Test dell'archivio a cartella JSON"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            _check_backend(JSONDirectoryStorage(directory))
+        print("✅ Archivio a cartella JSON corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nell'archivio a cartella JSON: {e}")
+        return False
+
+
+def test_same_teacher_in_two_institutes():
+    """Test dello stesso docente in due istituti diversi"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            backends = [SQLiteStorage(os.path.join(directory, 'orari.db')),
+                        JSONDirectoryStorage(os.path.join(directory, 'orari'))]
+            for storage in backends:
+                first = _teacher('Rossi', 'A15')
+                second = dict(_teacher('Rossi', 'A43'), istituto='Altro Istituto')
+                id_a, id_b = storage.save(first), storage.save(second)
+                assert id_a != id_b
+                assert len(storage.list_teachers()) == 2
+                assert storage.load(id_a)['schedule']['GIO']['3']['aula'] == 'A15'
+                assert storage.load(id_b)['schedule']['GIO']['3']['aula'] == 'A43'
+            backends[0].close()
+        print("✅ Stesso docente in due istituti separato")
+        return True
+    except Exception as e:
+        print(f"❌ Errore con lo stesso docente in due istituti: {e}")
+        return False
+
+
+def test_json_import_export():
+    """Test di importazione ed esportazione del formato config_orario.json"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config_orario.json')
+            storage = SQLiteStorage(os.path.join(directory, 'orari.db'))
+            teacher_id = storage.import_json(source)
+            target = os.path.join(directory, 'esportato.json')
+            storage.export_json(teacher_id, target)
+            with open(source) as a, open(target) as b:
+                assert normalize_config(json.load(a)) == json.load(b)
+            storage.close()
+        print("✅ Importazione/esportazione JSON corretta")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nell'importazione/esportazione JSON: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test dell'archivio"""
+    print("🧪 Test Archivio Orari")
+    print("=" * 40)
+
+    tests = [
+        test_sqlite_storage,
+        test_json_directory_storage,
+        test_same_teacher_in_two_institutes,
+        test_json_import_export
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test dell'archivio sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Test per la gestione di più istituti (tenant)
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import http.client
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pdf_jobs
+import schedule_engine as engine
+from api_server import TenantSources, make_server
+from pdf_jobs import PDFJobQueue, IN_CODA
+from storage import JSONDirectoryStorage, SQLiteStorage
+from tenancy import DEFAULT_TENANT, TenantBusyError, TenantError, TenantRegistry
+
+
+def test_registry():
+    """Test di creazione, caricamento e isolamento degli istituti"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            registry = TenantRegistry(directory)
+            fermi = registry.create('fermi', {'nome': 'Liceo Fermi',
+                                              'predefiniti': {'istituto': 'Liceo Fermi', 'docente': 'Anna Verdi'},
+                                              'limiti': {'pdf_concorrenti': 1}})
+            volta = registry.create('volta', {})
+            assert registry.list() == ['fermi', 'volta']
+            assert registry.get('fermi') is fermi
+
+            schedule_data = fermi.default_schedule_data()
+            assert schedule_data['docente'] == 'Anna Verdi'
+            assert schedule_data['materie'] == engine.MATERIE_DEFAULT
+            assert volta.default('istituto') == engine.ISTITUTO_DEFAULT
+
+            assert fermi.config_path != volta.config_path
+            assert fermi.pdf_cache is not volta.pdf_cache
+            assert fermi.pdf_cache.cache_dir.startswith(fermi.path)
+
+            with fermi.pdf_slot():
+                try:
+                    with fermi.pdf_slot(timeout=0):
+                        raise AssertionError("limite di pdf_concorrenti non rispettato")
+                except TenantBusyError:
+                    pass
+                with volta.pdf_slot(timeout=0):
+                    pass
+
+            for archivio in ('../volta/orari.db', '/tmp/orari.db', 'dati\\..\\orari.db'):
+                try:
+                    registry.create('galilei', {'archivio': archivio})
+                    raise AssertionError(f"archivio {archivio} accettato")
+                except TenantError:
+                    pass
+
+            for bad in ('../altro', 'Fermi', 'mancante'):
+                try:
+                    registry.get(bad)
+                    raise AssertionError(f"istituto {bad} accettato")
+                except TenantError:
+                    pass
+
+            with open(os.path.join(directory, 'volta', 'istituto.json'), 'w') as f:
+                json.dump({'limiti': {'pdf_concorrenti': 0}}, f)
+            registry.forget('volta')
+            try:
+                registry.get('volta')
+                raise AssertionError("limite non valido accettato")
+            except TenantError:
+                pass
+
+            # Senza cartella degli istituti: comportamento a istituto singolo
+            legacy = TenantRegistry(None).get()
+            assert legacy.id == DEFAULT_TENANT and legacy.config_path == engine.CONFIG_PATH
+            assert legacy.max_pdf_jobs is None
+        print("✅ Registro degli istituti corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nel registro degli istituti: {e}")
+        return False
+
+
+def test_pdf_limits():
+    """Test del limite di PDF contemporanei per istituto nella coda"""
+    try:
+        release = threading.Event()
+        original = pdf_jobs._render
+
+        def slow_render(schedule_data, format_type):
+            release.wait(10)
+            return original(schedule_data, format_type)
+
+        pdf_jobs._render = slow_render
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                registry = TenantRegistry(directory)
+                fermi = registry.create('fermi', {'limiti': {'pdf_concorrenti': 1}})
+                volta = registry.create('volta', {'limiti': {'pdf_concorrenti': 1}})
+                schedule_data = engine.default_schedule_data()
+                schedule_data['schedule'] = engine.example_schedule()
+
+                queue = PDFJobQueue(max_workers=4, executor='thread')
+                first = queue.submit(schedule_data, 'standard', tenant=fermi)
+                second = queue.submit(schedule_data, 'a4', tenant=fermi)
+                other = queue.submit(schedule_data, 'standard', tenant=volta)
+                assert first is not other
+                assert second.status == IN_CODA and queue.pending('fermi') == 1
+                assert other.status != IN_CODA
+                release.set()
+                assert first.wait(60) and second.wait(60) and other.wait(60)
+                assert queue.pending('fermi') == 0
+
+                # Ogni istituto ha la propria cache
+                assert fermi.pdf_cache.get(second.key) == second.pdf_data
+                assert volta.pdf_cache.get(second.key) is None
+                queue.shutdown()
+        finally:
+            pdf_jobs._render = original
+        print("✅ Limiti dei PDF per istituto corretti")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nei limiti dei PDF per istituto: {e}")
+        return False
+
+
+def test_api_tenants():
+    """Test dell'API con più istituti sotto /<istituto>/"""
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            registry = TenantRegistry(directory)
+            fermi = registry.create('fermi', {'nome': 'Liceo Fermi', 'archivio': 'orari.db'})
+            volta = registry.create('volta', {'nome': 'ITIS Volta'})
+            storage = SQLiteStorage(fermi.archive)
+            schedule_data = fermi.default_schedule_data()
+            schedule_data['schedule'] = engine.example_schedule()
+            teacher_id = storage.save(schedule_data)
+            storage.close()
+            schedule_data['docente'] = 'Docente Volta'
+            engine.save_config(schedule_data, volta.config_path)
+            galilei = registry.create('galilei', {'archivio': 'orari'})
+            segreto = registry.create('segreto', {'archivio': 'orari'})
+            secret_id = JSONDirectoryStorage(segreto.archive).save(dict(schedule_data, docente='Segreto'))
+            JSONDirectoryStorage(galilei.archive)
+
+            server = make_server(TenantSources(registry), port=0, quiet=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            port = server.server_address[1]
+
+            def get(path):
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                conn.request('GET', path)
+                response = conn.getresponse()
+                body = response.read()
+                conn.close()
+                return response.status, body
+
+            try:
+                status, body = get('/')
+                assert status == 200 and b'Liceo Fermi' in body and b'/volta/' in body
+                status, body = get('/fermi/api/docenti')
+                assert status == 200 and json.loads(body)[0]['id'] == teacher_id
+                status, body = get('/fermi/')
+                assert f'/fermi/api/docenti/{teacher_id}/orario.pdf'.encode() in body
+                status, body = get('/volta/api/docenti/corrente')
+                assert status == 200 and json.loads(body)['docente'] == 'Docente Volta'
+                status, body = get(f'/volta/api/docenti/{teacher_id}')
+                assert status == 404
+                status, body = get('/altro/api/docenti')
+                assert status == 404
+                # Un id con "%2F" non esce dall'archivio dell'istituto
+                status, body = get(f'/galilei/api/docenti/..%2F..%2Fsegreto%2Forari%2F{secret_id}')
+                assert status == 404 and 'errore' in json.loads(body)
+                status, body = get(f'/segreto/api/docenti/{secret_id}')
+                assert status == 200 and json.loads(body)['docente'] == 'Segreto'
+            finally:
+                server.shutdown()
+                server.server_close()
+        print("✅ API con più istituti corretta")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nell'API con più istituti: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test degli istituti"""
+    print("🧪 Test Istituti (Tenant)")
+    print("=" * 40)
+
+    tests = [
+        test_registry,
+        test_pdf_limits,
+        test_api_tenants
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test degli istituti sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test per le viste trasposte (classe, aula, piano)
+"""
+
+import sys
+import os
+import copy
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import schedule_engine as engine
+from config_schema import normalize_config
+from views import AULA, CLASSE, PIANO, ViewIndex
+
+
+def _teachers():
+    first = engine.default_schedule_data()
+    first['schedule'] = engine.example_schedule()
+    second = engine.default_schedule_data()
+    second['docente'] = 'Mario Rossi'
+    second['schedule'] = {'LUN': {'3': {'classe': '2Esa', 'edificio': 'MB', 'piano': 'PT', 'aula': 'A16'}},
+                          'SAB': {'5': {'classe': '3C', 'edificio': 'C', 'piano': '1P', 'aula': 'A43'}}}
+    return first, second
+
+
+def test_views():
+    """Test delle viste per classe, aula e piano"""
+    try:
+        first, second = _teachers()
+        index = ViewIndex.from_teachers([first, second], first['istituto'], first['anno_scolastico'])
+
+        classe = index.find(CLASSE, '2esa')
+        assert index.label(CLASSE, classe) == '2Esa'
+        lessons = index.lessons(CLASSE, classe, 'LUN', 3)
+        assert sorted(index.teacher_name(t) for t in lessons) == [engine.DOCENTE_DEFAULT, 'Mario Rossi']
+        assert index.find(AULA, 'mb a15') == ('MB', 'A15')
+        assert index.find(PIANO, 'C 1P') == ('C', '1P')
+        assert index.find(CLASSE, '9Z') is None
+
+        # Compresenza: i due docenti nella stessa cella, ordinati per aula
+        data = index.schedule_data(CLASSE, classe)
+        assert data['schedule']['LUN']['3']['classe'] == f"{engine.DOCENTE_DEFAULT} / Mario Rossi"
+        assert data['docente'] == 'Classe 2Esa'
+        piano = index.schedule_data(PIANO, ('C', '1P'))
+        assert piano['schedule']['SAB']['5']['classe'] == 'A43 3C'
+
+        # Stesse funzioni del motore per tabelle e PDF
+        normalize_config(copy.deepcopy(data))
+        for format_type in ('Standard', 'Compatto', 'Tascabile'):
+            header, rows = engine.build_table_rows(data, False, format_type)
+            assert any('Mario Rossi' in cell for row in rows for cell in row)
+        assert engine.render_pdf(index.schedule_data(AULA, ('MB', 'A15')), 'tascabile').startswith(b'%PDF')
+        print("✅ Viste per classe, aula e piano corrette")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nelle viste: {e}")
+        return False
+
+
+def test_incremental_updates():
+    """Test dell'aggiornamento incrementale degli indici"""
+    try:
+        first, second = _teachers()
+        index = ViewIndex.from_teachers([first, second])
+        before = index.schedule_data(AULA, ('MB', 'A15'))
+        assert index.schedule_data(AULA, ('MB', 'A15')) is before  # memorizzata
+
+        # Rossi lascia il sabato: sparisce la classe 3C, l'aula A43 resta (primo docente)
+        second['schedule'] = {'LUN': second['schedule']['LUN']}
+        index.set_teacher(1, second['schedule'], docente='Mario Rossi')
+        assert index.find(CLASSE, '3C') is None
+        assert index.lessons(AULA, ('C', 'A43'), 'SAB', 5) == {}
+        assert index.schedule_data(AULA, ('MB', 'A15')) is before  # vista non toccata
+
+        # Rossi passa in A15: cambiano le viste di A15 e A16
+        index.update_slot(1, 'LUN', 3, {'classe': '2Esa', 'edificio': 'MB', 'piano': 'PT',
+                                                    'aula': 'A15'})
+        after = index.schedule_data(AULA, ('MB', 'A15'))
+        assert after is not before and 'Mario Rossi' in after['schedule']['LUN']['3']['classe']
+        assert all(1 not in lessons for lessons in index.week(AULA, ('MB', 'A16')).values())
+
+        index.remove_teacher(1)
+        rebuilt = ViewIndex.from_teachers([first])
+        for kind in (CLASSE, AULA, PIANO):
+            assert index.keys(kind) == rebuilt.keys(kind)
+            for key in index.keys(kind):
+                assert index.schedule_data(kind, key) == rebuilt.schedule_data(kind, key)
+        print("✅ Aggiornamento incrementale corretto")
+        return True
+    except Exception as e:
+        print(f"❌ Errore nell'aggiornamento incrementale: {e}")
+        return False
+
+
+def test_same_name_records():
+    """Test di due record con lo stesso nome di docente"""
+    try:
+        first, second = _teachers()
+        second['docente'] = first['docente']
+        index = ViewIndex.from_records([({'id': 'a'}, first), ({'id': 'b'}, second)])
+        lessons = index.lessons(CLASSE, index.find(CLASSE, '2Esa'), 'LUN', 3)
+        assert sorted(lessons) == ['a', 'b']
+        assert index.find(CLASSE, '3C') is not None  # lezione del solo secondo record
+
+        # Rinominare un docente aggiorna le celle delle sue viste
+        index.set_teacher('b', second['schedule'], second['orari'], 'Mario Rossi')
+        cell = index.schedule_data(CLASSE, index.find(CLASSE, '2Esa'))['schedule']['LUN']['3']
+        assert cell['classe'] == f"{first['docente']} / Mario Rossi"
+        print("✅ Record con lo stesso nome separati")
+        return True
+    except Exception as e:
+        print(f"❌ Errore con record con lo stesso nome: {e}")
+        return False
+
+
+def main():
+    """Esegue tutti i test delle viste"""
+    print("🧪 Test Viste per Classe, Aula e Piano")
+    print("=" * 40)
+
+    tests = [
+        test_views,
+        test_incremental_updates,
+        test_same_name_records
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print("=" * 40)
+    print(f"📊 Risultati: {passed}/{total} test superati")
+
+    if passed == total:
+        print("🎉 Tutti i test delle viste sono stati superati!")
+        return True
+    else:
+        print("⚠️ Alcuni test sono falliti. Controlla gli errori sopra.")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Viste trasposte dell'orario: per classe, per aula e per piano.
+
+Gli orari sono salvati per docente (docente → giorno → ora); ViewIndex ne
+mantiene gli indici inversi, aggiornati docente per docente (set_teacher
+tocca solo gli slot cambiati, come ConflictIndex):
+
+- classe → (giorno, ora) → {id docente: Slot}
+- aula (edificio + aula) → (giorno, ora) → {id docente: Slot}
+- piano (edificio + piano) → (giorno, ora) → {id docente: Slot}
+
+L'orario settimanale di una classe o di un'aula è una lettura O(1) invece di
+una scansione di tutti i docenti.
+
+I docenti sono identificati dall'id del record dell'archivio: due record con
+lo stesso nome restano distinti, il nome serve solo per la visualizzazione.
+
+schedule_data() restituisce la vista nel formato di config_orario.json, così
+tabelle (Standard/Compatto/Tascabile) e PDF usano le stesse funzioni del
+motore degli orari dei docenti; il risultato è memorizzato finché la vista
+non cambia.
+
+Esempio da riga di comando:
+    python views.py orari.db classe 2Esa --formato Compatto
+    python views.py orari.db aula "MB A15" --pdf aula_a15.pdf
+"""
+
+import argparse
+import sys
+import threading
+from collections import Counter, defaultdict
+
+import schedule_engine as engine
+from config_schema import default_times
+from conflicts import class_key, room_key
+from schedule_model import Slot, as_grid
+
+# Tipi di vista
+CLASSE = 'classe'
+AULA = 'aula'
+PIANO = 'piano'
+
+VIEW_KINDS = (CLASSE, AULA, PIANO)
+
+
+def floor_key(slot):
+    """Chiave del piano di uno slot (edificio + piano), None se non indicati"""
+    edificio = slot.edificio.strip().upper()
+    piano = slot.piano.strip().upper()
+    if not edificio and not piano:
+        return None
+    return (edificio, piano)
+
+
+def _keys(slot):
+    return ((CLASSE, class_key(slot)), (AULA, room_key(slot)), (PIANO, floor_key(slot)))
+
+
+def _label(kind, slot):
+    if kind == CLASSE:
+        return slot.classe.strip()
+    if kind == AULA:
+        luogo = ' '.join(p for p in (slot.edificio, slot.piano) if p)
+        return f"{slot.aula} ({luogo})" if luogo else slot.aula
+    return ' '.join(p for p in (slot.edificio, slot.piano) if p)
+
+
+def _cell(kind, entries):
+    """Slot mostrato nella vista per le lezioni (docente, Slot) di un'ora"""
+    entries = sorted(entries, key=lambda e: (e[1].aula, e[0]))
+    if kind == CLASSE:
+        # Compresenze: più docenti nella stessa classe
+        first = entries[0][1]
+        return {'classe': " / ".join(t for t, _ in entries),
+                'edificio': first.edificio, 'piano': first.piano, 'aula': first.aula}
+    if kind == AULA:
+        text = " / ".join(f"{s.classe} - {t}" for t, s in entries)
+    else:
+        text = " / ".join(f"{s.aula} {s.classe}".strip() for _, s in entries)
+    return {'classe': text, 'edificio': '', 'piano': '', 'aula': ''}
+
+
+class ViewIndex:
+    """Indici classe/aula/piano → (giorno, ora) → lezioni, aggiornabili slot per slot"""
+
+    def __init__(self, istituto='', anno_scolastico=''):
+        self.istituto = istituto
+        self.anno_scolastico = anno_scolastico
+        self._views = {kind: defaultdict(lambda: defaultdict(dict)) for kind in VIEW_KINDS}
+        self._labels = {}                 # (tipo, chiave) -> nome visualizzato
+        self._slots = {}                  # id docente -> {(giorno, ora): Slot}
+        self._names = {}                  # id docente -> nome del docente
+        self._hours = Counter()           # ora -> numero di lezioni
+        self._orari = {}                  # ora -> {dalle, alle} (dal primo docente che la definisce)
+        self._cache = {}                  # (tipo, chiave) -> schedule_data della vista
+        self._lock = threading.RLock()
+
+    # --- Aggiornamento -------------------------------------------------------
+
+    def update_slot(self, teacher, giorno, ora, slot):
+        """Aggiorna lo slot (dict o Slot, None = rimosso) di un docente"""
+        if isinstance(slot, dict):
+            slot = Slot.from_dict(slot)
+        position = (giorno, str(ora))
+        with self._lock:
+            slots = self._slots.setdefault(teacher, {})
+            old = slots.get(position)
+            if old is slot:
+                return
+            if old is not None:
+                self._unindex(teacher, position, old)
+            if slot is not None and slot.is_lesson:
+                slots[position] = slot
+                self._index(teacher, position, slot)
+            else:
+                slots.pop(position, None)
+
+    def set_teacher(self, teacher, schedule, orari=None, docente=None):
+        """
+        Sostituisce l'orario (JSON o ScheduleGrid) di un docente (id del record,
+        docente = nome visualizzato), aggiornando solo gli slot cambiati.
+        """
+        lessons = {(giorno, ora): slot for giorno, ora, slot in as_grid(schedule).iter_lessons()}
+        with self._lock:
+            name = docente if docente is not None else str(teacher)
+            if self._names.get(teacher, name) != name:
+                # Nuovo nome: cambiano le celle di tutte le viste del docente
+                self.remove_teacher(teacher)
+            self._names[teacher] = name
+            for ora, times in (orari or {}).items():
+                self._orari.setdefault(str(ora), times)
+            for position in set(self._slots.get(teacher, ())) - set(lessons):
+                self.update_slot(teacher, *position, None)
+            for (giorno, ora), slot in lessons.items():
+                self.update_slot(teacher, giorno, ora, slot)
+
+    def remove_teacher(self, teacher):
+        with self._lock:
+            for position, slot in self._slots.pop(teacher, {}).items():
+                self._unindex(teacher, position, slot)
+            self._names.pop(teacher, None)
+
+    def _index(self, teacher, position, slot):
+        if self._hours[position[1]] == 0:
+            # Nuova ora nell'istituto: cambiano le colonne di tutte le viste
+            self._cache.clear()
+        self._hours[position[1]] += 1
+        for kind, key in _keys(slot):
+            if key is None:
+                continue
+            self._views[kind][key][position][teacher] = slot
+            self._labels.setdefault((kind, key), _label(kind, slot))
+            self._cache.pop((kind, key), None)
+
+    def _unindex(self, teacher, position, slot):
+        self._hours[position[1]] -= 1
+        if self._hours[position[1]] <= 0:
+            del self._hours[position[1]]
+            self._cache.clear()
+        for kind, key in _keys(slot):
+            if key is None:
+                continue
+            view = self._views[kind].get(key)
+            if view is None:
+                continue
+            lessons = view.get(position)
+            if lessons is not None:
+                lessons.pop(teacher, None)
+                if not lessons:
+                    del view[position]
+            if not view:
+                del self._views[kind][key]
+                self._labels.pop((kind, key), None)
+            self._cache.pop((kind, key), None)
+
+    # --- Ricerca -------------------------------------------------------------
+
+    def keys(self, kind):
+        """Chiavi di un tipo di vista, ordinate per nome"""
+        with self._lock:
+            return sorted(self._views[kind], key=lambda k: (self._labels[(kind, k)], k))
+
+    def label(self, kind, key):
+        return self._labels.get((kind, key), '')
+
+    def find(self, kind, text):
+        """Chiave della vista per un nome scritto liberamente ("2esa", "MB A15", "C 1P")"""
+        wanted = ' '.join(text.split()).upper()
+        with self._lock:
+            for key in self._views[kind]:
+                flat = key if isinstance(key, str) else ' '.join(p for p in key if p)
+                if flat == wanted or self._labels[(kind, key)].upper() == wanted:
+                    return key
+        return None
+
+    def lessons(self, kind, key, giorno, ora):
+        """{id docente: Slot} di una vista in un'ora (O(1))"""
+        with self._lock:
+            view = self._views[kind].get(key)
+            return dict(view.get((giorno, str(ora)), {})) if view else {}
+
+    def week(self, kind, key):
+        """{(giorno, ora): {id docente: Slot}} di una vista"""
+        with self._lock:
+            view = self._views[kind].get(key, {})
+            return {position: dict(lessons) for position, lessons in view.items()}
+
+    def schedule_data(self, kind, key):
+        """
+        Vista nel formato di config_orario.json (per tabelle e PDF del motore);
+        None se la chiave non esiste. Da non modificare: è condivisa fino alla
+        prossima modifica della vista.
+        """
+        with self._lock:
+            cached = self._cache.get((kind, key))
+            if cached is not None:
+                return cached
+            view = self._views[kind].get(key)
+            if view is None:
+                return None
+            schedule = defaultdict(dict)
+            for (giorno, ora), lessons in view.items():
+                schedule[giorno][ora] = _cell(kind, [(self._names[t], slot) for t, slot in lessons.items()])
+            days = set(schedule)
+            ore_attive = sorted(int(ora) for ora in self._hours)
+            titles = {CLASSE: ("Classe", "Orario della classe"),
+                      AULA: ("Aula", "Orario dell'aula"),
+                      PIANO: ("Piano", "Orario del piano")}
+            prefix, subtitle = titles[kind]
+            data = {
+                'docente': f"{prefix} {self._labels[(kind, key)]}",
+                'materie': subtitle,
+                'istituto': self.istituto,
+                'anno_scolastico': self.anno_scolastico,
+                'giorni_settimana': [g for g in engine.GIORNI if g != 'DOM' or 'DOM' in days],
+                'giorno_libero': 'DOM',
+                'include_giorno_libero': 'DOM' in days,
+                'ore_attive': ore_attive,
+                'orari': {str(o): dict(self._orari.get(str(o)) or default_times(o)) for o in ore_attive},
+                'schedule': {giorno: dict(slots) for giorno, slots in schedule.items()},
+            }
+            self._cache[(kind, key)] = data
+            return data
+
+    def teachers(self):
+        """Id dei docenti indicizzati"""
+        with self._lock:
+            return sorted(self._slots)
+
+    def teacher_name(self, teacher):
+        return self._names.get(teacher, '')
+
+    def __len__(self):
+        return len(self._slots)
+
+    @classmethod
+    def from_records(cls, records, istituto='', anno_scolastico=''):
+        """Indice da un iterabile di (record, schedule_data) dell'archivio"""
+        index = cls(istituto, anno_scolastico)
+        for record, schedule_data in records:
+            index.set_teacher(record['id'], schedule_data['schedule'], schedule_data['orari'],
+                              schedule_data['docente'])
+        return index
+
+    @classmethod
+    def from_teachers(cls, teachers, istituto='', anno_scolastico=''):
+        """Indice da un iterabile di schedule_data (id = posizione nell'elenco)"""
+        return cls.from_records((({'id': i}, schedule_data) for i, schedule_data in enumerate(teachers)),
+                                istituto, anno_scolastico)
+
+    @classmethod
+    def from_storage(cls, storage, istituto, anno_scolastico):
+        """Indice delle viste di un istituto e anno scolastico di un archivio"""
+        records = sorted(storage.list_teachers(istituto, anno_scolastico),
+                         key=lambda r: (r['docente'], str(r['id'])))
+        loaded = ((record, storage.load(record['id'])) for record in records)
+        return cls.from_records(((r, t) for r, t in loaded if t is not None), istituto, anno_scolastico)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Orario di una classe, di un'aula o di un piano")
+    parser.add_argument('archivio', help="File .db/.sqlite oppure cartella di file JSON")
+    parser.add_argument('tipo', choices=VIEW_KINDS)
+    parser.add_argument('nome', nargs='?', help="Classe, aula (\"MB A15\") o piano (\"C 1P\"); "
+                                                "senza nome elenca le viste")
+    parser.add_argument('--istituto', default=engine.ISTITUTO_DEFAULT)
+    parser.add_argument('--anno', dest='anno_scolastico', default=engine.ANNO_SCOLASTICO_DEFAULT)
+    parser.add_argument('--formato', choices=['Standard', 'Compatto', 'Tascabile'], default='Compatto')
+    parser.add_argument('--pdf', help="Scrive anche il PDF (formato standard) in questo file")
+    args = parser.parse_args(argv)
+
+    from storage import open_storage
+    index = ViewIndex.from_storage(open_storage(args.archivio), args.istituto, args.anno_scolastico)
+    if not args.nome:
+        for key in index.keys(args.tipo):
+            print(index.label(args.tipo, key))
+        return 0
+
+    key = index.find(args.tipo, args.nome)
+    if key is None:
+        print(f"❌ {args.tipo} {args.nome} non trovata")
+        return 1
+    schedule_data = index.schedule_data(args.tipo, key)
+    header, rows = engine.build_table_rows(schedule_data, False, args.formato)
+    print(f"📅 {schedule_data['docente']}")
+    print(engine.build_markdown_table(header, rows))
+    if args.pdf:
+        with open(args.pdf, 'wb') as f:
+            f.write(engine.render_pdf(schedule_data))
+        print(f"🖨️ PDF scritto in {args.pdf}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())